@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """In-process LRU cache with per-entry expiry.
+
+    Generation counters are kept apart from the LRU so that evicting one
+    can never make an older generation, and its stale entries, current
+    again. Past ``max_entries`` of them they are all dropped and start
+    over from a new epoch above every value handed out so far.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._epoch = 0
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, self._epoch)
+
+    async def incr(self, key: str) -> int:
+        if key not in self._counters and len(self._counters) >= self.max_entries:
+            self._epoch = max(self._counters.values()) + 1
+            self._counters.clear()
+        self._counters[key] = self._counters.get(key, self._epoch) + 1
+        return self._counters[key]
+
+    async def close(self):
+        pass
+
+
+# Reads, or with ARGV[2] == "1" increments, a generation counter. A
+# counter that expired or was evicted starts over from the Redis clock in
+# microseconds, above every value it had, so an older generation never
+# becomes current again.
+COUNTER = """
+local value = redis.call("GET", KEYS[1])
+if not value then
+    local now = redis.call("TIME")
+    value = now[1] .. string.format("%06d", tonumber(now[2]))
+    redis.call("SET", KEYS[1], value, "EX", ARGV[1])
+end
+if ARGV[2] == "1" then
+    value = redis.call("INCR", KEYS[1])
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+end
+return tonumber(value)
+"""
+
+
+class RedisBackend:
+    """Backend over any ``redis.asyncio``-compatible client.
+
+    Every key has a TTL, so the ``volatile-lru`` policy of the production
+    Redis can evict any of them. Counters live ``counter_ttl`` seconds from
+    their last bump, longer than the entries built from them.
+    """
+
+    def __init__(self, client, prefix: str = "quickapi:", counter_ttl: int = 86400):
+        self.client = client
+        self.prefix = prefix
+        self.counter_ttl = counter_ttl
+        self._counter = client.register_script(COUNTER)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.client.set(self.prefix + key, value, ex=ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def get_counter(self, key: str) -> int:
+        return await self._counter(keys=[self.prefix + key], args=[self.counter_ttl, 0])
+
+    async def incr(self, key: str) -> int:
+        return await self._counter(keys=[self.prefix + key], args=[self.counter_ttl, 1])
+
+    async def close(self):
+        await self.client.aclose()
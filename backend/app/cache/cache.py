@@ -0,0 +1,150 @@
+import asyncio
+import random
+
+import orjson
+
+from app import config
+from app.cache.backends import MemoryBackend, RedisBackend
+from app.utils.serialization import encode
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class Cache:
+    """Read-through cache of JSON-serializable values.
+
+    Concurrent misses on the same key share one load (single flight), and
+    TTLs are jittered so hot keys filled together do not expire together.
+    A failing backend degrades to uncached reads instead of failing requests.
+    """
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def get_or_load(self, key: str, loader):
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+        ``loader`` is an async callable returning a JSON-serializable value;
+        ``None`` results are returned but not cached.
+        """
+        if self.backend is None:
+            return await loader()
+
+        try:
+            raw = await self.backend.get(key)
+        except Exception:
+            self.stats.errors += 1
+            raw = None
+        if raw is not None:
+            self.stats.hits += 1
+            return orjson.loads(raw)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only the leading request was cancelled: load again.
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            return await self.get_or_load(key, loader)
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._inflight[key]
+
+        if value is not None:
+            ttl = max(1, int(self.ttl * random.uniform(0.9, 1.1)))
+            try:
+                await self.backend.set(key, encode(value), ttl)
+            except Exception:
+                self.stats.errors += 1
+        return value
+
+    async def invalidate(self, *keys: str):
+        if self.backend is None:
+            return
+        self.stats.invalidations += len(keys)
+        try:
+            await self.backend.delete(*keys)
+        except Exception:
+            self.stats.errors += 1
+
+    async def generation(self, name: str) -> int:
+        """Current generation of a group of keys, for use inside those keys."""
+        if self.backend is None:
+            return 0
+        try:
+            return await self.backend.get_counter(f"gen:{name}")
+        except Exception:
+            self.stats.errors += 1
+            return 0
+
+    async def bump(self, name: str):
+        """Invalidate every key built from the generation of ``name``."""
+        if self.backend is None:
+            return
+        self.stats.invalidations += 1
+        try:
+            await self.backend.incr(f"gen:{name}")
+        except Exception:
+            self.stats.errors += 1
+
+    async def close(self):
+        """Release the backend's connections, on shutdown."""
+        if self.backend is None:
+            return
+        try:
+            await self.backend.close()
+        except Exception:
+            self.stats.errors += 1
+
+
+def build_backend():
+    if config.CACHE_BACKEND == "memory":
+        return MemoryBackend(config.CACHE_MAX_ENTRIES)
+    if config.CACHE_BACKEND == "redis":
+        from redis.asyncio import Redis
+
+        counter_ttl = max(config.CACHE_COUNTER_TTL, 2 * config.CACHE_TTL)
+        return RedisBackend(Redis.from_url(config.REDIS_URL), counter_ttl=counter_ttl)
+    return None
+
+
+cache = Cache(build_backend(), config.CACHE_TTL)
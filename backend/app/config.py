@@ -0,0 +1,225 @@
+import os
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None or value == "" else int(value)
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return default if value is None or value == "" else float(value)
+
+
+POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "quickapi-postgres")
+POSTGRES_PORT = env_int("POSTGRES_PORT", 5432)
+POSTGRES_DB = os.getenv("POSTGRES_DB", "quickapi")
+
+_credentials = f"{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql+psycopg2://{_credentials}"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or f"postgresql+asyncpg://{_credentials}"
+
+# Read replicas, as comma-separated URLs or as host[:port] names reached
+# with the primary's credentials and database. The asyncpg URLs default to
+# the same servers.
+_replica_hosts = [host.strip() for host in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",") if host.strip()]
+_replica_credentials = [
+    f"{POSTGRES_USER}:{POSTGRES_PASSWORD}@{host if ':' in host else f'{host}:{POSTGRES_PORT}'}/{POSTGRES_DB}"
+    for host in _replica_hosts
+]
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+] or [f"postgresql+psycopg2://{credentials}" for credentials in _replica_credentials]
+ASYNC_DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+] or [f"postgresql+asyncpg://{credentials}" for credentials in _replica_credentials]
+# After a successful write, the client's reads go to the primary for this
+# many seconds (a cookie), so it sees its own writes on any worker.
+REPLICA_STICKY_SECONDS = env_int("REPLICA_STICKY_SECONDS", 5)
+REPLICA_STICKY_COOKIE = os.getenv("REPLICA_STICKY_COOKIE", "quickapi_primary")
+# Replicas are checked every REPLICA_CHECK_INTERVAL seconds; one that is
+# down or replays more than REPLICA_MAX_LAG seconds behind serves no reads
+# until a later check passes. A failed read falls back to the primary.
+REPLICA_CHECK_INTERVAL = env_float("REPLICA_CHECK_INTERVAL", 2.0)
+REPLICA_MAX_LAG = env_float("REPLICA_MAX_LAG", 5.0)
+
+# "sync" serves requests from the psycopg2 engine through the threadpool,
+# "async" serves them from the asyncpg engine on the event loop.
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+DB_ECHO = env_bool("DB_ECHO", False)
+DB_POOL_SIZE = env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_TIMEOUT = env_float("DB_POOL_TIMEOUT", 30.0)
+DB_CONNECT_TIMEOUT = env_int("DB_CONNECT_TIMEOUT", 10)
+DB_STATEMENT_TIMEOUT_MS = env_int("DB_STATEMENT_TIMEOUT_MS", 0)
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "quickapi")
+
+# Connections each worker opens before it serves, so its first requests
+# do not all connect at once; -1 opens the whole pool.
+DB_POOL_WARMUP = env_int("DB_POOL_WARMUP", -1)
+# Seconds shutdown waits for checked-out connections to come back before
+# the pools are closed.
+DB_DRAIN_TIMEOUT = env_float("DB_DRAIN_TIMEOUT", 10.0)
+
+# Connection budget for the whole deployment. When set, it is divided
+# between the WEB_CONCURRENCY workers and overflow is disabled, so the
+# server never opens more than DB_POOL_TOTAL connections in total.
+DB_POOL_TOTAL = env_int("DB_POOL_TOTAL", 0)
+WEB_CONCURRENCY = max(1, env_int("WEB_CONCURRENCY", 1))
+
+# Whether the process that starts the server migrates the schema first.
+# ``python -m app.serve`` does it once before starting its workers; turn it
+# off when migrations run as a separate step (``python -m app.migrate``).
+MIGRATE_ON_STARTUP = env_bool("MIGRATE_ON_STARTUP", True)
+
+# ``python -m app.serve``: WEB_CONCURRENCY uvicorn worker processes.
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = env_int("SERVER_PORT", 8000)
+# "uvloop" and "httptools" ship with uvicorn[standard]; "auto" falls back
+# to asyncio and h11 when they are missing.
+SERVER_LOOP = os.getenv("SERVER_LOOP", "uvloop")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "httptools")
+# Seconds in-flight requests get to finish after SIGTERM.
+SERVER_GRACEFUL_TIMEOUT = env_int("SERVER_GRACEFUL_TIMEOUT", 30)
+SERVER_ACCESS_LOG = env_bool("SERVER_ACCESS_LOG", False)
+# Comma-separated proxy addresses trusted for X-Forwarded-For/-Proto.
+SERVER_FORWARDED_ALLOW_IPS = os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# "memory" keeps an LRU/TTL cache in each worker, "redis" shares one through
+# REDIS_URL, "none" disables read-through caching. Invalidation is only
+# seen by every worker with "redis"; with "memory" and several workers,
+# other workers serve their copy until CACHE_TTL runs out.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = env_int("CACHE_TTL", 60)
+CACHE_MAX_ENTRIES = env_int("CACHE_MAX_ENTRIES", 10000)
+# Seconds a generation counter outlives its last bump in Redis; at least
+# twice CACHE_TTL.
+CACHE_COUNTER_TTL = env_int("CACHE_COUNTER_TTL", 86400)
+REDIS_URL = os.getenv("REDIS_URL", "redis://quickapi-redis:6379/0")
+
+# Timelines behind GET /feed: "memory" keeps them in each worker, "redis"
+# shares them through REDIS_URL, "none" serves the feed from the database.
+# With "memory" and several workers, a worker only sees the writes it
+# handled itself until its timelines are evicted and rebuilt.
+FEED_BACKEND = os.getenv("FEED_BACKEND", "memory")
+# Newest posts kept per timeline; older pages are read from the database.
+FEED_MAX_LENGTH = env_int("FEED_MAX_LENGTH", 1000)
+# Timelines kept by the memory backend, least recently used evicted first.
+FEED_MAX_TIMELINES = env_int("FEED_MAX_TIMELINES", 10000)
+# Seconds an unwritten timeline lives in Redis before it is rebuilt.
+FEED_TTL = env_int("FEED_TTL", 86400)
+
+# Cache-Control of successful GET responses under HTTP_PUBLIC_PATHS. With
+# both at 0, browsers and proxies may keep a copy but revalidate it with
+# If-None-Match on every use; HTTP_SHARED_MAX_AGE lets a CDN or reverse
+# proxy serve its copy for that many seconds, HTTP_MAX_AGE does the same
+# for every cache. Other GETs (authors, with their emails) are only kept
+# by the client and revalidated; /metrics is never stored.
+HTTP_MAX_AGE = env_int("HTTP_MAX_AGE", 0)
+HTTP_SHARED_MAX_AGE = env_int("HTTP_SHARED_MAX_AGE", 0)
+HTTP_PUBLIC_PATHS = tuple(
+    path.strip() for path in os.getenv("HTTP_PUBLIC_PATHS", "/p,/r,/feed").split(",") if path.strip()
+)
+
+BULK_MAX_ITEMS = env_int("BULK_MAX_ITEMS", 10000)
+# Bytes of a bulk request body; a larger one is refused while it is read,
+# before it is buffered or parsed.
+BULK_MAX_BYTES = env_int("BULK_MAX_BYTES", 16 * 1024 * 1024)
+BULK_BATCH_SIZE = env_int("BULK_BATCH_SIZE", 1000)
+
+# Rows fetched per round trip from the server-side cursor of a stream.
+STREAM_BATCH_SIZE = env_int("STREAM_BATCH_SIZE", 500)
+
+# Response compression: the first of COMPRESSION_CODECS the client accepts
+# ("zstd" and "br" need the zstandard and brotli packages; empty disables
+# it). Whole bodies under COMPRESSION_MIN_SIZE bytes are sent as they are.
+# The levels favour CPU over ratio; JSON still shrinks several times.
+COMPRESSION_CODECS = os.getenv("COMPRESSION_CODECS", "zstd,br,gzip")
+COMPRESSION_MIN_SIZE = env_int("COMPRESSION_MIN_SIZE", 1024)
+COMPRESSION_GZIP_LEVEL = env_int("COMPRESSION_GZIP_LEVEL", 5)
+COMPRESSION_BROTLI_LEVEL = env_int("COMPRESSION_BROTLI_LEVEL", 4)
+COMPRESSION_ZSTD_LEVEL = env_int("COMPRESSION_ZSTD_LEVEL", 3)
+
+# Token-bucket rate limits per client address: "memory" keeps the buckets
+# in each worker (every worker then allows the full rate), "redis" shares
+# them through REDIS_URL, "none" disables them. Each client gets
+# RATE_LIMIT_RATE requests per second (0 for no overall limit) with bursts
+# of RATE_LIMIT_BURST, at least 1; RATE_LIMIT_ROUTES adds per-client limits
+# for single routes, e.g. "POST /a/create=1:5, GET /p/=20:40" (rate:burst).
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "none")
+RATE_LIMIT_RATE = env_float("RATE_LIMIT_RATE", 50.0)
+RATE_LIMIT_BURST = env_float("RATE_LIMIT_BURST", 100.0)
+RATE_LIMIT_ROUTES = os.getenv("RATE_LIMIT_ROUTES", "")
+# Buckets kept by the memory backend, least recently used evicted first.
+RATE_LIMIT_MAX_BUCKETS = env_int("RATE_LIMIT_MAX_BUCKETS", 100000)
+
+# Requests a worker handles at once; 0 matches its connection pool
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW), -1 disables admission control. Up to
+# ADMISSION_MAX_WAITING more wait ADMISSION_WAIT_TIMEOUT seconds for a
+# slot; the rest are answered 503. ADMISSION_MAX_PER_CLIENT (0 for no
+# limit) answers 429 to a client with that many requests in flight.
+ADMISSION_MAX_ACTIVE = env_int("ADMISSION_MAX_ACTIVE", 0)
+ADMISSION_MAX_WAITING = env_int("ADMISSION_MAX_WAITING", 100)
+ADMISSION_WAIT_TIMEOUT = env_float("ADMISSION_WAIT_TIMEOUT", 5.0)
+ADMISSION_MAX_PER_CLIENT = env_int("ADMISSION_MAX_PER_CLIENT", 0)
+
+# Path prefixes that neither limit applies to, so monitoring keeps working
+# under load.
+LIMITS_EXEMPT_PATHS = tuple(
+    path.strip() for path in os.getenv("LIMITS_EXEMPT_PATHS", "/metrics,/docs,/redoc,/openapi.json").split(",")
+    if path.strip()
+)
+
+# Ids per transaction when app.utils.reconcile recomputes the counters.
+RECONCILE_BATCH_SIZE = env_int("RECONCILE_BATCH_SIZE", 5000)
+
+# Deleting an author disables up to this many posts and replies in the
+# request's transaction; larger histories are disabled in the background,
+# CASCADE_BATCH_SIZE posts and replies per transaction.
+CASCADE_SYNC_LIMIT = env_int("CASCADE_SYNC_LIMIT", 1000)
+CASCADE_BATCH_SIZE = env_int("CASCADE_BATCH_SIZE", 1000)
+
+# Write-behind for POST /r/create: replies are queued in the worker and
+# inserted REPLY_WRITE_BATCH_SIZE at a time, one commit per batch, at most
+# REPLY_WRITE_WINDOW_MS after the first of them. Clients choose with
+# ?ack=committed (the default) or ?ack=accepted whether to wait for it.
+REPLY_WRITE_BEHIND = env_bool("REPLY_WRITE_BEHIND", False)
+REPLY_WRITE_QUEUE_SIZE = env_int("REPLY_WRITE_QUEUE_SIZE", 10000)
+REPLY_WRITE_BATCH_SIZE = env_int("REPLY_WRITE_BATCH_SIZE", 500)
+REPLY_WRITE_WINDOW_MS = env_float("REPLY_WRITE_WINDOW_MS", 5.0)
+# How long a request waits for room in a full queue before a 503.
+REPLY_WRITE_PUT_TIMEOUT_MS = env_float("REPLY_WRITE_PUT_TIMEOUT_MS", 100.0)
+
+# Most ids accepted by POST /a/batch and /p/batch, and the largest batch the
+# lookup coalescer sends as one query.
+BATCH_MAX_IDS = env_int("BATCH_MAX_IDS", 100)
+# How long the coalescer holds a batch open for more ids. 0 batches only
+# the lookups issued in the same event-loop iteration and adds no latency.
+BATCH_WINDOW_MS = env_float("BATCH_WINDOW_MS", 0.0)
+
+# bcrypt cost factor for new password hashes. Stored hashes with another
+# cost are rehashed the next time their author logs in.
+PASSWORD_BCRYPT_ROUNDS = env_int("PASSWORD_BCRYPT_ROUNDS", 12)
+# Where hashing runs: "thread" (bcrypt releases the GIL), "process", or
+# "inline" on the event loop, which is only meant for comparisons.
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+PASSWORD_HASH_WORKERS = max(1, env_int("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# Hashes one POST /a/bulk request keeps queued on that pool at a time; the
+# rest of the workers stay free for logins and single creates.
+BULK_HASH_CONCURRENCY = max(1, env_int("BULK_HASH_CONCURRENCY", PASSWORD_HASH_WORKERS // 2))
+
+# Log statements slower than this many milliseconds to the "quickapi.sql"
+# logger; 0 disables the slow-query log.
+SLOW_QUERY_MS = env_float("SLOW_QUERY_MS", 0.0)
@@ -0,0 +1,416 @@
+"""Awaitable versions of the crud functions.
+
+Routes call these instead of the crud modules directly. Given an
+``AsyncSession`` the crud function runs through ``run_sync`` on the
+asyncpg connection, so waiting on Postgres never blocks the event loop.
+Given a sync ``Session`` it runs in the threadpool instead.
+
+The single-row author and post lookups and reply threads are read through
+``app.cache``; their cached forms are the ``*Read`` shaped row dicts.
+Every write that can change one of them bumps its generation, including
+the counters: posts bump their author, replies their post.
+
+Cache misses on single authors and posts, and the batch lookups, go
+through ``BatchLoader``s, so concurrent lookups from different requests
+share one ``id = ANY(...)`` query in a session of its own.
+
+Reply pages are cached with the version of their thread, read before the
+replies, so the ETag served with a page never claims a newer state than
+the page shows; see ``app.utils.conditional``.
+
+Creating and deleting posts, and deleting authors, also update the
+``app.feed`` timelines once the change is committed. Deleting an author
+with more content than ``CASCADE_SYNC_LIMIT`` finishes in a background
+task of the worker that took the request.
+
+Single replies can be written behind: see ``create_reply``.
+
+Listings, threads, search and the author lookups by identifier run on a
+read replica when one is configured; see ``replica_read`` and
+``app.replicas``. Everything that fills the cache or is shared between
+requests reads from the primary.
+"""
+import asyncio
+import functools
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession as SQLModelAsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import config
+from app.cache.cache import cache
+from app.crud import author, cascade, post, reply, search
+from app.db import DB_MODE, async_engine, engine
+from app.feed.feed import GLOBAL, author_timeline, feed, parse_member
+from app.replicas import Replica, is_unavailable, replicas
+from app.schemas.author import AuthorSummary
+from app.schemas.post import PostRead, PostThread
+from app.schemas.reply import ReplyWithAuthor
+from app.security.passwords import hash_password, hash_passwords, verify_password
+from app.utils.batching import BatchLoader
+from app.utils.pagination import as_utc, clamp_limit
+from app.utils.write_behind import Ack, WriteBehindQueue
+
+
+def awaitable(fn):
+    @functools.wraps(fn)
+    async def wrapper(session, *args, **kwargs):
+        if isinstance(session, AsyncSession):
+            return await session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, session, *args, **kwargs)
+
+    return wrapper
+
+
+async def in_new_session(fn, *args, replica: Replica | None = None, **kwargs):
+    """Run ``fn(session, *args)`` in a session that is not tied to a request.
+
+    On the primary, or on ``replica``.
+    """
+    if DB_MODE == "async":
+        bind = replica.async_engine if replica is not None else async_engine
+        async with SQLModelAsyncSession(bind, expire_on_commit=False) as session:
+            return await session.run_sync(fn, *args, **kwargs)
+
+    def run():
+        with Session(replica.engine if replica is not None else engine) as session:
+            return fn(session, *args, **kwargs)
+
+    return await run_in_threadpool(run)
+
+
+def replica_read(fn):
+    """``awaitable`` for read-only crud functions, served by a replica when one is healthy.
+
+    A replica that cannot be reached is taken out of rotation and the read
+    runs on the primary, in the request's session.
+    """
+    on_primary = awaitable(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(session, *args, **kwargs):
+        replica = replicas.pick()
+        if replica is None:
+            return await on_primary(session, *args, **kwargs)
+        try:
+            return await in_new_session(fn, *args, replica=replica, **kwargs)
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            replicas.failed(replica, e)
+            return await on_primary(session, *args, **kwargs)
+
+    return wrapper
+
+
+def batch_loader(fn):
+    async def load_many(ids):
+        return await in_new_session(fn, ids)
+
+    return BatchLoader(load_many, config.BATCH_MAX_IDS, config.BATCH_WINDOW_MS / 1000)
+
+
+author_loader = batch_loader(author.get_authors_by_ids)
+post_loader = batch_loader(post.get_posts_by_ids)
+
+
+async def create_author(session, author_data):
+    hashed = await hash_password(author_data.password)
+    return await awaitable(author.create_author)(session, author_data.model_copy(update={"password": hashed}))
+
+
+async def create_authors(session, items):
+    # Duplicates are rejected before hashing, and at most
+    # BULK_HASH_CONCURRENCY hashes of one request wait on the hashing pool
+    # at a time, so logins and single creates of other clients get a turn.
+    items, errors = await awaitable(author.new_authors)(session, items)
+    hashes = await hash_passwords([item.password for _, item in items], config.BULK_HASH_CONCURRENCY)
+    items = [
+        (index, item.model_copy(update={"password": hashed}))
+        for (index, item), hashed in zip(items, hashes)
+    ]
+    created, insert_errors = await awaitable(author.create_authors)(session, items)
+    return created, sorted(errors + insert_errors, key=lambda error: error["index"])
+
+
+async def authenticate(session, identifier: str, password: str):
+    """Return the active author matching the credentials, or ``None``.
+
+    A hash made with outdated parameters is replaced on success.
+    """
+    db_author = await awaitable(author.get_author_by_identifier)(session, identifier)
+    stored = db_author.password if db_author is not None else None
+    ok, new_hash = await verify_password(password, stored)
+    if not ok:
+        return None
+    if new_hash is not None:
+        await awaitable(author.update_password_hash)(session, db_author.id, stored, new_hash)
+    return db_author
+
+
+get_all_authors = replica_read(author.get_all_authors)
+get_author_by_identifier = awaitable(author.get_author_by_identifier)
+read_author_by_identifier = replica_read(author.read_author_by_identifier)
+get_author_by_email = awaitable(author.get_author_by_email)
+check_username_exists = awaitable(author.check_username_exists)
+
+
+async def get_author(session, author_id: int):
+    key = f"author:{author_id}"
+    generation = await cache.generation(key)
+
+    async def load():
+        return await author_loader.load(author_id)
+
+    return await cache.get_or_load(f"{key}:g{generation}", load)
+
+
+async def get_authors(session, author_ids: list[int]):
+    return await author_loader.load_many(author_ids)
+
+
+async def update_author(session, author_id: int, author_data):
+    db_author = await awaitable(author.update_author)(session, author_id, author_data)
+    await cache.bump(f"author:{author_id}")
+    return db_author
+
+
+async def delete_author(session, author_id: int):
+    """Disable an author and return the ``Cascade``, or ``None`` if missing.
+
+    A ``pending`` cascade goes on in a background task.
+    """
+    db_cascade = await awaitable(author.delete_author)(session, author_id)
+    if db_cascade is None:
+        return None
+    await cache.bump(f"author:{author_id}")
+    await apply_cascade(db_cascade)
+    # ``apply_cascade`` removed the disabled posts from the global timeline.
+    await feed.remove_author(author_id, [])
+    if db_cascade.pending:
+        task = asyncio.get_running_loop().create_task(finish_cascade(author_id))
+        _cascades.add(task)
+        task.add_done_callback(_cascades.discard)
+    return db_cascade
+
+
+async def apply_cascade(db_cascade):
+    """Bump the caches of what a committed cascade disabled and drop its posts from the feed."""
+    for post_id in db_cascade.threads:
+        await cache.bump(f"thread:{post_id}")
+        await cache.bump(f"post:{post_id}")
+    for author_id in {author_id for author_id, _, _ in db_cascade.posts}:
+        await cache.bump(f"author:{author_id}")
+    await feed.remove_posts(db_cascade.posts)
+
+
+async def finish_cascade(author_id: int, batch_size: int | None = None):
+    """Disable the rest of an author's content, one transaction per batch."""
+    while True:
+        db_cascade = await in_new_session(
+            cascade.cascade_author_batch, author_id, batch_size or config.CASCADE_BATCH_SIZE
+        )
+        if not db_cascade:
+            return
+        await apply_cascade(db_cascade)
+
+
+async def cancel_cascades():
+    """Stop the background cascades; ``python -m app.utils.cascade`` finishes them."""
+    for task in list(_cascades):
+        task.cancel()
+    await asyncio.gather(*_cascades, return_exceptions=True)
+
+
+# Background cascades; referenced so they are not garbage collected.
+_cascades: set[asyncio.Task] = set()
+
+
+async def create_post(session, post_data):
+    db_post = await awaitable(post.create_post)(session, post_data)
+    await cache.bump(f"author:{db_post.author_id}")
+    if not db_post.disabled:
+        await feed.add_posts([(db_post.author_id, db_post.id, db_post.createdAt)])
+    return db_post
+
+
+async def create_posts(session, items):
+    created, errors = await awaitable(post.create_posts)(session, items)
+    by_index = dict(items)
+    for author_id in {by_index[entry["index"]].author_id for entry in created}:
+        await cache.bump(f"author:{author_id}")
+    if created and feed.backend is not None:
+        entries = await awaitable(post.feed_entries_by_ids)(session, [entry["id"] for entry in created])
+        await feed.add_posts(entries)
+    return created, errors
+
+
+get_all_posts = replica_read(post.get_all_posts)
+get_posts_by_user_id = replica_read(post.get_posts_by_user_id)
+get_posts_by_username = replica_read(post.get_posts_by_username)
+
+
+async def get_post(session, post_id: int):
+    key = f"post:{post_id}"
+    generation = await cache.generation(key)
+
+    async def load():
+        return await post_loader.load(post_id)
+
+    return await cache.get_or_load(f"{key}:g{generation}", load)
+
+
+async def get_posts(session, post_ids: list[int]):
+    return await post_loader.load_many(post_ids)
+
+
+async def get_feed(session, author_id: int | None = None, cursor: str | None = None, limit: int | None = None):
+    """A page of the global or one author's timeline from ``app.feed``.
+
+    The timeline gives the ids of the page and the posts are read through
+    the batched id lookup; falls back to the keyset listings when the feed
+    cannot serve the page.
+    """
+    limit = clamp_limit(limit)
+    name = GLOBAL if author_id is None else author_timeline(author_id)
+
+    async def rebuild(length):
+        return await awaitable(post.feed_entries)(session, length, author_id)
+
+    page = await feed.page(name, cursor, limit, rebuild)
+    if page is None:
+        if author_id is None:
+            return await get_all_posts(session, cursor, limit)
+        return await get_posts_by_user_id(session, author_id, cursor, limit)
+
+    members, next_cursor = page
+    posts = await get_posts(session, [parse_member(value)[1] for value in members])
+    await feed.prune(name, [value for value, found in zip(members, posts) if found is None])
+    return [found for found in posts if found is not None], next_cursor
+
+
+async def get_post_thread(session, post_id: int, cursor: str | None = None, limit: int | None = None):
+    # Not cached: the embedded author summaries would need every reply
+    # author's generation in the key.
+    thread = await replica_read(post.get_post_thread)(session, post_id, cursor, limit)
+    if thread is None:
+        return None
+    db_post, replies, next_cursor = thread
+    return PostThread(
+        **PostRead.model_validate(db_post).model_dump(),
+        author=AuthorSummary.model_validate(db_post.author),
+        replies=[ReplyWithAuthor.model_validate(item) for item in replies],
+        next_cursor=next_cursor,
+    )
+
+
+async def delete_post(session, post_id: int):
+    """Disable a post and its replies; ``(author_id, id, createdAt)`` or ``None``."""
+    entry = await awaitable(post.delete_post)(session, post_id)
+    if entry is not None:
+        await cache.bump(f"post:{post_id}")
+        await cache.bump(f"thread:{post_id}")
+        await cache.bump(f"author:{entry[0]}")
+        await feed.remove_posts([entry])
+    return entry
+
+
+async def create_reply(session, reply_data, ack: Ack = "committed"):
+    """Create a reply; returns its id, or ``None`` when only accepted.
+
+    With ``REPLY_WRITE_BEHIND`` the reply goes through ``reply_writes``:
+    ``ack="committed"`` waits for the commit of its batch, ``"accepted"``
+    returns once it is queued and loses it if the batch fails.
+    """
+    if config.REPLY_WRITE_BEHIND:
+        written = await reply_writes.put(reply_data)
+        if ack == "accepted":
+            return None
+        return await written
+    db_reply = await awaitable(reply.create_reply)(session, reply_data)
+    await cache.bump(f"thread:{db_reply.post_id}")
+    await cache.bump(f"post:{db_reply.post_id}")
+    return db_reply.id
+
+
+async def write_replies(items):
+    """Insert queued replies in one transaction; see ``create_reply``."""
+    created, errors = await in_new_session(reply.create_replies, list(enumerate(items)))
+    for post_id in {items[entry["index"]].post_id for entry in created}:
+        await cache.bump(f"thread:{post_id}")
+        await cache.bump(f"post:{post_id}")
+    return created, errors
+
+
+reply_writes = WriteBehindQueue(
+    write_replies,
+    config.REPLY_WRITE_QUEUE_SIZE,
+    config.REPLY_WRITE_BATCH_SIZE,
+    config.REPLY_WRITE_WINDOW_MS / 1000,
+    config.REPLY_WRITE_PUT_TIMEOUT_MS / 1000,
+)
+
+
+async def create_replies(session, items):
+    created, errors = await awaitable(reply.create_replies)(session, items)
+    by_index = dict(items)
+    for post_id in {by_index[entry["index"]].post_id for entry in created}:
+        await cache.bump(f"thread:{post_id}")
+        await cache.bump(f"post:{post_id}")
+    return created, errors
+
+
+async def get_replies_by_post_id(
+    session,
+    post_id: int,
+    cursor: str | None = None,
+    limit: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: str = "oldest",
+    fields: list[str] | None = None,
+):
+    """Return ``(replies, next_cursor, version)``; see ``get_thread_version``."""
+    key = f"thread:{post_id}"
+    generation = await cache.generation(key)
+
+    async def load():
+        version = await get_thread_version(session, post_id)
+        replies, next_cursor = await awaitable(reply.get_replies_by_post_id)(
+            session, post_id, cursor, limit, since, until, order, fields
+        )
+        return {"items": replies, "next_cursor": next_cursor, "version": version}
+
+    window = ":".join(as_utc(bound).isoformat() if bound else "-" for bound in (since, until))
+    selected = ",".join(fields) if fields is not None else "*"
+    page = await cache.get_or_load(
+        f"{key}:g{generation}:{order}:{window}:{cursor or '-'}:{limit}:{selected}", load
+    )
+    return page["items"], page["next_cursor"], page["version"]
+
+
+async def get_thread_version(session, post_id: int) -> list[int] | None:
+    """``[version, updatedAt as Unix seconds]`` of a post's replies, ``None`` if unknown."""
+    key = f"thread:{post_id}"
+    generation = await cache.generation(key)
+
+    async def load():
+        version = await awaitable(reply.get_thread_version)(session, post_id)
+        if version is None:
+            return None
+        number, updated_at = version
+        return [number, int(updated_at.timestamp())]
+
+    return await cache.get_or_load(f"{key}:g{generation}:version", load)
+
+
+async def delete_reply(session, reply_id: int):
+    db_reply = await awaitable(reply.delete_reply)(session, reply_id)
+    await cache.bump(f"thread:{db_reply.post_id}")
+    await cache.bump(f"post:{db_reply.post_id}")
+    return db_reply
+
+
+search_content = replica_read(search.search_content)
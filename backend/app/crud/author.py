@@ -1,28 +1,126 @@
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, bindparam, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
+from app import config
+from app.crud.cascade import Cascade, cascade_author, cascade_size
 from app.models.author import Author
-from app.schemas.author import AuthorCreate, AuthorUpdate
+from app.schemas.author import AuthorCreate, AuthorRead, AuthorUpdate
+from app.utils.bulk import chunked
+from app.utils.pagination import paginate_rows
+from app.utils.serialization import as_dicts, only_fields, read_columns, sparse_columns
+
+AUTHOR_ORDER = (Author.id,)
+# What the read routes return; everything else (the password) stays in the DB.
+AUTHOR_READ = read_columns(Author, AuthorRead)
 
 
 def create_author(session, author_data: AuthorCreate) -> Author:
-    if get_author_by_email(session, author_data.email):
-        raise ValueError("Email already exists")
-    if check_username_exists(session, author_data.username):
+    # The partial unique indexes on active emails and usernames decide
+    # duplicates; only a rejected insert pays for the lookup that names the
+    # conflicting field.
+    statement = (
+        insert(Author)
+        .values(**author_data.model_dump())
+        .on_conflict_do_nothing()
+        .returning(Author)
+    )
+    new_author = session.exec(statement).scalar_one_or_none()
+    if new_author is None:
+        session.rollback()
+        if get_author_by_email(session, author_data.email):
+            raise ValueError("Email already exists")
         raise ValueError("Username already exists")
 
-    new_author = Author(**author_data.model_dump())
-    session.add(new_author)
     session.commit()
-    session.refresh(new_author)
     return new_author
 
 
-def get_all_authors(session):
-    statement = (
-        select(Author)
+def new_authors(session, items: list[tuple[int, AuthorCreate]]):
+    """Split ``items`` into ``(fresh, errors)`` by email and username uniqueness.
+
+    One query for the whole batch; duplicates inside the batch lose to
+    their first occurrence. Ends the transaction, so that no connection is
+    held while the caller hashes the passwords of ``fresh``.
+    """
+    emails = {item.email for _, item in items}
+    usernames = {item.username for _, item in items}
+    taken_emails, taken_usernames = set(), set()
+    if items:
+        statement = (
+            select(Author.email, Author.username)
+            .where(
+                or_(Author.email.in_(emails), Author.username.in_(usernames)),
+                Author.disabled == False
+            )
+        )
+        for email, username in session.exec(statement).all():
+            taken_emails.add(email)
+            taken_usernames.add(username)
+        session.rollback()
+
+    fresh, errors = [], []
+    for index, item in items:
+        if item.email in taken_emails:
+            errors.append({"index": index, "detail": "Email already exists"})
+        elif item.username in taken_usernames:
+            errors.append({"index": index, "detail": "Username already exists"})
+        else:
+            taken_emails.add(item.email)
+            taken_usernames.add(item.username)
+            fresh.append((index, item))
+    return fresh, errors
+
+
+def create_authors(session, items: list[tuple[int, AuthorCreate]]):
+    """Insert many authors at once and return ``(created, errors)``.
+
+    Items are checked with ``new_authors``. Rows that still conflict, with
+    authors created meanwhile, are skipped by ``ON CONFLICT DO NOTHING``
+    and reported like the others.
+    """
+    fresh, errors = new_authors(session, items)
+    indexes = [index for index, _ in fresh]
+    rows = [item.model_dump() for _, item in fresh]
+
+    # Emails are unique within ``rows``, so they tell which rows went in.
+    inserted = {}
+    statement = insert(Author).on_conflict_do_nothing().returning(Author.id, Author.email)
+    for batch in chunked(rows):
+        inserted.update((email, id) for id, email in session.exec(statement, params=batch).all())
+    conflicting = [row["email"] for row in rows if row["email"] not in inserted]
+    if conflicting:
+        statement = select(Author.email).where(Author.email.in_(conflicting), Author.disabled == False)
+        taken_emails = set(session.exec(statement).scalars().all())
+    session.commit()
+
+    created = []
+    for index, row in zip(indexes, rows):
+        if row["email"] in inserted:
+            created.append({"index": index, "id": inserted[row["email"]]})
+        elif row["email"] in taken_emails:
+            errors.append({"index": index, "detail": "Email already exists"})
+        else:
+            errors.append({"index": index, "detail": "Username already exists"})
+    errors.sort(key=lambda error: error["index"])
+    return created, errors
+
+
+def all_authors_statement(columns=AUTHOR_READ):
+    return (
+        select(*columns)
         .where(Author.disabled == False)
     )
-    authors = session.exec(statement).scalars().all()
-    return authors
+
+
+def get_all_authors(
+    session,
+    cursor: str | None = None,
+    limit: int | None = None,
+    fields: list[str] | None = None,
+):
+    statement = all_authors_statement(sparse_columns(AUTHOR_READ, fields, AUTHOR_ORDER))
+    authors, next_cursor = paginate_rows(session, statement, AUTHOR_ORDER, cursor, limit)
+    return only_fields(authors, fields), next_cursor
 
 
 def get_author(session, author_id: int):
@@ -37,6 +135,24 @@ def get_author(session, author_id: int):
     return author
 
 
+def get_authors_by_ids(session, author_ids: list[int]) -> list[dict | None]:
+    """Active authors for ``author_ids`` in the same order, ``None`` if missing.
+
+    One ``id = ANY(:ids)`` query with the ids bound as a single array, so
+    every batch size shares one prepared statement. Rows are ``AuthorRead``
+    shaped dicts.
+    """
+    statement = (
+        select(*AUTHOR_READ)
+        .where(
+            Author.id == any_(bindparam("ids", author_ids, type_=ARRAY(Integer))),
+            Author.disabled == False
+        )
+    )
+    by_id = {author["id"]: author for author in as_dicts(session.exec(statement))}
+    return [by_id.get(author_id) for author_id in author_ids]
+
+
 def get_author_by_identifier(session, identifier: str):
     statement = (
         select(Author)
@@ -49,6 +165,18 @@ def get_author_by_identifier(session, identifier: str):
     return author
 
 
+def read_author_by_identifier(session, identifier: str) -> dict | None:
+    """``get_author_by_identifier`` as an ``AuthorRead`` shaped dict."""
+    statement = (
+        select(*AUTHOR_READ)
+        .where(
+            (Author.username == identifier) | (Author.email == identifier),
+            Author.disabled == False
+        )
+    )
+    return next(iter(as_dicts(session.exec(statement))), None)
+
+
 def get_author_by_email(session, email: str):
     statement = (
         select(Author)
@@ -61,23 +189,55 @@ def get_author_by_email(session, email: str):
     return author
 
 
+def constraint_name(error: IntegrityError) -> str | None:
+    """The constraint ``error`` violated, from psycopg2's ``diag`` or asyncpg's exception."""
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    # The asyncpg adapter chains the driver's own exception.
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+
 def update_author(session, author_id: int, author: AuthorUpdate):
+    author_data = author.model_dump(exclude_unset=True)
+    if not author_data:
+        return get_author(session, author_id)
+
     statement = (
-        select(Author)
+        update(Author)
         .where(
             Author.id == author_id,
             Author.disabled == False
         )
+        .values(**author_data)
+        .returning(Author)
+        .execution_options(synchronize_session=False)
     )
-    db_author = session.exec(statement).scalar_one_or_none()
+    try:
+        db_author = session.exec(statement).scalar_one_or_none()
+    except IntegrityError as e:
+        session.rollback()
+        if constraint_name(e) == "uq_author_username_active":
+            raise ValueError("Username already exists")
+        raise
+    session.commit()
+    return db_author
 
-    author_data = author.model_dump(exclude_unset=True)
 
-    db_author.sqlmodel_update(author_data)
-    session.add(db_author)
+def update_password_hash(session, author_id: int, old_hash: str, new_hash: str) -> bool:
+    """Replace ``old_hash`` with ``new_hash``; False if it changed meanwhile."""
+    statement = (
+        update(Author)
+        .where(
+            Author.id == author_id,
+            Author.password == old_hash
+        )
+        .values(password=new_hash)
+        .execution_options(synchronize_session=False)
+    )
+    updated = session.exec(statement).rowcount
     session.commit()
-    session.refresh(db_author)
-    return db_author
+    return updated == 1
 
 
 def check_username_exists(session, username: str):
@@ -92,18 +252,30 @@ def check_username_exists(session, username: str):
     return author is not None
 
 
-def delete_author(session, author_id: int):
+def delete_author(session, author_id: int, sync_limit: int = config.CASCADE_SYNC_LIMIT) -> Cascade | None:
+    """Disable an author and cascade to their posts and replies.
+
+    Returns ``None`` for a missing author. Up to ``sync_limit`` rows of
+    content are disabled in the same transaction; beyond that the returned
+    cascade is ``pending`` and left to ``cascade_author_batch``.
+    """
     statement = (
-        select(Author)
+        update(Author)
         .where(
             Author.id == author_id,
             Author.disabled == False
         )
+        .values(disabled=True)
+        .returning(Author.id)
+        .execution_options(synchronize_session=False)
     )
-    db_author = session.exec(statement).scalar_one_or_none()
-    if not db_author or db_author.disabled:
-       return None
-    db_author.disabled = True
+    if session.exec(statement).scalar_one_or_none() is None:
+        session.rollback()
+        return None
+    if cascade_size(session, author_id, sync_limit) > sync_limit:
+        cascade = Cascade(author_id)
+        cascade.pending = True
+    else:
+        cascade = cascade_author(session, author_id)
     session.commit()
-    session.refresh(db_author)
-    return db_author
+    return cascade
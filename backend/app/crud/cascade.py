@@ -0,0 +1,202 @@
+"""Cascading soft-deletes as set-based SQL.
+
+Disabling a post disables its replies; disabling an author disables
+their posts, the replies to those posts and the replies they wrote
+elsewhere. Each step is one ``UPDATE ... RETURNING`` served by the
+partial indexes, run with the counter adjustments in the transaction
+that disables the post or author, so readers see all of it or none.
+Reads therefore only check each row's own ``disabled`` flag, and the
+creates check their author and post with ``active_ids``: its lock makes
+an insert and a cascade over the same author or post wait for each
+other, so no active row is left under a disabled one.
+
+Every write locks rows in the order author, post, reply, ids ascending
+within a table, so concurrent creates, deletes and cascades never wait
+on each other in a cycle. A row the transaction goes on to update (a
+counter, the ``disabled`` flag) is locked ``FOR NO KEY UPDATE`` from the
+start: two transactions each holding ``FOR SHARE`` and then updating the
+same row would deadlock.
+
+An author with more than ``CASCADE_SYNC_LIMIT`` rows to disable is
+disabled at once and the rest follows in batches of
+``CASCADE_BATCH_SIZE`` rows, each in its own short transaction, so a
+request never holds that many row locks. Until the last batch commits,
+the remaining posts and replies of that author stay readable.
+``python -m app.utils.cascade`` finishes cascades that were interrupted.
+"""
+from collections import Counter
+
+from sqlalchemy import Integer, and_, any_, bindparam, func, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import select
+
+from app.crud.counters import adjust_post_counts, adjust_reply_counts
+from app.models.author import Author
+from app.models.post import Post
+from app.models.reply import Reply
+
+
+class Cascade:
+    """What a cascade, or one batch of it, disabled."""
+
+    def __init__(self, author_id: int | None = None):
+        self.author_id = author_id
+        # (author_id, id, createdAt) of the disabled posts.
+        self.posts: list[tuple] = []
+        self.replies = 0
+        # Posts whose active replies changed, disabled ones included.
+        self.threads: set[int] = set()
+        # Left for background batches.
+        self.pending = False
+
+    def add(self, other: "Cascade"):
+        self.posts += other.posts
+        self.replies += other.replies
+        self.threads |= other.threads
+
+    def __bool__(self) -> bool:
+        return bool(self.posts or self.replies)
+
+
+def lock_ids(session, model, ids, *conditions, update: bool = True) -> set[int]:
+    """The ids among ``ids`` of ``model`` rows matching ``conditions``, locked until commit.
+
+    ``update`` locks ``FOR NO KEY UPDATE``, for rows this transaction will
+    update; otherwise ``FOR SHARE``, which only keeps others from updating them.
+    """
+    if not ids:
+        return set()
+    statement = (
+        select(model.id)
+        .where(model.id.in_(sorted(ids)), *conditions)
+        .order_by(model.id)
+        .with_for_update(read=not update, key_share=update)
+    )
+    return set(session.exec(statement).all())
+
+
+def active_ids(session, model, ids, update: bool = False) -> set[int]:
+    """The ids among ``ids`` of active ``model`` rows, locked as by ``lock_ids``."""
+    return lock_ids(session, model, ids, model.disabled == False, update=update)
+
+
+def _targets(model, condition, limit: int | None):
+    # Without a limit the UPDATE filters directly; with one it takes the
+    # first ``limit`` matching ids.
+    condition = and_(condition, model.disabled == False)
+    if limit is None:
+        return condition
+    return model.id.in_(select(model.id).where(condition).limit(limit).scalar_subquery())
+
+
+def disable_posts(session, condition, limit: int | None = None) -> Cascade:
+    """Disable the active posts matching ``condition`` and all their replies; no commit.
+
+    The posts' ``reply_count`` drops to 0 with their replies and their
+    version is bumped; their authors' ``post_count`` is adjusted.
+    """
+    cascade = Cascade()
+    statement = (
+        update(Post)
+        .where(_targets(Post, condition, limit))
+        .values(disabled=True, reply_count=0, version=Post.version + 1, updatedAt=func.now())
+        .returning(Post.author_id, Post.id, Post.createdAt)
+        .execution_options(synchronize_session=False)
+    )
+    cascade.posts = [tuple(row) for row in session.exec(statement).all()]
+    if not cascade.posts:
+        return cascade
+    post_ids = [post_id for _, post_id, _ in cascade.posts]
+    statement = (
+        update(Reply)
+        .where(
+            Reply.post_id == any_(bindparam("post_ids", post_ids, type_=ARRAY(Integer))),
+            Reply.disabled == False
+        )
+        .values(disabled=True)
+        .execution_options(synchronize_session=False)
+    )
+    cascade.replies = session.exec(statement).rowcount
+    cascade.threads.update(post_ids)
+    removed = Counter(author_id for author_id, _, _ in cascade.posts)
+    adjust_post_counts(session, Counter({author_id: -n for author_id, n in removed.items()}))
+    return cascade
+
+
+def disable_replies_by(session, author_id: int, limit: int | None = None) -> Cascade:
+    """Disable the author's active replies and adjust their posts' counters; no commit."""
+    cascade = Cascade(author_id)
+    targets = select(Reply.id, Reply.post_id).where(Reply.author_id == author_id, Reply.disabled == False)
+    if limit is not None:
+        targets = targets.limit(limit)
+    targets = session.exec(targets).all()
+    if not targets:
+        return cascade
+    # The posts before their replies.
+    lock_ids(session, Post, {post_id for _, post_id in targets})
+    statement = (
+        update(Reply)
+        .where(
+            Reply.id == any_(bindparam("reply_ids", [id for id, _ in targets], type_=ARRAY(Integer))),
+            Reply.disabled == False
+        )
+        .values(disabled=True)
+        .returning(Reply.post_id)
+        .execution_options(synchronize_session=False)
+    )
+    disabled = Counter(post_id for (post_id,) in session.exec(statement).all())
+    cascade.replies = sum(disabled.values())
+    cascade.threads.update(disabled)
+    adjust_reply_counts(session, Counter({post_id: -n for post_id, n in disabled.items()}))
+    return cascade
+
+
+def cascade_author(session, author_id: int, limit: int | None = None) -> Cascade:
+    """Disable up to ``limit`` posts, with their replies, and ``limit`` replies of an author; no commit.
+
+    Posts go first, so the author's replies to their own posts are
+    disabled with those posts and not counted twice.
+    """
+    # Already locked by delete_author; a background batch locks it here,
+    # before the posts, rather than last through the post counter.
+    lock_ids(session, Author, {author_id})
+    cascade = disable_posts(session, Post.author_id == author_id, limit)
+    cascade.author_id = author_id
+    cascade.add(disable_replies_by(session, author_id, limit))
+    return cascade
+
+
+def cascade_author_batch(session, author_id: int, batch_size: int) -> Cascade:
+    """One background batch of ``cascade_author``, committed; empty once done."""
+    cascade = cascade_author(session, author_id, batch_size)
+    session.commit()
+    return cascade
+
+
+def cascade_size(session, author_id: int, cap: int) -> int:
+    """Rows a cascade of the author would disable, counted up to about ``cap``."""
+    posts = (
+        select(Post.id, Post.reply_count)
+        .where(Post.author_id == author_id, Post.disabled == False)
+        .limit(cap + 1)
+        .subquery()
+    )
+    replies = (
+        select(Reply.id)
+        .where(Reply.author_id == author_id, Reply.disabled == False)
+        .limit(cap + 1)
+        .subquery()
+    )
+    statement = select(
+        select(func.count() + func.coalesce(func.sum(posts.c.reply_count), 0)).select_from(posts).scalar_subquery(),
+        select(func.count()).select_from(replies).scalar_subquery(),
+    )
+    return sum(session.exec(statement).one())
+
+
+def pending_authors(session) -> list[int]:
+    """Disabled authors that still have active posts or replies."""
+    has_posts = select(Post.id).where(Post.author_id == Author.id, Post.disabled == False).exists()
+    has_replies = select(Reply.id).where(Reply.author_id == Author.id, Reply.disabled == False).exists()
+    statement = select(Author.id).where(Author.disabled == True, has_posts | has_replies).order_by(Author.id)
+    return list(session.exec(statement).all())
@@ -0,0 +1,95 @@
+"""Denormalized counters: ``Post.reply_count`` and ``Author.post_count``.
+
+Both count active rows only (a disabled reply or post no longer counts).
+The crud writes adjust them with ``col = col + n`` in the same transaction
+as the row they insert or disable, so concurrent writers never lose an
+update. Changing a post's reply count also bumps its ``version`` and
+stamps its ``updatedAt``. ``reconcile_*`` recomputes the counters from the
+source tables for drift left by manual SQL or restored backups; see
+``app.utils.reconcile``.
+"""
+from collections import Counter
+
+from sqlalchemy import bindparam, func, update
+from sqlmodel import select
+
+from app.models.author import Author
+from app.models.post import Post
+from app.models.reply import Reply
+
+
+def _adjust(session, model, column, deltas: Counter, **values):
+    deltas = {id: delta for id, delta in deltas.items() if id is not None and delta}
+    if not deltas:
+        return
+    statement = (
+        update(model.__table__)
+        .where(model.__table__.c.id == bindparam("row_id"))
+        .values({column: model.__table__.c[column] + bindparam("delta"), **values})
+    )
+    # Sorted ids make concurrent batches lock rows in the same order.
+    params = [{"row_id": id, "delta": deltas[id]} for id in sorted(deltas)]
+    session.connection().execute(statement, params)
+
+
+def adjust_reply_counts(session, deltas: Counter):
+    """Add ``deltas[post_id]`` to each post's ``reply_count``; no commit."""
+    table = Post.__table__
+    _adjust(session, Post, "reply_count", deltas, version=table.c.version + 1, updatedAt=func.now())
+
+
+def adjust_post_counts(session, deltas: Counter):
+    """Add ``deltas[author_id]`` to each author's ``post_count``; no commit."""
+    _adjust(session, Author, "post_count", deltas)
+
+
+def _reconcile(session, model, column, counts, lo: int, hi: int) -> int:
+    # Lock the range first: a writer that already bumped one of these rows
+    # has committed by the time the count runs, and one that has not yet
+    # waits for this commit, so no increment is overwritten.
+    session.exec(
+        select(model.id).where(model.id.between(lo, hi)).order_by(model.id).with_for_update()
+    ).all()
+    actual = (
+        select(model.id.label("id"), func.coalesce(counts.c.n, 0).label("n"))
+        .outerjoin(counts, counts.c.id == model.id)
+        .where(model.id.between(lo, hi))
+        .subquery()
+    )
+    statement = (
+        update(model)
+        .where(model.id == actual.c.id, getattr(model, column) != actual.c.n)
+        .values({column: actual.c.n})
+        .execution_options(synchronize_session=False)
+    )
+    repaired = session.exec(statement).rowcount
+    session.commit()
+    return repaired
+
+
+def reconcile_reply_counts(session, lo: int, hi: int) -> int:
+    """Recompute ``reply_count`` for posts with ids in ``[lo, hi]``.
+
+    Returns the number of posts whose counter was wrong.
+    """
+    counts = (
+        select(Reply.post_id.label("id"), func.count().label("n"))
+        .where(Reply.post_id.between(lo, hi), Reply.disabled == False)
+        .group_by(Reply.post_id)
+        .subquery()
+    )
+    return _reconcile(session, Post, "reply_count", counts, lo, hi)
+
+
+def reconcile_post_counts(session, lo: int, hi: int) -> int:
+    """Recompute ``post_count`` for authors with ids in ``[lo, hi]``.
+
+    Returns the number of authors whose counter was wrong.
+    """
+    counts = (
+        select(Post.author_id.label("id"), func.count().label("n"))
+        .where(Post.author_id.between(lo, hi), Post.disabled == False)
+        .group_by(Post.author_id)
+        .subquery()
+    )
+    return _reconcile(session, Author, "post_count", counts, lo, hi)
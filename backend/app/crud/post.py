@@ -1,81 +1,230 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import Integer, any_, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import contains_eager
 from sqlmodel import select
+from app.crud.cascade import active_ids, disable_posts, lock_ids
+from app.crud.counters import adjust_post_counts
+from app.crud.reply import REPLY_ORDER
 from app.models.post import Post
 from app.models.author import Author
-from app.schemas.post import PostCreate
+from app.models.reply import Reply
+from app.schemas.post import PostCreate, PostRead
+from app.utils.bulk import insert_rows
+from app.utils.pagination import Order, ordered, paginate, paginate_rows, time_range
+from app.utils.serialization import as_dicts, only_fields, read_columns, sparse_columns
+
+# Listed newest first by default; backed by the (createdAt, id) composite
+# index on ``post``, scanned backwards, which also serves since/until.
+POST_ORDER = (Post.createdAt, Post.id)
+POST_READ = read_columns(Post, PostRead)
 
 
 def create_post(session, post_data: PostCreate) -> Post:
+    if post_data.author_id not in active_ids(session, Author, {post_data.author_id}, update=True):
+        raise ValueError("Author not found")
     post = Post(**post_data.model_dump())
     session.add(post)
+    session.flush()
+    if not post.disabled:
+        adjust_post_counts(session, Counter({post.author_id: 1}))
     session.commit()
     session.refresh(post)
     return post
 
 
-def get_all_posts(session):
+def create_posts(session, items: list[tuple[int, PostCreate]]):
+    """Insert many posts at once and return ``(created, errors)``.
+
+    Authors are checked with one query for the whole batch, so a missing or
+    disabled author fails only its own items instead of the INSERT.
+    """
+    active_authors = active_ids(session, Author, {item.author_id for _, item in items}, update=True)
+
+    errors, indexes, rows = [], [], []
+    for index, item in items:
+        if item.author_id not in active_authors:
+            errors.append({"index": index, "detail": "Author not found"})
+            continue
+        indexes.append(index)
+        rows.append(item.model_dump())
+
+    ids = insert_rows(session, Post, rows, defaults={"createdAt": func.now()})
+    adjust_post_counts(session, Counter(row["author_id"] for row in rows if not row["disabled"]))
+    session.commit()
+    created = [{"index": index, "id": id} for index, id in zip(indexes, ids)]
+    return created, errors
+
+
+def all_posts_statement(columns=POST_READ):
+    return (
+        select(*columns)
+        .where(Post.disabled == False)
+    )
+
+
+def _page(session, statement, cursor, limit, order: Order, fields: list[str] | None):
+    posts, next_cursor = paginate_rows(session, statement, POST_ORDER, cursor, limit, descending=order == "newest")
+    return only_fields(posts, fields), next_cursor
+
+
+def get_all_posts(
+    session,
+    cursor: str | None = None,
+    limit: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: Order = "newest",
+    fields: list[str] | None = None,
+):
+    statement = all_posts_statement(sparse_columns(POST_READ, fields, POST_ORDER))
+    statement = time_range(statement, Post.createdAt, since, until)
+    return _page(session, statement, cursor, limit, order, fields)
+
+def get_post(session, post_id: int):
     statement = (
         select(Post)
-        .join(Author)
         .where(
-            Post.disabled == False,
-            Author.disabled == False
+            Post.id == post_id,
+            Post.disabled == False
         )
     )
-    posts = session.exec(statement).all()
-    return posts
+    post = session.exec(statement).first()
+    return post
 
-def get_post(session, post_id: int):
+def get_posts_by_ids(session, post_ids: list[int]) -> list[dict | None]:
+    """Visible posts for ``post_ids`` in the same order, ``None`` if missing.
+
+    Same visibility as ``get_post``, in one ``id = ANY(:ids)`` query; rows
+    are ``PostRead`` shaped dicts.
+    """
+    statement = (
+        select(*POST_READ)
+        .where(
+            Post.id == any_(bindparam("ids", post_ids, type_=ARRAY(Integer))),
+            Post.disabled == False
+        )
+    )
+    by_id = {post["id"]: post for post in as_dicts(session.exec(statement))}
+    return [by_id.get(post_id) for post_id in post_ids]
+
+def get_post_thread(session, post_id: int, cursor: str | None = None, limit: int | None = None):
+    """Return ``(post, replies, next_cursor)`` or ``None`` for a missing post.
+
+    Two queries whatever the page holds: the post joined to its author, and
+    one page of replies joined to theirs. The joins fill
+    ``post.author``/``reply.author`` through ``contains_eager``, so
+    rendering the authors never goes back to the database.
+    """
     statement = (
         select(Post)
-        .join(Author, Post.author_id == Author.id)
+        .join(Post.author)
+        .options(contains_eager(Post.author))
         .where(
             Post.id == post_id,
-            Post.disabled == False,
-            Author.disabled == False
+            Post.disabled == False
         )
     )
     post = session.exec(statement).first()
-    return post
+    if post is None:
+        return None
 
-def get_posts_by_user_id(session, user_id: int):
     statement = (
-        select(Post)
-        .join(Author)
+        select(Reply)
+        .join(Reply.author)
+        .options(contains_eager(Reply.author))
         .where(
-            Author.id == user_id,
-            Post.disabled == False,
-            Author.disabled == False
+            Reply.post_id == post_id,
+            Reply.disabled == False
         )
     )
-    posts = session.exec(statement).all()
-    return posts
+    replies, next_cursor = paginate(session, statement, REPLY_ORDER, cursor, limit)
+    return post, replies, next_cursor
 
-def get_posts_by_username(session, username: str):
+def get_posts_by_user_id(
+    session,
+    user_id: int,
+    cursor: str | None = None,
+    limit: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: Order = "newest",
+    fields: list[str] | None = None,
+):
     statement = (
-        select(Post)
-        .join(Author)
+        select(*sparse_columns(POST_READ, fields, POST_ORDER))
+        .where(
+            Post.author_id == user_id,
+            Post.disabled == False
+        )
+    )
+    statement = time_range(statement, Post.createdAt, since, until)
+    return _page(session, statement, cursor, limit, order, fields)
+
+def get_posts_by_username(
+    session,
+    username: str,
+    cursor: str | None = None,
+    limit: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: Order = "newest",
+    fields: list[str] | None = None,
+):
+    statement = (
+        select(*sparse_columns(POST_READ, fields, POST_ORDER))
+        # Joined even though disabling cascades: a disabled author's
+        # username can be taken by a new account.
+        .join(Author, Post.author_id == Author.id)
         .where(
             Author.username == username,
             Post.disabled == False,
             Author.disabled == False
         )
     )
-    posts = session.exec(statement).all()
-    return posts
+    statement = time_range(statement, Post.createdAt, since, until)
+    return _page(session, statement, cursor, limit, order, fields)
+
+def feed_entries(session, limit: int, author_id: int | None = None) -> list[tuple]:
+    """``(author_id, id, createdAt)`` of the newest visible posts, for ``app.feed``.
 
-def delete_post(session, post_id: int):
+    All posts, or one author's; served by the same indexes as the listings.
+    """
     statement = (
-        select(Post)
+        select(Post.author_id, Post.id, Post.createdAt)
+        .where(Post.disabled == False)
+    )
+    if author_id is not None:
+        statement = statement.where(Post.author_id == author_id)
+    return list(session.exec(ordered(statement, POST_ORDER, descending=True).limit(limit)).all())
+
+
+def feed_entries_by_ids(session, post_ids: list[int]) -> list[tuple]:
+    """``feed_entries`` for the active posts among ``post_ids``."""
+    statement = (
+        select(Post.author_id, Post.id, Post.createdAt)
         .where(
-            Post.id == post_id,
+            Post.id == any_(bindparam("ids", post_ids, type_=ARRAY(Integer))),
             Post.disabled == False
         )
     )
-    db_post = session.exec(statement).first()
-    if db_post is None or db_post.disabled:
-        return None
+    return list(session.exec(statement).all())
 
-    db_post.disabled = True
+
+def delete_post(session, post_id: int) -> tuple | None:
+    """Disable a post and its replies; ``(author_id, id, createdAt)`` or ``None``.
+
+    The ``UPDATE`` only matches an active post, so of two concurrent
+    deletes one disables it and adjusts the counters, the other gets ``None``.
+    """
+    author_id = session.exec(select(Post.author_id).where(Post.id == post_id)).first()
+    if author_id is None:
+        session.rollback()
+        return None
+    # The author before the post, as delete_author and the creates lock them.
+    lock_ids(session, Author, {author_id})
+    cascade = disable_posts(session, Post.id == post_id)
     session.commit()
-    session.refresh(db_post)
-    return db_post
\ No newline at end of file
+    return cascade.posts[0] if cascade.posts else None
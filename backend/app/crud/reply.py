@@ -1,41 +1,108 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import func
 from sqlmodel import select
+from app.crud.cascade import active_ids, lock_ids
+from app.crud.counters import adjust_reply_counts
 from app.models.reply import Reply
-from app.schemas.reply import ReplyCreate
+from app.schemas.reply import ReplyCreate, ReplyRead
 from app.models.author import Author
 from app.models.post import Post
+from app.utils.bulk import insert_rows
+from app.utils.pagination import Order, paginate_rows, time_range
+from app.utils.serialization import only_fields, read_columns, sparse_columns
+
+# Threads read oldest first by default; backed by the (post_id, createdAt,
+# id) index in either direction.
+REPLY_ORDER = (Reply.createdAt, Reply.id)
+REPLY_READ = read_columns(Reply, ReplyRead)
 
 
 def create_reply(session, reply_data: ReplyCreate):
+    # The author, which only has to stay active, then the post, whose
+    # counter is updated below.
+    if reply_data.author_id not in active_ids(session, Author, {reply_data.author_id}):
+        raise ValueError("Author not found")
+    if reply_data.post_id not in active_ids(session, Post, {reply_data.post_id}, update=True):
+        raise ValueError("Post not found")
     reply = Reply(**reply_data.model_dump())
     session.add(reply)
+    session.flush()
+    if not reply.disabled:
+        adjust_reply_counts(session, Counter({reply.post_id: 1}))
     session.commit()
     session.refresh(reply)
     return reply
 
 
-def get_replies_by_post_id(session, post_id: int):
+def create_replies(session, items: list[tuple[int, ReplyCreate]]):
+    """Insert many replies at once and return ``(created, errors)``.
+
+    Authors and posts are each checked with one query for the whole batch.
+    """
+    active_authors = active_ids(session, Author, {item.author_id for _, item in items})
+    active_posts = active_ids(session, Post, {item.post_id for _, item in items}, update=True)
+
+    errors, indexes, rows = [], [], []
+    for index, item in items:
+        if item.author_id not in active_authors:
+            errors.append({"index": index, "detail": "Author not found"})
+        elif item.post_id not in active_posts:
+            errors.append({"index": index, "detail": "Post not found"})
+        else:
+            indexes.append(index)
+            rows.append(item.model_dump())
+
+    ids = insert_rows(session, Reply, rows, defaults={"createdAt": func.now()})
+    adjust_reply_counts(session, Counter(row["post_id"] for row in rows if not row["disabled"]))
+    session.commit()
+    created = [{"index": index, "id": id} for index, id in zip(indexes, ids)]
+    return created, errors
+
+
+def get_replies_by_post_id(
+    session,
+    post_id: int,
+    cursor: str | None = None,
+    limit: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: Order = "oldest",
+    fields: list[str] | None = None,
+):
     statement = (
-        select(
-            Reply
-        )
-        .join(Author)
-        .join(Post)
+        select(*sparse_columns(REPLY_READ, fields, REPLY_ORDER))
         .where(
             Reply.post_id == post_id,
-        Reply.disabled == False
+            Reply.disabled == False
         )
     )
-    replies = session.exec(statement).all()
-    return replies
+    statement = time_range(statement, Reply.createdAt, since, until)
+    replies, next_cursor = paginate_rows(session, statement, REPLY_ORDER, cursor, limit, descending=order == "newest")
+    return only_fields(replies, fields), next_cursor
+
+
+def get_thread_version(session, post_id: int) -> tuple[int, datetime] | None:
+    """``(version, updatedAt)`` of a post's replies, or ``None`` for an unknown post."""
+    row = session.exec(select(Post.version, Post.updatedAt).where(Post.id == post_id)).first()
+    return tuple(row) if row is not None else None
 
 
 def delete_reply(session, reply_id: int):
+    post_id = session.exec(select(Reply.post_id).where(Reply.id == reply_id)).first()
+    if post_id is None:
+        raise ValueError("Reply not found or already deleted")
+    # The post before the reply, as the post and author cascades lock them.
+    lock_ids(session, Post, {post_id})
     statement = (
         select(Reply)
         .where(
             Reply.id == reply_id,
             Reply.disabled == False
         )
+        # Concurrent deletes of the same reply must not both decrement.
+        .with_for_update()
     )
     db_reply = session.exec(statement).first()
 
@@ -44,6 +111,8 @@ def delete_reply(session, reply_id: int):
 
     db_reply.disabled = True
     session.add(db_reply)
+    session.flush()
+    adjust_reply_counts(session, Counter({db_reply.post_id: -1}))
     session.commit()
     session.refresh(db_reply)
     return db_reply
\ No newline at end of file
@@ -0,0 +1,74 @@
+from sqlalchemy import cast, func, literal, union_all
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlmodel import select
+
+from app.models.post import Post
+from app.models.reply import Reply
+from app.utils.pagination import clamp_limit, keyset, page
+
+SNIPPET_OPTIONS = "MaxFragments=2, MinWords=5, MaxWords=20"
+
+
+def rank(vector, query):
+    # ts_rank returns a float4, which does not survive the round trip through
+    # a JSON cursor; as float8 the cursor compares equal to the row again.
+    return cast(func.ts_rank(vector, query), DOUBLE_PRECISION).label("rank")
+
+
+def search_content(session, q: str, cursor: str | None = None, limit: int | None = None):
+    """Rank posts and replies matching ``q`` and return ``(hits, next_cursor)``.
+
+    ``q`` uses web search syntax ("quoted phrases", -excluded, or). Both
+    arms are served by the partial GIN indexes on ``search_vector``; the
+    snippets are only computed for the rows of the returned page.
+    """
+    limit = clamp_limit(limit)
+    query = func.websearch_to_tsquery("english", q)
+
+    posts = (
+        select(
+            literal("post").label("kind"),
+            Post.id.label("id"),
+            Post.id.label("post_id"),
+            Post.author_id.label("author_id"),
+            Post.content.label("content"),
+            Post.createdAt.label("createdAt"),
+            rank(Post.search_vector, query),
+        )
+        .where(
+            Post.search_vector.op("@@")(query),
+            Post.disabled == False
+        )
+    )
+    replies = (
+        select(
+            literal("reply").label("kind"),
+            Reply.id.label("id"),
+            Reply.post_id.label("post_id"),
+            Reply.author_id.label("author_id"),
+            Reply.content.label("content"),
+            Reply.createdAt.label("createdAt"),
+            rank(Reply.search_vector, query),
+        )
+        .where(
+            Reply.search_vector.op("@@")(query),
+            Reply.disabled == False
+        )
+    )
+    hits = union_all(posts, replies).subquery()
+    order = (hits.c.rank, hits.c.kind, hits.c.id)
+    ranked = keyset(select(hits), order, cursor, limit, descending=True).subquery()
+
+    statement = (
+        select(
+            ranked.c.kind,
+            ranked.c.id,
+            ranked.c.post_id,
+            ranked.c.author_id,
+            ranked.c.createdAt,
+            ranked.c.rank,
+            func.ts_headline("english", ranked.c.content, query, SNIPPET_OPTIONS).label("snippet"),
+        )
+        .order_by(ranked.c.rank.desc(), ranked.c.kind.desc(), ranked.c.id.desc())
+    )
+    return page(list(session.exec(statement).all()), order, limit)
@@ -0,0 +1,130 @@
+import bisect
+from collections import OrderedDict
+
+# A built timeline either holds every visible post of its kind, or only the
+# newest ones because older entries were trimmed or never loaded.
+COMPLETE = "complete"
+PARTIAL = "partial"
+
+
+class MemoryFeedBackend:
+    """Timelines as sorted lists in this process.
+
+    Members are fixed-width strings (see ``app.feed.feed.member``), so
+    string order is timeline order and both backends page the same way.
+    At most ``max_timelines`` timelines are kept; the least recently used
+    one is dropped and rebuilt from the database when it is next read.
+    """
+
+    def __init__(self, max_timelines: int = 10000):
+        self.max_timelines = max_timelines
+        self._timelines: OrderedDict[str, list[str]] = OrderedDict()
+        self._states: dict[str, str] = {}
+
+    def _timeline(self, name: str) -> list[str]:
+        timeline = self._timelines.get(name)
+        if timeline is None:
+            timeline = self._timelines[name] = []
+            while len(self._timelines) > self.max_timelines:
+                evicted, _ = self._timelines.popitem(last=False)
+                self._states.pop(evicted, None)
+        self._timelines.move_to_end(name)
+        return timeline
+
+    async def state(self, name: str) -> str | None:
+        """``COMPLETE`` or ``PARTIAL`` once built, ``None`` before."""
+        return self._states.get(name)
+
+    async def add(self, name: str, members: list[str], max_length: int, state: str | None = None):
+        """Add ``members``, keeping the newest ``max_length``; ``state`` marks a rebuild."""
+        timeline = self._timeline(name)
+        for member in members:
+            index = bisect.bisect_left(timeline, member)
+            if index == len(timeline) or timeline[index] != member:
+                timeline.insert(index, member)
+        if state is not None:
+            self._states[name] = state
+        if len(timeline) > max_length:
+            del timeline[:-max_length]
+            if name in self._states:
+                self._states[name] = PARTIAL
+
+    async def remove(self, name: str, members: list[str]):
+        timeline = self._timelines.get(name)
+        if timeline is None:
+            return
+        for member in members:
+            index = bisect.bisect_left(timeline, member)
+            if index < len(timeline) and timeline[index] == member:
+                del timeline[index]
+
+    async def drop(self, name: str):
+        self._timelines.pop(name, None)
+        self._states.pop(name, None)
+
+    async def page(self, name: str, before: str | None, count: int) -> list[str]:
+        """Up to ``count`` members older than ``before``, newest first."""
+        timeline = self._timelines.get(name, [])
+        end = len(timeline) if before is None else bisect.bisect_left(timeline, before)
+        return timeline[max(0, end - count):end][::-1]
+
+    async def close(self):
+        pass
+
+
+class RedisFeedBackend:
+    """Timelines as Redis sorted sets over any ``redis.asyncio``-compatible client.
+
+    Every member has score 0 and the sets are read by lexicographic range,
+    which is timeline order for the fixed-width members. A separate state
+    key records that a timeline was built from the database, and whether
+    it is complete; both expire after ``ttl`` seconds without writes, so
+    idle author timelines do not accumulate.
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "quickapi:feed:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, name: str) -> tuple[str, str]:
+        return self.prefix + name, self.prefix + name + ":state"
+
+    async def state(self, name: str) -> str | None:
+        _, state_key = self._keys(name)
+        state = await self.client.get(state_key)
+        return state.decode() if isinstance(state, bytes) else state
+
+    async def add(self, name: str, members: list[str], max_length: int, state: str | None = None):
+        key, state_key = self._keys(name)
+        async with self.client.pipeline(transaction=True) as pipe:
+            if members:
+                pipe.zadd(key, {member: 0 for member in members})
+                pipe.zremrangebyrank(key, 0, -max_length - 1)
+                pipe.expire(key, self.ttl)
+            if state is not None:
+                pipe.set(state_key, state, ex=self.ttl)
+            else:
+                # Writes keep a built timeline alive as long as its set.
+                pipe.expire(state_key, self.ttl)
+            results = await pipe.execute()
+        if members and results[1]:
+            await self.client.set(state_key, PARTIAL, xx=True, keepttl=True)
+
+    async def remove(self, name: str, members: list[str]):
+        if members:
+            key, _ = self._keys(name)
+            await self.client.zrem(key, *members)
+
+    async def drop(self, name: str):
+        await self.client.delete(*self._keys(name))
+
+    async def page(self, name: str, before: str | None, count: int) -> list[str]:
+        key, _ = self._keys(name)
+        members = await self.client.zrange(
+            key, "(" + before if before is not None else "+", "-", desc=True, bylex=True, offset=0, num=count
+        )
+        return [member.decode() if isinstance(member, bytes) else member for member in members]
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,229 @@
+"""Precomputed timelines of recent posts, globally and per author.
+
+Each timeline holds the ``FEED_MAX_LENGTH`` newest visible posts as
+members that sort in (createdAt, id) order, so a page is one range read
+of ``limit`` members whatever the length. The crud writes keep the
+timelines current through ``app.crud.aio``. A timeline that was never
+built, or was evicted, is rebuilt from the database on its first read.
+
+Timelines only hold ids; the posts are read by id when a page is served,
+so counters and deletions are always current. Ids that no longer resolve
+to a visible post are dropped from the timeline on the way.
+
+A timeline built from fewer than ``FEED_MAX_LENGTH`` posts is complete
+and serves every page. Once it has been trimmed it only holds the newest
+posts, and a page reaching past its oldest entry is read from the
+database. Feed cursors are the ``(createdAt, id)`` cursors of ``GET /p/``,
+so that page, and any page while the store is failing, is served by the
+same keyset query.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app import config
+from app.feed.backends import COMPLETE, PARTIAL, MemoryFeedBackend, RedisFeedBackend
+from app.utils.pagination import as_utc, decode_cursor, encode_cursor
+
+GLOBAL = "global"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def author_timeline(author_id: int) -> str:
+    return f"author:{author_id}"
+
+
+def member(created_at: datetime, post_id: int) -> str:
+    """Fixed-width ``micros:id`` string; string order is (createdAt, id) order."""
+    micros = max(0, (created_at - EPOCH) // MICROSECOND)
+    return f"{micros:017d}:{post_id:012d}"
+
+
+def parse_member(value: str) -> tuple[datetime, int]:
+    micros, post_id = value.split(":")
+    return EPOCH + int(micros) * MICROSECOND, int(post_id)
+
+
+def _members_by_author(entries) -> dict[int, list[str]]:
+    by_author: dict[int, list[str]] = {}
+    for author_id, post_id, created_at in entries:
+        by_author.setdefault(author_id, []).append(member(created_at, post_id))
+    return by_author
+
+
+def _cursor_member(cursor: str) -> str:
+    created_at, post_id = decode_cursor(cursor, 2)
+    # Members are fixed-width; a wider id would sort out of order.
+    if type(post_id) is not int or not 0 <= post_id < 10**12:
+        raise ValueError("Invalid cursor")
+    try:
+        return member(as_utc(datetime.fromisoformat(created_at)), post_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+class FeedStats:
+    def __init__(self):
+        self.pages = 0
+        self.fallbacks = 0
+        self.rebuilds = 0
+        self.updates = 0
+        self.pruned = 0
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "pages": self.pages,
+            "fallbacks": self.fallbacks,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "pruned": self.pruned,
+            "errors": self.errors,
+        }
+
+
+class Feed:
+    """Bounded timelines over a ``MemoryFeedBackend`` or ``RedisFeedBackend``.
+
+    Store failures never fail a request: reads fall back to the database,
+    and a timeline that missed a write is dropped, to be rebuilt, the next
+    time the store answers for it.
+    """
+
+    def __init__(self, backend, max_length: int):
+        self.backend = backend
+        self.max_length = max_length
+        self.stats = FeedStats()
+        self._rebuilding: dict[str, asyncio.Future] = {}
+        self._stale: set[str] = set()
+
+    async def _write(self, operation, name: str, *args):
+        try:
+            await operation(name, *args)
+        except Exception:
+            self.stats.errors += 1
+            self._stale.add(name)
+
+    async def add_posts(self, entries: list[tuple[int, int, datetime]]):
+        """Add visible posts, given as ``(author_id, post_id, created_at)``."""
+        if self.backend is None or not entries:
+            return
+        self.stats.updates += 1
+        by_author = _members_by_author(entries)
+        members = [value for values in by_author.values() for value in values]
+        await self._write(self.backend.add, GLOBAL, members, self.max_length)
+        for author_id, values in by_author.items():
+            await self._write(self.backend.add, author_timeline(author_id), values, self.max_length)
+
+    async def remove_posts(self, entries: list[tuple[int, int, datetime]]):
+        if self.backend is None or not entries:
+            return
+        self.stats.updates += 1
+        by_author = _members_by_author(entries)
+        members = [value for values in by_author.values() for value in values]
+        await self._write(self.backend.remove, GLOBAL, members)
+        for author_id, values in by_author.items():
+            await self._write(self.backend.remove, author_timeline(author_id), values)
+
+    async def remove_author(self, author_id: int, entries: list[tuple[int, int, datetime]]):
+        """Drop an author's timeline and their ``entries`` from the global one.
+
+        ``entries`` only needs the author's newest ``max_length`` posts: an
+        older one cannot be among the newest ``max_length`` overall.
+        """
+        if self.backend is None:
+            return
+        self.stats.updates += 1
+        members = [member(created_at, post_id) for _, post_id, created_at in entries]
+        await self._write(self.backend.remove, GLOBAL, members)
+        await self._write(self.backend.drop, author_timeline(author_id))
+
+    async def _build(self, name: str, rebuild):
+        # Concurrent first reads of a timeline share one rebuild.
+        inflight = self._rebuilding.get(name)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._rebuilding[name] = future
+        try:
+            self.stats.rebuilds += 1
+            entries = await rebuild(self.max_length)
+            members = [member(created_at, post_id) for _, post_id, created_at in entries]
+            state = PARTIAL if len(entries) >= self.max_length else COMPLETE
+            await self.backend.add(name, members, self.max_length, state)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(None)
+        finally:
+            del self._rebuilding[name]
+
+    async def page(self, name: str, cursor: str | None, limit: int, rebuild):
+        """Return ``(members, next_cursor)``, or ``None`` to read the database.
+
+        ``rebuild`` is an async callable returning the newest
+        ``max_length`` entries of the timeline, used when it is not built.
+        """
+        if self.backend is None:
+            return None
+        before = _cursor_member(cursor) if cursor is not None else None
+        try:
+            if name in self._stale:
+                await self.backend.drop(name)
+                self._stale.discard(name)
+            state = await self.backend.state(name)
+            if state is None:
+                await self._build(name, rebuild)
+                state = await self.backend.state(name)
+            members = await self.backend.page(name, before, limit + 1)
+        except Exception:
+            self.stats.errors += 1
+            self.stats.fallbacks += 1
+            return None
+
+        if len(members) <= limit and state != COMPLETE:
+            # The page runs past the oldest entry of a timeline that does
+            # not hold every post; the database has the rest.
+            self.stats.fallbacks += 1
+            return None
+        self.stats.pages += 1
+        next_cursor = None
+        if len(members) > limit:
+            members = members[:limit]
+            next_cursor = encode_cursor(parse_member(members[-1]))
+        return members, next_cursor
+
+    async def prune(self, name: str, members: list[str]):
+        """Forget ``members`` of ``name`` that no longer resolve to a visible post."""
+        if self.backend is None or not members:
+            return
+        self.stats.pruned += len(members)
+        await self._write(self.backend.remove, name, members)
+        if name != GLOBAL:
+            await self._write(self.backend.remove, GLOBAL, members)
+
+    async def close(self):
+        """Release the backend's connections, on shutdown."""
+        if self.backend is None:
+            return
+        try:
+            await self.backend.close()
+        except Exception:
+            self.stats.errors += 1
+
+
+def build_backend():
+    if config.FEED_BACKEND == "memory":
+        return MemoryFeedBackend(config.FEED_MAX_TIMELINES)
+    if config.FEED_BACKEND == "redis":
+        from redis.asyncio import Redis
+
+        return RedisFeedBackend(Redis.from_url(config.REDIS_URL), config.FEED_TTL)
+    return None
+
+
+feed = Feed(build_backend(), config.FEED_MAX_LENGTH)
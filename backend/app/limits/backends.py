@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+
+
+class MemoryBucketBackend:
+    """Token buckets in the worker, least recently used evicted first.
+
+    A bucket that is evicted starts over full, which is what it would have
+    refilled to anyway once idle for ``burst / rate`` seconds.
+    """
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, buckets: list[tuple[str, float, float]]) -> float:
+        now = time.monotonic()
+        levels = []
+        wait = 0.0
+        for key, rate, burst in buckets:
+            level, at = self._buckets.get(key, (burst, now))
+            level = min(burst, level + (now - at) * rate)
+            levels.append(level)
+            if level < 1:
+                wait = max(wait, (1 - level) / rate)
+        for (key, _, _), level in zip(buckets, levels):
+            self._buckets[key] = (level - 1 if not wait else level, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def close(self):
+        pass
+
+
+# All buckets of a request are refilled and checked, then either all give
+# a token or none does. Timestamps come from the Redis clock, so workers
+# on different hosts agree on them.
+TAKE = """
+local now = redis.call("TIME")
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local bucket = redis.call("HMGET", key, "level", "at")
+    local level = tonumber(bucket[1]) or burst
+    local at = tonumber(bucket[2]) or now
+    level = math.min(burst, level + math.max(0, now - at) * rate)
+    levels[i] = level
+    if level < 1 then
+        wait = math.max(wait, (1 - level) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local level = levels[i]
+    if wait == 0 then
+        level = level - 1
+    end
+    redis.call("HSET", key, "level", tostring(level), "at", tostring(now))
+    redis.call("PEXPIRE", key, math.ceil(tonumber(ARGV[2 * i]) / tonumber(ARGV[2 * i - 1]) * 1000))
+end
+return math.ceil(wait * 1000)
+"""
+
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker, over any ``redis.asyncio``-compatible client.
+
+    One script call per request. A bucket expires once it would have
+    refilled, so idle clients leave nothing behind. The client part of the
+    keys is a hash tag, keeping a request's buckets in one Cluster slot.
+    ``fakeredis`` with Lua support (``fakeredis[lua]``) stands in for a
+    server locally and in the tests.
+    """
+
+    def __init__(self, client, prefix: str = "quickapi:limit:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(TAKE)
+
+    async def take(self, buckets: list[tuple[str, float, float]]) -> float:
+        keys = [self.prefix + key for key, _, _ in buckets]
+        args = [value for _, rate, burst in buckets for value in (rate, burst)]
+        return await self._take(keys=keys, args=args) / 1000
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,280 @@
+"""Per-client rate limits and admission control.
+
+Rate limits are token buckets. Every client has one bucket, refilled at
+``RATE_LIMIT_RATE`` tokens per second up to ``RATE_LIMIT_BURST``.
+``RATE_LIMIT_ROUTES`` gives routes such as ``POST /a/create`` a bucket
+of their own per client. A request takes a token from each bucket it
+falls under, or from none; when one is empty it is answered 429 with
+the seconds until a token is back. With the "redis" backend the buckets
+are shared by every worker. When the backend fails, requests are let
+through and counted.
+
+Admission control caps the requests a worker handles at once. By default
+the cap is what its connection pool can serve. Requests over the cap
+wait in line, up to ``ADMISSION_MAX_WAITING`` of them for at most
+``ADMISSION_WAIT_TIMEOUT`` seconds, and are otherwise answered 503, so
+requests queue here rather than in the pool, where they would hold a
+thread each and time out only after ``DB_POOL_TIMEOUT``.
+``ADMISSION_MAX_PER_CLIENT`` answers 429 to a client that already has
+that many requests in flight or waiting.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+
+from starlette.routing import compile_path
+
+from app import config
+from app.db import pool_options
+from app.limits.backends import MemoryBucketBackend, RedisBucketBackend
+
+
+def parse_route_limits(value: str) -> dict[str, tuple[float, float]]:
+    """``"POST /a/create=1:5, GET /p/=20:40"`` -> ``{"POST /a/create": (1.0, 5.0), ...}``."""
+    limits = {}
+    for rule in value.split(","):
+        if not rule.strip():
+            continue
+        route, _, limit = rule.rpartition("=")
+        rate, _, burst = limit.partition(":")
+        method, _, path = route.strip().partition(" ")
+        if not method or not path.strip() or not rate:
+            raise ValueError(f"Invalid route limit {rule.strip()!r}, expected 'METHOD /path=rate:burst'")
+        rate = float(rate)
+        burst = float(burst) if burst else rate
+        # A zero rate never refills, and a burst under one never holds a token.
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Invalid route limit {rule.strip()!r}, rate must be positive and burst at least 1")
+        limits[f"{method.upper()} {path.strip()}"] = (rate, burst)
+    return limits
+
+
+class Overloaded(Exception):
+    """A request turned away; ``status`` is 429 or 503."""
+
+    def __init__(self, status: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class RateLimitStats:
+    def __init__(self):
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+        self.limited_routes: Counter[str] = Counter()
+
+    def snapshot(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors,
+            "limited_routes": dict(self.limited_routes),
+        }
+
+
+class RateLimiter:
+    def __init__(self, backend, rate: float, burst: float, routes: dict[str, tuple[float, float]]):
+        # A rate of 0 turns the overall limit off; a burst under one would
+        # never hold a token.
+        if rate > 0 and burst < 1:
+            raise ValueError(f"Invalid rate limit burst {burst}, expected at least 1")
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.routes = routes
+        self.stats = RateLimitStats()
+        # Only the limited routes are matched, against their own templates.
+        self._patterns = []
+        for route in routes:
+            method, path = route.split(" ", 1)
+            self._patterns.append((method, compile_path(path)[0], route))
+
+    def __bool__(self) -> bool:
+        return self.backend is not None
+
+    def route_of(self, method: str, path: str) -> str | None:
+        """The limited route ``"METHOD /path"`` a request falls under, if any."""
+        for route_method, pattern, route in self._patterns:
+            if route_method == method and pattern.match(path):
+                return route
+        return None
+
+    async def check(self, client: str, route: str | None = None):
+        """Take the request's tokens, or raise ``Overloaded``; ``route`` is ``"METHOD /path"``."""
+        if self.backend is None:
+            return
+        # The braces are a Redis Cluster hash tag.
+        buckets = []
+        if self.rate > 0:
+            buckets.append((f"{{{client}}}", self.rate, self.burst))
+        if route in self.routes:
+            rate, burst = self.routes[route]
+            buckets.append((f"{{{client}}}:{route}", rate, burst))
+        if not buckets:
+            return
+        try:
+            wait = await self.backend.take(buckets)
+        except Exception:
+            self.stats.errors += 1
+            return
+        if wait:
+            self.stats.limited += 1
+            self.stats.limited_routes[route or "*"] += 1
+            raise Overloaded(429, "Too many requests", wait)
+        self.stats.allowed += 1
+
+    async def close(self):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.close()
+        except Exception:
+            self.stats.errors += 1
+
+
+class AdmissionStats:
+    def __init__(self):
+        self.admitted = 0
+        self.queued = 0
+        # 503s for a full line and for waiting too long, 429s for clients
+        # over ADMISSION_MAX_PER_CLIENT.
+        self.rejected = 0
+        self.timed_out = 0
+        self.client_rejected = 0
+        self.wait_seconds = 0.0
+        self.max_active = 0
+        self.max_waiting = 0
+
+    def snapshot(self, active: int = 0, waiting: int = 0, limit: int = 0) -> dict:
+        return {
+            "limit": limit,
+            "active": active,
+            "waiting": waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "client_rejected": self.client_rejected,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "max_active": self.max_active,
+            "max_waiting": self.max_waiting,
+        }
+
+
+class AdmissionControl:
+    """At most ``max_active`` requests at once, the next ``max_waiting`` in line.
+
+    A finishing request hands its slot to the longest waiting one, so the
+    line is first come, first served and never overtaken by new arrivals.
+    """
+
+    def __init__(self, max_active: int, max_waiting: int, wait_timeout: float, max_per_client: int = 0):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.max_per_client = max_per_client
+        self.stats = AdmissionStats()
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._clients: Counter[str] = Counter()
+
+    def __bool__(self) -> bool:
+        return self.max_active > 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, client: str):
+        """Wait for a slot, or raise ``Overloaded``; ``release`` it once answered."""
+        if self.max_per_client and self._clients[client] >= self.max_per_client:
+            self.stats.client_rejected += 1
+            raise Overloaded(429, "Too many concurrent requests", 1)
+        self._clients[client] += 1
+        try:
+            if self.active < self.max_active and not self._waiters:
+                self.active += 1
+            else:
+                if len(self._waiters) >= self.max_waiting:
+                    self.stats.rejected += 1
+                    raise Overloaded(503, "Server busy", 1)
+                await self._wait()
+        except BaseException:
+            self._forget(client)
+            raise
+        self.stats.admitted += 1
+        self.stats.max_active = max(self.stats.max_active, self.active)
+
+    async def _wait(self):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.stats.queued += 1
+        self.stats.max_waiting = max(self.stats.max_waiting, len(self._waiters))
+        started = time.perf_counter()
+        try:
+            # Not wait_for: a slot handed over just as the timeout fires
+            # must not be lost with the cancelled future.
+            await asyncio.wait((future,), timeout=self.wait_timeout)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            else:
+                self._waiters.remove(future)
+                future.cancel()
+            raise
+        finally:
+            self.stats.wait_seconds += time.perf_counter() - started
+        if not future.done():
+            self._waiters.remove(future)
+            future.cancel()
+            self.stats.timed_out += 1
+            raise Overloaded(503, "Server busy", 1)
+
+    def release(self, client: str):
+        self._forget(client)
+        self._release_slot()
+
+    def _forget(self, client: str):
+        self._clients[client] -= 1
+        if self._clients[client] <= 0:
+            del self._clients[client]
+
+    def _release_slot(self):
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                # The slot passes on; ``active`` stays the same.
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def snapshot(self) -> dict:
+        return self.stats.snapshot(self.active, len(self._waiters), self.max_active)
+
+
+def build_backend():
+    if config.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBucketBackend(config.RATE_LIMIT_MAX_BUCKETS)
+    if config.RATE_LIMIT_BACKEND == "redis":
+        from redis.asyncio import Redis
+
+        return RedisBucketBackend(Redis.from_url(config.REDIS_URL))
+    return None
+
+
+def admission_limit() -> int:
+    if config.ADMISSION_MAX_ACTIVE:
+        return max(0, config.ADMISSION_MAX_ACTIVE)
+    options = pool_options()
+    return options["pool_size"] + options["max_overflow"]
+
+
+rate_limiter = RateLimiter(
+    build_backend(), config.RATE_LIMIT_RATE, config.RATE_LIMIT_BURST, parse_route_limits(config.RATE_LIMIT_ROUTES)
+)
+admission = AdmissionControl(
+    admission_limit(), config.ADMISSION_MAX_WAITING, config.ADMISSION_WAIT_TIMEOUT, config.ADMISSION_MAX_PER_CLIENT
+)
@@ -1,26 +1,84 @@
+from app.metrics.startup import startup
+
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.db import init_db
-from app.routes import author, reply, post
+from app import config
+from app.cache.cache import cache
+from app.crud.aio import cancel_cascades, reply_writes
+from app.db import close_pools, query_metrics, warm_pool
+from app.feed.feed import feed
+from app.limits.limits import admission, rate_limiter
+from app.middleware.compression import CompressionMiddleware, compression_codecs
+from app.middleware.conditional import ConditionalGetMiddleware
+from app.middleware.limits import AdmissionMiddleware, RateLimitMiddleware
+from app.middleware.query_metrics import QueryMetricsMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.replicas import replicas
+from app.routes import author, feed as feed_routes, metrics, reply, post, search
+from app.security import passwords
+
+startup.mark("import")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager to handle startup and shutdown events."""
-    on_startup()
+    await on_startup()
     yield
+    await on_shutdown()
+
+
+async def on_startup():
+    if config.MIGRATE_ON_STARTUP:
+        # Imported here: alembic is a sizeable share of the import time of
+        # workers that do not migrate.
+        from app.migrate import upgrade
+
+        try:
+            with startup.phase("migrate"):
+                upgrade()
+            print("Database schema migrated successfully.", flush=True)
+        except Exception as e:
+            print("Failed to initialize DB:", e, flush=True)
+            raise e
+    with startup.phase("warmup"):
+        await warm_pool()
+    if replicas:
+        with startup.phase("replicas"):
+            await replicas.start()
+    if config.REPLY_WRITE_BEHIND:
+        reply_writes.start()
+    startup.mark("total")
+    print(f"Ready in {startup.summary()}.", flush=True)
 
 
-def on_startup():
-    try:
-        init_db()
-        print("Database schema initialized successfully.", flush=True)
-    except Exception as e:
-        print("Failed to initialize DB:", e, flush=True)
-        raise e
+async def on_shutdown():
+    # The server has stopped accepting requests and waited for the ones
+    # in flight; what is left is queued writes, connections and threads.
+    # Queued replies are written before the pools close.
+    await reply_writes.close()
+    passwords.shutdown()
+    await cancel_cascades()
+    await replicas.close()
+    await rate_limiter.close()
+    await cache.close()
+    await feed.close()
+    await close_pools()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    ConditionalGetMiddleware, sticky_cookie=config.REPLICA_STICKY_COOKIE if replicas else None
+)
+app.add_middleware(CompressionMiddleware, codecs=compression_codecs(), min_size=config.COMPRESSION_MIN_SIZE)
+# Rate-limited clients are turned away before they take a place in line.
+app.add_middleware(AdmissionMiddleware, admission=admission, exempt=config.LIMITS_EXEMPT_PATHS)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, exempt=config.LIMITS_EXEMPT_PATHS)
+app.add_middleware(QueryMetricsMiddleware, metrics=query_metrics)
+if replicas:
+    app.add_middleware(
+        ReadYourWritesMiddleware, cookie=config.REPLICA_STICKY_COOKIE, seconds=config.REPLICA_STICKY_SECONDS
+    )
 
 
 @app.get("/")
@@ -31,3 +89,6 @@ def read_root():
 app.include_router(author.router)
 app.include_router(post.router)
 app.include_router(reply.router)
+app.include_router(search.router)
+app.include_router(feed_routes.router)
+app.include_router(metrics.router)
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class PoolMetrics:
+    """Counters for one connection pool.
+
+    ``wait`` is the time spent inside the pool waiting for a connection,
+    which is what grows first when the pool is undersized for the traffic.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def observe_timeout(self, wait: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def observe_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+        if pool is not None:
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                idle=pool.checkedin(),
+            )
+        return stats
+
+
+class _InstrumentedPool:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.observe_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start)
+        return connection
+
+    def _do_return_conn(self, record):
+        self.metrics.observe_checkin()
+        return super()._do_return_conn(record)
+
+
+def instrumented_pool(base, metrics: PoolMetrics):
+    """Return a subclass of the pool class ``base`` that reports to ``metrics``.
+
+    The metrics live on the class rather than the instance because
+    ``engine.dispose()`` recreates the pool from its class.
+    """
+    return type(f"Instrumented{base.__name__}", (_InstrumentedPool, base), {"metrics": metrics})
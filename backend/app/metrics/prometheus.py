@@ -0,0 +1,143 @@
+"""Render the app's counters in the Prometheus text exposition format."""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Exposition:
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name: str, kind: str, help: str, samples):
+        """Add one metric family; ``samples`` is a list of ``(labels, value)``."""
+        self.lines.append(f"# HELP quickapi_{name} {help}")
+        self.lines.append(f"# TYPE quickapi_{name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"quickapi_{name}{_labels(labels)} {value}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render(queries, pools: dict, cache: dict, loaders: dict, feed: dict, startup: dict, writes: dict, replicas: dict,
+           limits: dict) -> str:
+    out = Exposition()
+
+    routes = [
+        ({"method": method, "route": route}, stats)
+        for (method, route), stats in queries.route_items()
+    ]
+    out.metric("http_requests_total", "counter", "Requests handled, by route.",
+               [(labels, stats.requests) for labels, stats in routes])
+    out.metric("http_request_errors_total", "counter", "Requests answered with a 5xx status.",
+               [(labels, stats.errors) for labels, stats in routes])
+    out.metric("http_request_seconds_total", "counter", "Time spent handling requests.",
+               [(labels, round(stats.seconds, 6)) for labels, stats in routes])
+    out.metric("db_queries_total", "counter", "SQL statements issued while handling requests.",
+               [(labels, stats.queries) for labels, stats in routes])
+    out.metric("db_query_seconds_total", "counter", "Time spent in SQL statements.",
+               [(labels, round(stats.query_seconds, 6)) for labels, stats in routes])
+    out.metric("db_rows_total", "counter", "Rows returned or affected by SQL statements.",
+               [(labels, stats.rows) for labels, stats in routes])
+    out.metric("db_slowest_query_seconds", "gauge", "Slowest single statement seen for the route.",
+               [(labels, round(stats.slowest_seconds, 6)) for labels, stats in routes])
+    out.metric("db_slow_query_requests_total", "counter", "Requests with a statement over SLOW_QUERY_MS.",
+               [(labels, stats.slow_queries) for labels, stats in routes])
+    out.metric("db_unattributed_queries_total", "counter", "SQL statements issued outside any request.",
+               [({}, queries.unattributed_queries)])
+
+    for key, kind, help in [
+        ("checkouts", "counter", "Connections checked out of the pool."),
+        ("timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+        ("wait_seconds_total", "counter", "Time spent waiting for a pooled connection."),
+        ("checked_out", "gauge", "Connections currently checked out."),
+        ("idle", "gauge", "Connections idle in the pool."),
+        ("overflow", "gauge", "Connections open beyond the pool size."),
+    ]:
+        name = key if key.endswith("_total") or kind == "gauge" else f"{key}_total"
+        out.metric(f"db_pool_{name}", kind, help,
+                   [({"engine": engine}, stats[key]) for engine, stats in pools.items() if key in stats])
+
+    for key in ("hits", "misses", "coalesced", "invalidations", "errors"):
+        out.metric(f"cache_{key}_total", "counter", f"Read-through cache {key}.", [({}, cache[key])])
+
+    for key, help in [
+        ("loads", "Single-id lookups requested."),
+        ("batches", "Batched queries sent."),
+        ("keys", "Distinct ids across all batches."),
+    ]:
+        out.metric(f"batch_{key}_total", "counter", help,
+                   [({"loader": name}, stats[key]) for name, stats in loaders.items()])
+
+    for key, help in [
+        ("pages", "Feed pages served from a timeline."),
+        ("fallbacks", "Feed pages served by the database instead."),
+        ("rebuilds", "Timelines rebuilt from the database."),
+        ("updates", "Timeline updates from post and author writes."),
+        ("pruned", "Timeline entries dropped for posts no longer visible."),
+        ("errors", "Failed timeline store operations."),
+    ]:
+        out.metric(f"feed_{key}_total", "counter", help, [({}, feed[key])])
+
+    out.metric("startup_seconds", "gauge", "Time this worker spent in each startup phase.",
+               [({"phase": phase}, seconds) for phase, seconds in startup.items()])
+
+    for key, help in [
+        ("enqueued", "Replies queued for write-behind."),
+        ("rejected", "Replies refused because the queue was full or closed."),
+        ("batches", "Write-behind batches committed or attempted."),
+        ("rows", "Replies in write-behind batches."),
+        ("errors", "Queued replies rejected by validation."),
+        ("failed", "Queued replies lost to a failed batch."),
+    ]:
+        out.metric(f"reply_writes_{key}_total", "counter", help, [({}, writes[key])])
+    out.metric("reply_writes_depth", "gauge", "Replies waiting in the write-behind queue.", [({}, writes["depth"])])
+
+    members = replicas["replicas"].items()
+    out.metric("replica_healthy", "gauge", "Whether the replica serves reads (1) or not (0).",
+               [({"replica": name}, int(stats["healthy"])) for name, stats in members])
+    out.metric("replica_lag_seconds", "gauge", "Replay lag at the last health check.",
+               [({"replica": name}, stats["lag_seconds"]) for name, stats in members if stats["lag_seconds"] is not None])
+    out.metric("replica_reads_total", "counter", "Reads sent to the replica.",
+               [({"replica": name}, stats["reads"]) for name, stats in members])
+    out.metric("replica_errors_total", "counter", "Failed health checks and reads of the replica.",
+               [({"replica": name}, stats["errors"]) for name, stats in members])
+    for key, help in [
+        ("sticky_reads", "Reads kept on the primary after the client wrote."),
+        ("primary_reads", "Reads sent to the primary with no healthy replica."),
+        ("fallbacks", "Replica reads retried on the primary."),
+    ]:
+        out.metric(f"replica_{key}_total", "counter", help, [({}, replicas[key])])
+
+    rate_limit, admission = limits["rate_limit"], limits["admission"]
+    for key, help in [
+        ("allowed", "Requests that got their rate-limit tokens."),
+        ("limited", "Requests answered 429 by the rate limiter."),
+        ("errors", "Rate-limit checks let through because the backend failed."),
+    ]:
+        out.metric(f"rate_limit_{key}_total", "counter", help, [({}, rate_limit[key])])
+    for key, help in [
+        ("admitted", "Requests admitted."),
+        ("queued", "Requests that waited for a slot."),
+        ("rejected", "Requests answered 503 because the line was full."),
+        ("timed_out", "Requests answered 503 after waiting ADMISSION_WAIT_TIMEOUT."),
+        ("client_rejected", "Requests answered 429 for too many from one client."),
+    ]:
+        out.metric(f"admission_{key}_total", "counter", help, [({}, admission[key])])
+    out.metric("admission_wait_seconds_total", "counter", "Time requests spent waiting for a slot.",
+               [({}, admission["wait_seconds"])])
+    for key, help in [
+        ("limit", "Requests handled at once before others wait."),
+        ("active", "Requests being handled."),
+        ("waiting", "Requests waiting for a slot."),
+    ]:
+        out.metric(f"admission_{key}", "gauge", help, [({}, admission[key])])
+
+    return out.render()
@@ -0,0 +1,135 @@
+import contextvars
+import copy
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+
+logger = logging.getLogger("quickapi.sql")
+
+# Characters of a statement kept as the slowest of its route.
+STATEMENT_CHARS = 500
+
+# Set by QueryMetricsMiddleware for the duration of each request. The
+# threadpool and run_sync both carry the context into the crud functions.
+current_request: contextvars.ContextVar["RequestQueries | None"] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+
+class RequestQueries:
+    """The statements one request sent, as seen from the cursor hooks."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def observe(self, statement: str, seconds: float, rows: int):
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.rows = 0
+        self.slow_queries = 0
+        self.slowest_seconds = 0.0
+        # Only in /metrics/queries: statements make poor Prometheus labels
+        # and do not belong in a response header.
+        self.slowest_statement: str | None = None
+
+
+class QueryMetrics:
+    """Per-route totals of requests and the SQL they issued.
+
+    Routes are keyed by method and path template (``/p/{post_id}``), so ids
+    in the URL do not multiply the series.
+    """
+
+    def __init__(self, slow_query_ms: float):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self._lock = threading.Lock()
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.unattributed_queries = 0
+
+    def observe_query(self, statement: str, seconds: float, rows: int):
+        request = current_request.get()
+        if request is None:
+            with self._lock:
+                self.unattributed_queries += 1
+        else:
+            request.observe(statement, seconds, rows)
+        if self.slow_query_seconds and seconds >= self.slow_query_seconds:
+            logger.warning("slow query (%.1f ms, %d rows): %s", seconds * 1000, rows, " ".join(statement.split())[:2000])
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, request: RequestQueries):
+        with self._lock:
+            stats = self.routes.get((method, route))
+            if stats is None:
+                stats = self.routes[(method, route)] = RouteStats()
+            stats.requests += 1
+            stats.errors += status >= 500
+            stats.seconds += seconds
+            stats.queries += request.count
+            stats.query_seconds += request.seconds
+            stats.rows += request.rows
+            if request.slowest_statement is not None and request.slowest_seconds > stats.slowest_seconds:
+                stats.slowest_seconds = request.slowest_seconds
+                stats.slowest_statement = " ".join(request.slowest_statement.split())[:STATEMENT_CHARS]
+            if self.slow_query_seconds and request.slowest_seconds >= self.slow_query_seconds:
+                stats.slow_queries += 1
+
+    def route_items(self) -> list[tuple[tuple[str, str], RouteStats]]:
+        with self._lock:
+            return [(key, copy.copy(stats)) for key, stats in sorted(self.routes.items())]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                f"{method} {route}": {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "seconds_total": round(stats.seconds, 6),
+                    "queries_total": stats.queries,
+                    "queries_per_request": round(stats.queries / stats.requests, 2),
+                    "query_seconds_total": round(stats.query_seconds, 6),
+                    "rows_total": stats.rows,
+                    "slowest_query_seconds": round(stats.slowest_seconds, 6),
+                    "slowest_query": stats.slowest_statement,
+                    "requests_with_slow_queries": stats.slow_queries,
+                }
+                for (method, route), stats in sorted(self.routes.items())
+            }
+
+
+def instrument(engine, metrics: QueryMetrics):
+    """Time every statement ``engine`` executes and report it to ``metrics``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        metrics.observe_query(statement, seconds, max(cursor.rowcount, 0))
+
+    @event.listens_for(engine, "handle_error")
+    def failed(context):
+        # after_cursor_execute is skipped for failed statements.
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Seconds each phase of this worker's startup took.
+
+    Created when ``app.main`` starts importing, so ``import`` covers the
+    modules of the app and its dependencies; ``total`` runs until the
+    worker is ready to serve.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def mark(self, name: str):
+        """Record ``name`` as taking the time since startup began."""
+        self.phases[name] = time.perf_counter() - self.started
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def snapshot(self) -> dict:
+        return {name: round(seconds, 6) for name, seconds in self.phases.items()}
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+
+
+startup = StartupTimer()
@@ -0,0 +1,225 @@
+"""Negotiated zstd, brotli and gzip compression of responses.
+
+The coding is the client's most preferred one among ``COMPRESSION_CODECS``,
+ties going to the earlier entry; brotli and zstd need the ``brotli`` and
+``zstandard`` packages and are skipped without them. Whole JSON bodies
+under ``COMPRESSION_MIN_SIZE`` bytes go out as they are: a few hundred
+bytes gain little and still pay for a compressor. Streamed listings are
+compressed chunk by chunk, each chunk flushed so rows are not held back.
+
+A compressed body is a different representation, so its ``ETag`` gets the
+coding as a suffix (``"abc"`` becomes ``"abc-gzip"``) and
+``If-None-Match`` has it removed again on the way in, which keeps the
+validators of ``ConditionalGetMiddleware`` and the routes comparable.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app import config
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        import zstandard
+
+        self._zstandard = zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+COMPRESSORS = {
+    "zstd": (ZstdCompressor, "zstandard"),
+    "br": (BrotliCompressor, "brotli"),
+    "gzip": (GzipCompressor, None),
+}
+
+
+def available_codecs(names: list[str], levels: dict[str, int]) -> dict:
+    """``coding -> compressor factory`` for ``names`` whose module can be imported, in order."""
+    codecs = {}
+    for name in names:
+        if name not in COMPRESSORS:
+            continue
+        compressor, module = COMPRESSORS[name]
+        if module is not None:
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+        codecs[name] = lambda compressor=compressor, level=levels[name]: compressor(level)
+    return codecs
+
+
+def negotiate(accept_encoding: str, codings) -> str | None:
+    """The coding of ``codings`` the client prefers, earlier ones winning ties."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, *params = (item.strip() for item in part.split(";"))
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in codings:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def tag_etag(etag: str, coding: str) -> str:
+    return f'{etag[:-1]}-{coding}"' if etag.endswith('"') else etag
+
+
+def untag_etags(value: str, codings) -> tuple[str, str | None]:
+    """``If-None-Match`` without coding suffixes, and the coding of the last suffixed tag."""
+    tags, tagged = [], None
+    for tag in value.split(","):
+        tag = tag.strip()
+        for coding in codings:
+            suffix = f'-{coding}"'
+            if tag.endswith(suffix):
+                tag, tagged = tag[:-len(suffix)] + '"', coding
+                break
+        tags.append(tag)
+    return ", ".join(tags), tagged
+
+
+class CompressionMiddleware:
+    def __init__(self, app, codecs: dict, min_size: int):
+        self.app = app
+        self.codecs = codecs
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        coding = None
+        if scope["method"] != "HEAD":
+            coding = negotiate(request_headers.get("accept-encoding", ""), self.codecs)
+        # The coding of the representation a revalidating client holds.
+        held_coding = None
+        if "if-none-match" in request_headers:
+            value, held_coding = untag_etags(request_headers["if-none-match"], COMPRESSORS)
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, value.encode("latin-1") if name == b"if-none-match" else raw)
+                for name, raw in scope["headers"]
+            ]
+
+        held = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal held, compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if message["status"] == 304:
+                    if held_coding is not None and "etag" in headers:
+                        headers["ETag"] = tag_etag(headers["etag"], held_coding)
+                    headers.add_vary_header("Accept-Encoding")
+                    await send(message)
+                    return
+                if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES) or "content-encoding" in headers:
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                if coding is None or message["status"] == 204:
+                    await send(message)
+                    return
+                held = message
+                return
+
+            if held is None:
+                if compressor is not None:
+                    body = compressor.compress(message.get("body", b""))
+                    more_body = message.get("more_body", False)
+                    body += compressor.flush() if more_body else compressor.finish()
+                    message = {"type": "http.response.body", "body": body, "more_body": more_body}
+                await send(message)
+                return
+
+            start, held = held, None
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not more_body and len(body) < self.min_size:
+                await send(start)
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = coding
+            if "etag" in headers:
+                headers["ETag"] = tag_etag(headers["etag"], coding)
+            compressor = self.codecs[coding]()
+            body = compressor.compress(body)
+            if more_body:
+                del headers["content-length"]
+                body += compressor.flush()
+            else:
+                body += compressor.finish()
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def compression_codecs() -> dict:
+    return available_codecs(
+        [name.strip() for name in config.COMPRESSION_CODECS.split(",") if name.strip()],
+        {
+            "gzip": config.COMPRESSION_GZIP_LEVEL,
+            "br": config.COMPRESSION_BROTLI_LEVEL,
+            "zstd": config.COMPRESSION_ZSTD_LEVEL,
+        },
+    )
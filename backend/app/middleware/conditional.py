@@ -0,0 +1,69 @@
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.middleware.read_your_writes import has_cookie
+from app.utils.conditional import body_etag, cache_control, is_not_modified, is_public
+
+
+class ConditionalGetMiddleware:
+    """ETags, 304 Not Modified and Cache-Control for GET responses.
+
+    Successful JSON bodies are sent in one piece, so they are held back,
+    given an ``ETag`` hashed from the bytes unless the route set one, and
+    replaced by a bodiless 304 when the request's validators match.
+    Streamed bodies only get ``Cache-Control``; responses that set their
+    own ``Cache-Control`` are left alone.
+
+    With ``sticky_cookie``, the read-your-writes cookie, clients holding it
+    get ``private`` responses, and public ones vary on ``Cookie`` so a
+    shared cache does not answer those clients with its copy.
+    """
+
+    def __init__(self, app, sticky_cookie: str | None = None):
+        self.app = app
+        self.sticky_cookie = sticky_cookie
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        sticky = self.sticky_cookie is not None and has_cookie(scope, self.sticky_cookie)
+        held = None
+        chunks = []
+
+        async def send_conditional(message):
+            nonlocal held
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if message["status"] not in (200, 304) or "cache-control" in headers:
+                    await send(message)
+                    return
+                headers["Cache-Control"] = cache_control(scope["path"], shared=not sticky)
+                if self.sticky_cookie is not None and is_public(scope["path"]):
+                    headers.add_vary_header("Cookie")
+                if message["status"] == 200 and headers.get("content-type", "").startswith("application/json"):
+                    held = message
+                    return
+                await send(message)
+                return
+
+            if held is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(scope=held)
+            if "etag" not in headers:
+                headers["ETag"] = body_etag(body)
+            if is_not_modified(request_headers, headers["etag"], headers.get("last-modified")):
+                held["status"] = 304
+                del headers["content-length"]
+                del headers["content-type"]
+                body = b""
+            await send(held)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_conditional)
@@ -0,0 +1,68 @@
+import math
+
+from starlette.responses import JSONResponse
+
+from app.limits.limits import AdmissionControl, Overloaded, RateLimiter
+
+
+def client_of(scope) -> str:
+    # The peer address, or the forwarded one when uvicorn trusts the proxy.
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def reject(error: Overloaded, scope, receive, send):
+    response = JSONResponse(
+        {"detail": error.detail},
+        status_code=error.status,
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+    )
+    await response(scope, receive, send)
+
+
+class RateLimitMiddleware:
+    """Answer 429 to clients whose token buckets are empty.
+
+    Paths starting with one of ``exempt`` are never limited.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, exempt: tuple[str, ...] = ()):
+        self.app = app
+        self.limiter = limiter
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.limiter.check(client_of(scope), self.limiter.route_of(scope["method"], scope["path"]))
+        except Overloaded as e:
+            await reject(e, scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class AdmissionMiddleware:
+    """Hold requests over the admission limit in line, or turn them away."""
+
+    def __init__(self, app, admission: AdmissionControl, exempt: tuple[str, ...] = ()):
+        self.app = app
+        self.admission = admission
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.admission or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+        client = client_of(scope)
+        try:
+            await self.admission.acquire(client)
+        except Overloaded as e:
+            await reject(e, scope, receive, send)
+            return
+        try:
+            # Streamed bodies keep their slot until the last chunk is sent.
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release(client)
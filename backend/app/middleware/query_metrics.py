@@ -0,0 +1,54 @@
+import time
+
+from app.metrics.queries import QueryMetrics, RequestQueries, current_request
+
+
+class QueryMetricsMiddleware:
+    """Attribute SQL to the request that issued it.
+
+    Adds a ``Server-Timing`` header with the query count, total and slowest
+    query time, and records per-route totals in ``metrics``. Queries of a
+    streamed body run after the headers are sent; they reach the route
+    totals but not the header.
+    """
+
+    def __init__(self, app, metrics: QueryMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = current_request.set(queries)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+                timing = (
+                    f'db;dur={queries.seconds * 1000:.2f};desc="{queries.count} queries, {queries.rows} rows", '
+                    f"db-slowest;dur={queries.slowest_seconds * 1000:.2f}, "
+                    f"app;dur={elapsed * 1000:.2f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"],
+                route.path if route is not None else "<unmatched>",
+                status,
+                time.perf_counter() - started,
+                queries,
+            )
@@ -0,0 +1,56 @@
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+
+from app.replicas import read_primary
+
+READS = ("GET", "HEAD")
+
+
+def has_cookie(scope, name: str) -> bool:
+    for header, value in scope["headers"]:
+        if header == b"cookie" and name in cookie_parser(value.decode("latin-1")):
+            return True
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """Send a client's reads to the primary for a while after it wrote.
+
+    A successful write answers with a ``cookie`` that lives ``seconds``;
+    reads carrying it set ``app.replicas.read_primary`` for the request.
+    The cookie holds no data, so it works whichever worker or server
+    handles the next request.
+    """
+
+    def __init__(self, app, cookie: str, seconds: int):
+        self.app = app
+        self.cookie = cookie
+        self.set_cookie = f"{cookie}=1; Max-Age={seconds}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in READS:
+            if not has_cookie(scope, self.cookie):
+                await self.app(scope, receive, send)
+                return
+            token = read_primary.set(True)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                read_primary.reset(token)
+            return
+
+        async def send_sticky(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("Set-Cookie", self.set_cookie)
+            await send(message)
+
+        # Reads made while handling the write see it too.
+        token = read_primary.set(True)
+        try:
+            await self.app(scope, receive, send_sticky)
+        finally:
+            read_primary.reset(token)
@@ -1,11 +1,29 @@
-from sqlmodel import SQLModel, Field
+from typing import TYPE_CHECKING
+
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, text
+
+if TYPE_CHECKING:
+    from app.models.post import Post
+    from app.models.reply import Reply
 
 
 class Author(SQLModel, table=True):
+    # Uniqueness only applies to active authors, so a disabled account
+    # releases its email and username.
+    __table_args__ = (
+        Index("uq_author_email_active", "email", unique=True, postgresql_where=text("NOT disabled")),
+        Index("uq_author_username_active", "username", unique=True, postgresql_where=text("NOT disabled")),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    username: str = Field(index=True, nullable=False)
-    email: str = Field(index=True, nullable=False)
+    username: str = Field(nullable=False)
+    email: str = Field(nullable=False)
     password: str = Field(nullable=False)
-    full_name: str | None = Field(index=True, nullable=True)
-    disabled: bool = Field(default=False, index=True, nullable=False)
-    
\ No newline at end of file
+    full_name: str | None = Field(nullable=True)
+    disabled: bool = Field(default=False, nullable=False)
+    # Active posts by this author; see app.crud.counters.
+    post_count: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": text("0")})
+
+    posts: list["Post"] = Relationship(back_populates="author")
+    replies: list["Reply"] = Relationship(back_populates="author")
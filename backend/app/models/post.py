@@ -1,15 +1,69 @@
-from sqlmodel import SQLModel, Field
-from sqlalchemy import Boolean
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Boolean, Column, Computed, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+if TYPE_CHECKING:
+    from app.models.author import Author
+    from app.models.reply import Reply
 
 
 class Post(SQLModel, table=True):
+    # search_vector is only read inside SQL by /search; leaving it unmapped
+    # keeps the tsvector out of every ORM load.
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+    # Partial keyset indexes for the listings, which all skip disabled posts.
+    __table_args__ = (
+        Index("ix_post_active_createdAt_id", "createdAt", "id", postgresql_where=text("NOT disabled")),
+        Index(
+            "ix_post_active_author_id_createdAt_id",
+            "author_id",
+            "createdAt",
+            "id",
+            postgresql_where=text("NOT disabled"),
+        ),
+        Index(
+            "ix_post_active_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+            postgresql_where=text("NOT disabled"),
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     author_id: int | None = Field(default=None, foreign_key="author.id")
-    content: str = Field(index=True, nullable=False)
-    createdAt: str = Field(index=True, nullable=False)
+    content: str = Field(nullable=False)
+    # Stamped by Postgres when the insert leaves it out.
+    createdAt: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+        sa_column_kwargs={"server_default": func.now()},
+    )
     disabled: bool = Field(
         default=False,
         sa_type=Boolean,
         nullable=False,
-        index=True,
     )
+    # Active replies to this post; see app.crud.counters.
+    reply_count: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": text("0")})
+    # Bumped, and updatedAt stamped, whenever the active replies change;
+    # the validators of GET /r/{post_id}, see app.utils.conditional.
+    version: int = Field(default=1, nullable=False, sa_column_kwargs={"server_default": text("1")})
+    updatedAt: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+        sa_column_kwargs={"server_default": func.now()},
+    )
+    # Maintained by Postgres from ``content``; never written by the app.
+    search_vector: Any = Field(
+        default=None,
+        sa_column=Column(TSVECTOR, Computed("to_tsvector('english', content)", persisted=True)),
+        exclude=True,
+    )
+
+    author: "Author" = Relationship(back_populates="posts")
+    replies: list["Reply"] = Relationship(back_populates="post")
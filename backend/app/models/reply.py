@@ -1,15 +1,58 @@
-from sqlmodel import SQLModel, Field
-from sqlalchemy import Boolean
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Boolean, Column, Computed, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+if TYPE_CHECKING:
+    from app.models.author import Author
+    from app.models.post import Post
 
 class Reply(SQLModel, table=True):
+    # search_vector is only read inside SQL by /search; leaving it unmapped
+    # keeps the tsvector out of every ORM load.
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+    __table_args__ = (
+        Index(
+            "ix_reply_active_post_id_createdAt_id",
+            "post_id",
+            "createdAt",
+            "id",
+            postgresql_where=text("NOT disabled"),
+        ),
+        # Finds an author's replies when the author is disabled.
+        Index("ix_reply_active_author_id", "author_id", postgresql_where=text("NOT disabled")),
+        Index(
+            "ix_reply_active_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+            postgresql_where=text("NOT disabled"),
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     author_id: int | None = Field(default=None, foreign_key="author.id")
     post_id: int | None = Field(default=None, foreign_key="post.id")
-    content: str = Field(index=True, nullable=False)
-    createdAt: str = Field(index=True, nullable=False)
+    content: str = Field(nullable=False)
+    # Stamped by Postgres when the insert leaves it out.
+    createdAt: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+        sa_column_kwargs={"server_default": func.now()},
+    )
     disabled: bool = Field(
         default=False,
         sa_type=Boolean,
         nullable=False,
-        index=True
     )
+    # Maintained by Postgres from ``content``; never written by the app.
+    search_vector: Any = Field(
+        default=None,
+        sa_column=Column(TSVECTOR, Computed("to_tsvector('english', content)", persisted=True)),
+        exclude=True,
+    )
+
+    author: "Author" = Relationship(back_populates="replies")
+    post: "Post" = Relationship(back_populates="replies")
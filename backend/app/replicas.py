@@ -0,0 +1,210 @@
+"""Read replicas for the read-only crud functions.
+
+``app.crud.aio`` runs the reads that only serve the current request
+through ``replicas.pick()``: a healthy replica, in turn, or ``None`` for
+the primary. Writes, and the reads that fill shared state (the cache, the
+batched lookups, the feed timelines), always use the primary: a lagging
+row stored there would be served to every client, not only this one.
+
+A replica is healthy when its last check connected and found it replaying
+at most ``REPLICA_MAX_LAG`` seconds behind; checks run every
+``REPLICA_CHECK_INTERVAL`` seconds. A read that fails to reach a replica
+marks it down and is retried on the primary.
+
+Read-your-writes: a successful write answers with a cookie that sends the
+client's reads to the primary for ``REPLICA_STICKY_SECONDS``; see
+``app.middleware.read_your_writes``.
+"""
+import asyncio
+import contextvars
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine
+from starlette.concurrency import run_in_threadpool
+
+from app import config
+from app.db import DB_MODE, async_connect_args, pool_options, query_metrics, sync_connect_args
+from app.metrics.pool import PoolMetrics, instrumented_pool
+from app.metrics.queries import instrument
+
+# Set for requests whose reads must see the primary.
+read_primary: contextvars.ContextVar[bool] = contextvars.ContextVar("read_primary", default=False)
+
+# 0 while the replica has replayed everything it received: an idle
+# primary sends nothing, and the last replay time only ages.
+LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+# SQLSTATE classes of a server that cannot serve this client at all:
+# connection exceptions, shutdowns and restarts, a missing database and
+# rejected credentials.
+UNAVAILABLE_SQLSTATES = ("08", "57P", "3D", "28")
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """Whether ``error`` means the server could not be reached, not that the query failed."""
+    if isinstance(error, DBAPIError):
+        if error.connection_invalidated or isinstance(error, (OperationalError, InterfaceError)):
+            return True
+        return str(getattr(error.orig, "pgcode", None) or "").startswith(UNAVAILABLE_SQLSTATES)
+    return isinstance(error, OSError)
+
+
+class Replica:
+    def __init__(self, name: str, url: str, async_url: str | None):
+        self.name = name
+        self.pool_metrics = PoolMetrics(name)
+        self.engine = create_engine(
+            url,
+            poolclass=instrumented_pool(QueuePool, self.pool_metrics),
+            connect_args=sync_connect_args(),
+            **pool_options(),
+        )
+        instrument(self.engine, query_metrics)
+        self.async_engine = None
+        if DB_MODE == "async":
+            async_url = async_url or make_url(url).set(drivername="postgresql+asyncpg")
+            self.async_engine = create_async_engine(
+                async_url,
+                poolclass=instrumented_pool(AsyncAdaptedQueuePool, self.pool_metrics),
+                connect_args=async_connect_args(),
+                **pool_options(),
+            )
+            instrument(self.async_engine.sync_engine, query_metrics)
+        self.healthy = False
+        self.lag: float | None = None
+        self.reads = 0
+        self.errors = 0
+        self.last_error: str | None = None
+
+    @property
+    def pool(self):
+        """The pool requests use."""
+        return self.async_engine.sync_engine.pool if self.async_engine is not None else self.engine.pool
+
+    async def measure_lag(self) -> float | None:
+        if self.async_engine is not None:
+            async with self.async_engine.connect() as connection:
+                return (await connection.execute(LAG)).scalar()
+
+        def measure():
+            with self.engine.connect() as connection:
+                return connection.execute(LAG).scalar()
+
+        return await run_in_threadpool(measure)
+
+    def mark_down(self, error: BaseException):
+        self.healthy = False
+        self.lag = None
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"[:200]
+
+    async def dispose(self):
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        self.engine.dispose()
+
+    def snapshot(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": None if self.lag is None else round(float(self.lag), 3),
+            "reads": self.reads,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica], max_lag: float, interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.interval = interval
+        # Reads sent to the primary because the client had just written, or
+        # because no replica was healthy, and reads retried there.
+        self.sticky_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self._next = 0
+        self._task: asyncio.Task | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Replica | None:
+        """The replica for the next read of this request, or ``None`` for the primary."""
+        if not self.replicas:
+            return None
+        if read_primary.get():
+            self.sticky_reads += 1
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_reads += 1
+            return None
+        replica = healthy[self._next % len(healthy)]
+        self._next += 1
+        replica.reads += 1
+        return replica
+
+    def failed(self, replica: Replica, error: BaseException):
+        """Take ``replica`` out of rotation after a read could not reach it."""
+        replica.mark_down(error)
+        self.fallbacks += 1
+
+    async def check(self):
+        for replica in self.replicas:
+            try:
+                replica.lag = await replica.measure_lag()
+            except Exception as e:
+                replica.mark_down(e)
+                continue
+            replica.healthy = replica.lag is not None and replica.lag <= self.max_lag
+
+    async def start(self):
+        """Check the replicas once, then keep checking them in the background."""
+        if not self.replicas:
+            return
+        await self.check()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def pool_stats(self) -> dict:
+        return {replica.name: replica.pool_metrics.snapshot(replica.pool) for replica in self.replicas}
+
+    def snapshot(self) -> dict:
+        return {
+            "replicas": {replica.name: replica.snapshot() for replica in self.replicas},
+            "sticky_reads": self.sticky_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def build_replicas() -> list[Replica]:
+    async_urls = config.ASYNC_DATABASE_REPLICA_URLS
+    return [
+        Replica(f"replica{index}", url, async_urls[index] if index < len(async_urls) else None)
+        for index, url in enumerate(config.DATABASE_REPLICA_URLS)
+    ]
+
+
+replicas = ReplicaSet(build_replicas(), config.REPLICA_MAX_LAG, config.REPLICA_CHECK_INTERVAL)
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.schemas.author import AuthorDelete, AuthorPublic, AuthorCreate, AuthorRead, AuthorUpdate
-from app.crud.author import (
-    check_username_exists,
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from app.schemas.author import AuthorDelete, AuthorPublic, AuthorCreate, AuthorLogin, AuthorRead, AuthorUpdate
+from app.crud.aio import (
+    authenticate,
+    create_authors,
     create_author,
     delete_author,
     get_all_authors,
     get_author,
-    get_author_by_identifier,
+    get_authors,
+    read_author_by_identifier,
     update_author,
 )
+from app.crud.author import AUTHOR_ORDER, AUTHOR_READ, all_authors_statement
 from app.db import get_session
+from app.schemas.batch import BatchItems, BatchLookup
+from app.schemas.bulk import BulkResult
+from app.schemas.pagination import Page
+from app.utils.bulk import bulk_request_body, read_bulk_items
+from app.utils.pagination import DEFAULT_PAGE_SIZE, ordered
+from app.utils.serialization import JSONBytesResponse, parse_fields, sparse_columns
+from app.utils.streaming import VARY_ACCEPT, ndjson_response, wants_ndjson
 from app.utils.validations import validate_id
 
 router = APIRouter(prefix="/a", tags=["author"])
@@ -27,7 +37,7 @@ router = APIRouter(prefix="/a", tags=["author"])
 )
 async def create(author: AuthorCreate, session=Depends(get_session)):
     try:
-        create_author(session, author)
+        await create_author(session, author)
         return {"message": "Author created successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -35,19 +45,99 @@ async def create(author: AuthorCreate, session=Depends(get_session)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    response_description="Create many authors",
+    openapi_extra=bulk_request_body(AuthorCreate),
+    responses={
+        200: {"description": "Created ids and per-item errors, by position in the body"},
+        400: {"description": "Malformed body, too many items or body too large"},
+        500: {"description": "Internal Server Error"},
+    },
+)
+async def bulk_create(request: Request, session=Depends(get_session)):
+    try:
+        items, errors = await read_bulk_items(request, AuthorCreate)
+        created, insert_errors = await create_authors(session, items)
+        errors = sorted(errors + insert_errors, key=lambda error: error["index"])
+        return BulkResult(created=created, errors=errors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post(
+    "/login",
+    response_model=AuthorPublic,
+    summary="Check an author's credentials",
+    responses={
+        200: {"description": "Credentials valid"},
+        401: {"description": "Invalid credentials"},
+        500: {"description": "Internal Server Error"},
+    },
+)
+async def login(credentials: AuthorLogin, session=Depends(get_session)):
+    try:
+        author = await authenticate(session, credentials.identifier, credentials.password)
+        if author is None:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return AuthorPublic(id=author.id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post(
+    "/batch",
+    response_model=BatchItems[AuthorRead],
+    summary="Retrieve many authors by ID",
+    responses={
+        200: {"description": "One author per requested ID, in request order, null if not found"},
+        400: {"description": "Invalid IDs"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_batch(lookup: BatchLookup, session=Depends(get_session)):
+    try:
+        return JSONBytesResponse({"items": await get_authors(session, lookup.ids)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get(
     "/",
-    response_model=list[AuthorRead],
+    response_model=Page[AuthorRead],
     response_description="Get all authors",
     responses={
-        200: {"description": "List of authors"},
+        200: {
+            "description": "Page of authors, or every author as NDJSON with ?stream=true or Accept: application/x-ndjson",
+        },
+        400: {"description": "Invalid cursor or unknown field"},
         500: {"description": "Internal Server Error"},
     },
 )
-async def get_all(session=Depends(get_session)):
+async def get_all(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    stream: bool = False,
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. id,content"),
+    session=Depends(get_session),
+):
     try:
-        authors = get_all_authors(session)
-        return authors
+        selected = parse_fields(fields, AuthorRead)
+        if wants_ndjson(request, stream):
+            statement = all_authors_statement(sparse_columns(AUTHOR_READ, selected))
+            return ndjson_response(ordered(statement, AUTHOR_ORDER))
+        authors, next_cursor = await get_all_authors(session, cursor, limit, selected)
+        return JSONBytesResponse({"items": authors, "next_cursor": next_cursor}, headers=VARY_ACCEPT)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
@@ -55,7 +145,7 @@ async def get_all(session=Depends(get_session)):
 @router.get(
     "/{author_id}",
     summary="Retrieve author by ID",
-    # response_model=AuthorRead,
+    response_model=AuthorRead,
     responses={
         200: {"description": "Author found"},
         400: {"description": "Invalid author ID"},
@@ -67,10 +157,10 @@ async def get_by_id(author_id: int, session=Depends(get_session)):
     try:
         validate_id(author_id, "author")
 
-        author = get_author(session, author_id)
+        author = await get_author(session, author_id)
         if author is None:
             raise HTTPException(status_code=404, detail=f"Author not found")
-        return AuthorRead.model_validate(author)
+        return JSONBytesResponse(author)
     except HTTPException:
         raise
     except ValueError as e:
@@ -114,12 +204,14 @@ async def get_by_username_or_email(identifier: str, session=Depends(get_session)
                     status_code=400, detail="Username must start with a letter"
                 )
 
-        author = get_author_by_identifier(session, identifier)
+        author = await read_author_by_identifier(session, identifier)
         if not author:
             raise HTTPException(
                 status_code=404, detail=f"Author with identifier {identifier} not found"
             )
-        return AuthorRead(**author.dict())
+        return JSONBytesResponse(author)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
@@ -142,16 +234,17 @@ async def update(author_id: int, author: AuthorUpdate, session=Depends(get_sessi
         if not isinstance(author_id, int):
             raise HTTPException(status_code=400, detail="Author ID must be an integer")
 
-        if author.username and check_username_exists(session, author.username):
-            raise HTTPException(status_code=400, detail="Username already exists")
-
-        author = update_author(session, author_id, author)
+        author = await update_author(session, author_id, author)
         if not author:
             raise HTTPException(
                 status_code=404, detail=f"Author with ID {author_id} not found"
             )
         return AuthorPublic(id=author_id)
-    except HTTPException as e:
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
@@ -160,6 +253,7 @@ async def update(author_id: int, author: AuthorUpdate, session=Depends(get_sessi
     response_description="Delete author",
     responses={
         201: {"description": "Author deleted successfully"},
+        202: {"description": "Author deleted; their posts and replies are being disabled in the background"},
         400: {"description": "Duplicate username or email"},
         404: {"description": "Author not found"},
         500: {"description": "Internal Server Error"},
@@ -172,10 +266,16 @@ async def delete(author_id: int, author: AuthorDelete, session=Depends(get_sessi
         if not isinstance(author_id, int):
             raise HTTPException(status_code=400, detail="Author ID must be an integer")
 
-        author = delete_author(session, author_id)
-        if not author:
+        cascade = await delete_author(session, author_id)
+        if cascade is None:
             raise HTTPException(status_code=404, detail="Author not found")
+        if cascade.pending:
+            return JSONBytesResponse(
+                {"message": "Author deleted; their posts and replies are being removed"}, status_code=202
+            )
 
         return {"message": "Author deleted successfully"}
-    except HTTPException as e:
+    except HTTPException:
+        raise
+    except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
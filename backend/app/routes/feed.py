@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.crud.aio import get_feed
+from app.db import get_session
+from app.schemas.pagination import Page
+from app.schemas.post import PostRead
+from app.utils.pagination import DEFAULT_PAGE_SIZE
+from app.utils.serialization import JSONBytesResponse
+from app.utils.validations import validate_id
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+
+
+@router.get(
+    "",
+    response_model=Page[PostRead],
+    summary="Latest posts, from the precomputed timelines",
+    responses={
+        200: {"description": "Page of posts, newest first"},
+        400: {"description": "Invalid author ID or cursor"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get(
+    author_id: int | None = Query(None, description="Only this author's posts"),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    session=Depends(get_session),
+):
+    try:
+        if author_id is not None:
+            validate_id(author_id, "author")
+        posts, next_cursor = await get_feed(session, author_id, cursor, limit)
+        return JSONBytesResponse({"items": posts, "next_cursor": next_cursor})
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,150 @@
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import PlainTextResponse
+
+from app.cache.cache import cache
+from app.crud.aio import author_loader, post_loader, reply_writes
+from app.db import pool_stats, query_metrics
+from app.feed.feed import feed
+from app.limits.limits import admission, rate_limiter
+from app.metrics.prometheus import render
+from app.metrics.startup import startup
+from app.replicas import replicas
+
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+async def no_store(response: Response):
+    # Counters are live; no cache or proxy should keep a copy.
+    response.headers.update(NO_STORE)
+
+
+def limits_snapshot() -> dict:
+    return {"rate_limit": rate_limiter.stats.snapshot(), "admission": admission.snapshot()}
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(no_store)])
+
+
+@router.get(
+    "",
+    summary="All metrics in Prometheus text format",
+    response_class=PlainTextResponse,
+    responses={
+        200: {"description": "Request, SQL, pool, cache, batching, feed, startup, write queue, replica and limit metrics"},
+    },
+)
+async def prometheus():
+    return PlainTextResponse(
+        render(
+            query_metrics,
+            {**pool_stats(), **replicas.pool_stats()},
+            cache.stats.snapshot(),
+            {"author": author_loader.stats.snapshot(), "post": post_loader.stats.snapshot()},
+            feed.stats.snapshot(),
+            startup.snapshot(),
+            reply_writes.stats.snapshot(reply_writes.depth),
+            replicas.snapshot(),
+            limits_snapshot(),
+        ),
+        media_type="text/plain; version=0.0.4",
+        headers=NO_STORE,
+    )
+
+
+@router.get(
+    "/pool",
+    summary="Connection pool metrics",
+    responses={
+        200: {"description": "Checkout, wait and occupancy counters per engine"},
+    },
+)
+async def pool():
+    return {**pool_stats(), **replicas.pool_stats()}
+
+
+@router.get(
+    "/cache",
+    summary="Read-through cache metrics",
+    responses={
+        200: {"description": "Hit, miss and invalidation counters"},
+    },
+)
+async def cache_metrics():
+    return cache.stats.snapshot()
+
+
+@router.get(
+    "/batching",
+    summary="Lookup coalescing metrics",
+    responses={
+        200: {"description": "Loads, batched queries and ids per query for each loader"},
+    },
+)
+async def batching():
+    return {"author": author_loader.stats.snapshot(), "post": post_loader.stats.snapshot()}
+
+
+@router.get(
+    "/feed",
+    summary="Timeline metrics",
+    responses={
+        200: {"description": "Pages served from timelines, database fallbacks, rebuilds and updates"},
+    },
+)
+async def feed_metrics():
+    return feed.stats.snapshot()
+
+
+@router.get(
+    "/startup",
+    summary="Startup timing of this worker",
+    responses={
+        200: {"description": "Seconds spent importing, migrating and warming the pool, and in total"},
+    },
+)
+async def startup_metrics():
+    return startup.snapshot()
+
+
+@router.get(
+    "/writes",
+    summary="Reply write-behind queue metrics",
+    responses={
+        200: {"description": "Queued, rejected and written replies, batches and queue depth"},
+    },
+)
+async def writes():
+    return reply_writes.stats.snapshot(reply_writes.depth)
+
+
+@router.get(
+    "/replicas",
+    summary="Read replica health and routing",
+    responses={
+        200: {"description": "Health, lag and reads per replica, and reads kept on the primary"},
+    },
+)
+async def replica_metrics():
+    return replicas.snapshot()
+
+
+@router.get(
+    "/limits",
+    summary="Rate limit and admission control metrics",
+    responses={
+        200: {"description": "Limited requests, and requests admitted, waiting and turned away"},
+    },
+)
+async def limits():
+    return limits_snapshot()
+
+
+@router.get(
+    "/queries",
+    summary="Per-route SQL metrics",
+    responses={
+        200: {"description": "Requests, queries, DB time and rows per route"},
+    },
+)
+async def queries():
+    return query_metrics.snapshot()
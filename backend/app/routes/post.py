@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
 
-from app.crud.post import (
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.crud.aio import (
+    create_posts,
     create_post,
     get_all_posts,
     get_post,
+    get_posts,
+    get_post_thread,
     get_posts_by_user_id,
     get_posts_by_username,
     delete_post
 )
+from app.crud.post import POST_ORDER, POST_READ, all_posts_statement
 from app.db import get_session
-from app.schemas.post import PostCreate, PostRead
+from app.models.post import Post
+from app.schemas.batch import BatchItems, BatchLookup
+from app.schemas.bulk import BulkResult
+from app.schemas.pagination import Page
+from app.schemas.post import PostCreate, PostRead, PostThread
+from app.utils.bulk import bulk_request_body, read_bulk_items
+from app.utils.pagination import DEFAULT_PAGE_SIZE, Order, ordered, time_range
+from app.utils.serialization import JSONBytesResponse, parse_fields, sparse_columns
+from app.utils.streaming import VARY_ACCEPT, ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/p", tags=["post"])
 
@@ -26,7 +40,7 @@ router = APIRouter(prefix="/p", tags=["post"])
 )
 async def create(post: PostCreate, session=Depends(get_session)):
     try:
-        create_post(session, post)
+        await create_post(session, post)
         return {"message": "Post created successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -34,19 +48,81 @@ async def create(post: PostCreate, session=Depends(get_session)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    response_description="Create many posts",
+    openapi_extra=bulk_request_body(PostCreate),
+    responses={
+        200: {"description": "Created ids and per-item errors, by position in the body"},
+        400: {"description": "Malformed body, too many items or body too large"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def bulk_create(request: Request, session=Depends(get_session)):
+    try:
+        items, errors = await read_bulk_items(request, PostCreate)
+        created, insert_errors = await create_posts(session, items)
+        errors = sorted(errors + insert_errors, key=lambda error: error["index"])
+        return BulkResult(created=created, errors=errors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post(
+    "/batch",
+    response_model=BatchItems[PostRead],
+    summary="Retrieve many posts by ID",
+    responses={
+        200: {"description": "One post per requested ID, in request order, null if not found"},
+        400: {"description": "Invalid IDs"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_batch(lookup: BatchLookup, session=Depends(get_session)):
+    try:
+        return JSONBytesResponse({"items": await get_posts(session, lookup.ids)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get(
     "/",
-    response_model=list[PostRead],
+    response_model=Page[PostRead],
     response_description="Get all posts",
     responses={
-        200: {"description": "List of posts"},
+        200: {
+            "description": "Page of posts, or every post as NDJSON with ?stream=true or Accept: application/x-ndjson",
+        },
+        400: {"description": "Invalid cursor, time range or field"},
         500: {"description": "Internal server error"},
     },
 )
-async def get_all(session=Depends(get_session)):
+async def get_all(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    since: datetime | None = Query(None, description="Only posts created at or after this time"),
+    until: datetime | None = Query(None, description="Only posts created before this time"),
+    order: Order = "newest",
+    stream: bool = False,
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. id,content"),
+    session=Depends(get_session),
+):
     try:
-        posts = get_all_posts(session)
-        return posts
+        selected = parse_fields(fields, PostRead)
+        if wants_ndjson(request, stream):
+            statement = all_posts_statement(sparse_columns(POST_READ, selected))
+            statement = time_range(statement, Post.createdAt, since, until)
+            return ndjson_response(ordered(statement, POST_ORDER, descending=order == "newest"))
+        posts, next_cursor = await get_all_posts(session, cursor, limit, since, until, order, selected)
+        return JSONBytesResponse({"items": posts, "next_cursor": next_cursor}, headers=VARY_ACCEPT)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -64,10 +140,40 @@ async def get_all(session=Depends(get_session)):
 )
 async def get_by_id(post_id: int, session=Depends(get_session)):
     try:
-        post = get_post(session, post_id)
+        post = await get_post(session, post_id)
         if post is None:
             raise HTTPException(status_code=404, detail="Post not found")
-        return post
+        return JSONBytesResponse(post)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get(
+    "/{post_id}/thread",
+    summary="Retrieve a post with its author and replies",
+    response_model=PostThread,
+    responses={
+        200: {"description": "Post, its author and a page of replies with their authors"},
+        400: {"description": "Invalid post ID or cursor"},
+        404: {"description": "Post not found"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_thread(
+    post_id: int,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    session=Depends(get_session),
+):
+    try:
+        thread = await get_post_thread(session, post_id, cursor, limit)
+        if thread is None:
+            raise HTTPException(status_code=404, detail="Post not found")
+        return thread
     except HTTPException:
         raise
     except ValueError as e:
@@ -79,25 +185,39 @@ async def get_by_id(post_id: int, session=Depends(get_session)):
 @router.get(
     "/u/{user_id}",
     summary="Retrieve posts by user ID",
-    response_model=list[PostRead],
+    response_model=Page[PostRead],
     responses={
         200: {"description": "Posts found"},
-        400: {"description": "Invalid user ID"},
+        400: {"description": "Invalid user ID, cursor, time range or field"},
         404: {"description": "No posts found for this user"},
         500: {"description": "Internal server error"},
     }
 )
-async def get_by_user_id(user_id: int, session=Depends(get_session)):
+async def get_by_user_id(
+    user_id: int,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    since: datetime | None = Query(None, description="Only posts created at or after this time"),
+    until: datetime | None = Query(None, description="Only posts created before this time"),
+    order: Order = "newest",
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. id,content"),
+    session=Depends(get_session),
+):
     if user_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid user ID")
 
     try:
-        posts = get_posts_by_user_id(session, user_id)
-        if not posts:
+        selected = parse_fields(fields, PostRead)
+        posts, next_cursor = await get_posts_by_user_id(
+            session, user_id, cursor, limit, since, until, order, selected
+        )
+        if not posts and cursor is None:
             raise HTTPException(status_code=404, detail="No posts found for this user")
-        return posts
+        return JSONBytesResponse({"items": posts, "next_cursor": next_cursor})
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -105,25 +225,39 @@ async def get_by_user_id(user_id: int, session=Depends(get_session)):
 @router.get(
     "/u/d/{username}",
     summary="Retrieve posts by username",
-    response_model=list[PostRead],
+    response_model=Page[PostRead],
     responses={
         200: {"description": "Posts found"},
-        400: {"description": "Invalid username"},
+        400: {"description": "Invalid username, cursor, time range or field"},
         404: {"description": "No posts found for this user"},
         500: {"description": "Internal server error"},
     }
 )
-async def get_by_username(username: str, session=Depends(get_session)):
+async def get_by_username(
+    username: str,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    since: datetime | None = Query(None, description="Only posts created at or after this time"),
+    until: datetime | None = Query(None, description="Only posts created before this time"),
+    order: Order = "newest",
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. id,content"),
+    session=Depends(get_session),
+):
     if not username.strip():
         raise HTTPException(status_code=400, detail="Invalid username")
 
     try:
-        posts = get_posts_by_username(session, username)
-        if not posts:
+        selected = parse_fields(fields, PostRead)
+        posts, next_cursor = await get_posts_by_username(
+            session, username, cursor, limit, since, until, order, selected
+        )
+        if not posts and cursor is None:
             raise HTTPException(status_code=404, detail="No posts found for this user")
-        return posts
+        return JSONBytesResponse({"items": posts, "next_cursor": next_cursor})
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -144,7 +278,7 @@ async def delete(post_id: int, session=Depends(get_session)):
         raise HTTPException(status_code=400, detail="Invalid post ID")
 
     try:
-        post = delete_post(session, post_id)
+        post = await delete_post(session, post_id)
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
 
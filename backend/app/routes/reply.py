@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
 
-from app.crud.reply import (
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.crud.aio import (
+    create_replies,
     create_reply,
-    get_replies_by_post_id, delete_reply
+    get_replies_by_post_id,
+    get_thread_version,
+    delete_reply
 )
 from app.db import get_session
+from app.schemas.bulk import BulkResult
+from app.schemas.pagination import Page
 from app.schemas.reply import ReplyCreate, ReplyRead
+from app.utils.bulk import bulk_request_body, read_bulk_items
+from app.utils.conditional import is_conditional, is_not_modified, not_modified, thread_validators
+from app.utils.pagination import DEFAULT_PAGE_SIZE, Order
+from app.utils.serialization import JSONBytesResponse, parse_fields
 from app.utils.validations import validate_id
+from app.utils.write_behind import Ack, QueueFull
 
 router = APIRouter(prefix="/r", tags=["reply"])
 
@@ -16,14 +28,49 @@ router = APIRouter(prefix="/r", tags=["reply"])
     response_description="Create a new reply",
     responses={
         201: {"description": "Reply created successfully"},
+        202: {"description": "Reply queued; written with the next batch (write-behind with ack=accepted)"},
         400: {"description": "Invalid reply data"},
         500: {"description": "Internal server error"},
+        503: {"description": "Write queue full or shutting down; retry after Retry-After seconds"},
     },
 )
-async def create(reply: ReplyCreate, session=Depends(get_session)):
+async def create(
+    reply: ReplyCreate,
+    ack: Ack = Query("committed", description="With write-behind on: wait for the commit, or only the queueing"),
+    session=Depends(get_session),
+):
     try:
-        create_reply(session, reply)
+        reply_id = await create_reply(session, reply, ack)
+        if reply_id is None:
+            return JSONBytesResponse({"message": "Reply accepted"}, status_code=202)
         return {"message": "Reply created successfully"}
+    except HTTPException:
+        raise
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    response_description="Create many replies",
+    openapi_extra=bulk_request_body(ReplyCreate),
+    responses={
+        200: {"description": "Created ids and per-item errors, by position in the body"},
+        400: {"description": "Malformed body, too many items or body too large"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def bulk_create(request: Request, session=Depends(get_session)):
+    try:
+        items, errors = await read_bulk_items(request, ReplyCreate)
+        created, insert_errors = await create_replies(session, items)
+        errors = sorted(errors + insert_errors, key=lambda error: error["index"])
+        return BulkResult(created=created, errors=errors)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -32,25 +79,51 @@ async def create(reply: ReplyCreate, session=Depends(get_session)):
 
 @router.get(
     "/{post_id}",
-    response_model=list[ReplyRead],
-    response_description="Get all replies for a post",
+    response_model=Page[ReplyRead],
+    response_description="Get replies for a post",
     responses={
-        200: {"description": "List of replies"},
-        400: {"description": "Invalid post ID"},
+        200: {"description": "Page of replies"},
+        304: {"description": "No reply of the post changed since the ETag or Last-Modified sent"},
+        400: {"description": "Invalid post ID, cursor, time range or field"},
         404: {"description": "No replies found for this post"},
         500: {"description": "Internal server error"},
     },
 )
-async def get(post_id: int, session=Depends(get_session)):
+async def get(
+    request: Request,
+    post_id: int,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    since: datetime | None = Query(None, description="Only replies created at or after this time"),
+    until: datetime | None = Query(None, description="Only replies created before this time"),
+    order: Order = "oldest",
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. id,content"),
+    session=Depends(get_session),
+):
     validate_id(post_id, "post")
 
     try:
-        replies = get_replies_by_post_id(session, post_id)
+        selected = parse_fields(fields, ReplyRead)
+        if is_conditional(request.headers):
+            # Answer revalidations from the thread version, without the listing.
+            version = await get_thread_version(session, post_id)
+            if version is not None:
+                validators = thread_validators(post_id, version)
+                if is_not_modified(request.headers, validators["ETag"], validators["Last-Modified"]):
+                    return not_modified(validators)
+        replies, next_cursor, version = await get_replies_by_post_id(
+            session, post_id, cursor, limit, since, until, order, selected
+        )
         if replies is None:
             raise HTTPException(status_code=404, detail="No replies found for this post")
-        return replies
+        return JSONBytesResponse(
+            {"items": replies, "next_cursor": next_cursor},
+            headers=thread_validators(post_id, version) if version is not None else None,
+        )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -70,7 +143,7 @@ async def delete(reply_id: int, session=Depends(get_session)):
     validate_id(reply_id, "reply")
 
     try:
-        deleted_reply = delete_reply(session, reply_id)
+        deleted_reply = await delete_reply(session, reply_id)
         if deleted_reply is None:
             raise HTTPException(status_code=404, detail="Reply not found")
         return {"message": "Reply deleted successfully"}
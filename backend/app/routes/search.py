@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.crud.aio import search_content
+from app.db import get_session
+from app.schemas.pagination import Page
+from app.schemas.search import SearchHit
+from app.utils.pagination import DEFAULT_PAGE_SIZE
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get(
+    "/",
+    response_model=Page[SearchHit],
+    summary="Full-text search over posts and replies",
+    responses={
+        200: {"description": "Page of hits, best match first"},
+        400: {"description": "Invalid query or cursor"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def search(
+    q: str = Query(min_length=1, max_length=256),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    session=Depends(get_session),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Invalid query")
+
+    try:
+        hits, next_cursor = await search_content(session, q, cursor, limit)
+        return Page(items=hits, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
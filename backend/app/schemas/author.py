@@ -13,12 +13,26 @@ class AuthorCreate(BaseModel):
     disabled: bool = False
 
 
+class AuthorLogin(BaseModel):
+    identifier: str
+    password: str
+
+
 class AuthorRead(BaseModel):
     id: int
     username: str
     email: EmailStr
     full_name: str | None = None
     disabled: bool = False
+    post_count: int = 0
+
+    model_config = {"from_attributes": True}
+
+
+class AuthorSummary(BaseModel):
+    id: int
+    username: str
+    full_name: str | None = None
 
     model_config = {"from_attributes": True}
 
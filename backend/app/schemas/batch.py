@@ -0,0 +1,16 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, Field
+
+from app.config import BATCH_MAX_IDS
+
+T = TypeVar("T")
+
+
+class BatchLookup(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=BATCH_MAX_IDS)
+
+
+class BatchItems(BaseModel, Generic[T]):
+    # One entry per requested id, in request order; null when missing.
+    items: list[T | None]
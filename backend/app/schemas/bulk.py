@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class BulkCreated(BaseModel):
+    index: int
+    id: int
+
+
+class BulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel):
+    created: list[BulkCreated]
+    errors: list[BulkError]
@@ -1,12 +1,16 @@
+from datetime import datetime
+
 from pydantic import BaseModel
-import time
-import calendar
+
+from app.schemas.author import AuthorSummary
+from app.schemas.reply import ReplyWithAuthor
 
 
 class PostCreate(BaseModel):
     author_id: int
     content: str
-    createdAt: str = str(calendar.timegm(time.gmtime()))
+    # Left out, the database stamps the insert; set it to import old posts.
+    createdAt: datetime | None = None
     disabled: bool = False
 
 
@@ -14,7 +18,14 @@ class PostRead(BaseModel):
     id: int
     author_id: int
     content: str
-    createdAt: str | None = None
+    createdAt: datetime
+    reply_count: int = 0
+
+    model_config = {"from_attributes": True}
+
 
-    class Config:
-        orm_mode = True
+class PostThread(PostRead):
+    """A post with its author and one page of its replies."""
+    author: AuthorSummary
+    replies: list[ReplyWithAuthor]
+    next_cursor: str | None = None
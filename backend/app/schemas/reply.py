@@ -1,13 +1,16 @@
+from datetime import datetime
+
 from pydantic import BaseModel
-import calendar
-import time
+
+from app.schemas.author import AuthorSummary
 
 
 class ReplyCreate(BaseModel):
     author_id: int
     post_id: int
     content: str
-    createdAt: str = str(calendar.timegm(time.gmtime()))
+    # Left out, the database stamps the insert; set it to import old replies.
+    createdAt: datetime | None = None
     disabled: bool = False
 
 
@@ -16,7 +19,10 @@ class ReplyRead(BaseModel):
     author_id: int
     post_id: int
     content: str
-    createdAt: str | None = None
+    createdAt: datetime
+
+    model_config = {"from_attributes": True}
+
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+class ReplyWithAuthor(ReplyRead):
+    author: AuthorSummary
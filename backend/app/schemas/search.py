@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    kind: Literal["post", "reply"]
+    id: int
+    post_id: int
+    author_id: int
+    snippet: str
+    rank: float
+    createdAt: datetime
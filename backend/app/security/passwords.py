@@ -0,0 +1,101 @@
+"""Password hashing off the event loop.
+
+Each bcrypt hash or verify burns tens of milliseconds of CPU, so both run
+in a fixed-size executor: at most ``PASSWORD_HASH_WORKERS`` run at once
+and the rest queue there, while the event loop keeps serving requests.
+bcrypt releases the GIL, so threads scale across cores; ``process`` is
+available for hash schemes that do not.
+
+Hashes carry their own cost, so raising ``PASSWORD_BCRYPT_ROUNDS`` only
+affects new hashes until ``verify_password`` reports that a stored one
+needs an upgrade. Passwords stored in plain text before hashing existed
+verify by comparison and are always upgraded.
+"""
+import asyncio
+import functools
+import hmac
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app import config
+
+context = CryptContext(
+    schemes=["bcrypt"],
+    bcrypt__rounds=config.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_desired_rounds=config.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_desired_rounds=config.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+@functools.cache
+def dummy_hash() -> str:
+    # Verified against when the author does not exist, so a failed login
+    # takes as long whether or not the identifier is known.
+    return context.hash("quickapi-dummy-password")
+
+
+def build_executor():
+    if config.PASSWORD_HASH_POOL == "process":
+        return ProcessPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS)
+    if config.PASSWORD_HASH_POOL == "thread":
+        return ThreadPoolExecutor(
+            max_workers=config.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return None
+
+
+executor = build_executor()
+
+
+def _hash(password: str) -> str:
+    return context.hash(password)
+
+
+def _verify(password: str, stored: str | None) -> tuple[bool, str | None]:
+    if stored is None:
+        context.verify(password, dummy_hash())
+        return False, None
+    if context.identify(stored, required=False) is None:
+        # Legacy plain-text password.
+        if hmac.compare_digest(password.encode(), stored.encode()):
+            return True, context.hash(password)
+        return False, None
+    return context.verify_and_update(password, stored)
+
+
+async def _run(fn, *args):
+    if executor is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def hash_passwords(passwords: list[str], concurrency: int) -> list[str]:
+    """Hash ``passwords`` in order, at most ``concurrency`` of them queued at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def hash_one(password: str) -> str:
+        async with semaphore:
+            return await hash_password(password)
+
+    return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+
+async def verify_password(password: str, stored: str | None) -> tuple[bool, str | None]:
+    """Check ``password`` against ``stored`` and return ``(ok, new_hash)``.
+
+    ``new_hash`` is set when the password matched but ``stored`` was made
+    with other parameters (or not hashed at all) and should be replaced.
+    ``stored=None`` still costs one verification and never matches.
+    """
+    return await _run(_verify, password, stored)
+
+
+def shutdown():
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
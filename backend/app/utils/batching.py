@@ -0,0 +1,79 @@
+import asyncio
+
+
+class BatchStats:
+    def __init__(self):
+        self.loads = 0
+        self.batches = 0
+        self.keys = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "loads": self.loads,
+            "batches": self.batches,
+            "keys": self.keys,
+            "keys_per_batch": round(self.keys / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class BatchLoader:
+    """Coalesce concurrent single-key loads into one batched call.
+
+    ``load_many`` is an async callable taking a list of distinct keys and
+    returning one result per key, in the same order. Keys requested while a
+    batch is pending join it; the batch is dispatched ``window`` seconds
+    after its first key (at the end of the current event-loop iteration
+    for ``0``) or as soon as it holds ``max_batch_size`` keys.
+    """
+
+    def __init__(self, load_many, max_batch_size: int, window: float = 0.0):
+        self.load_many_fn = load_many
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.stats = BatchStats()
+        self._pending: dict = {}
+        self._handle = None
+
+    async def load(self, key):
+        self.stats.loads += 1
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._handle is None:
+                if self.window:
+                    self._handle = loop.call_later(self.window, self._dispatch)
+                else:
+                    self._handle = loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: list) -> list:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: dict):
+        self.stats.batches += 1
+        self.stats.keys += len(batch)
+        try:
+            results = await self.load_many_fn(list(batch))
+        except BaseException as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Mark the exception retrieved when every waiter is gone.
+                    future.exception()
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for future, result in zip(batch.values(), results):
+                if not future.done():
+                    future.set_result(result)
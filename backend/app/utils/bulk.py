@@ -0,0 +1,133 @@
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert
+
+from app.config import BULK_BATCH_SIZE, BULK_MAX_BYTES, BULK_MAX_ITEMS
+
+NDJSON = "application/x-ndjson"
+
+
+def bulk_request_body(schema) -> dict:
+    """OpenAPI ``requestBody`` for an endpoint reading items of ``schema``."""
+    item = schema.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": item}},
+                NDJSON: {"schema": item},
+            },
+        }
+    }
+
+
+async def _body_chunks(request, max_bytes: int):
+    """The body's chunks, failing as soon as more than ``max_bytes`` arrived."""
+    too_large = f"Body too large, the limit is {max_bytes} bytes"
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise ValueError(too_large)
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise ValueError(too_large)
+        yield chunk
+
+
+async def _ndjson_lines(chunks):
+    buffer = bytearray()
+    async for chunk in chunks:
+        # Only the new bytes are searched, so a long line costs linear time.
+        start = len(buffer)
+        buffer += chunk
+        end = buffer.rfind(b"\n", start)
+        if end < 0:
+            continue
+        lines = bytes(buffer[:end]).split(b"\n")
+        del buffer[:end + 1]
+        for line in lines:
+            yield line
+    yield bytes(buffer)
+
+
+async def read_bulk_items(request, schema):
+    """Parse a JSON array or NDJSON body into ``(items, errors)``.
+
+    ``items`` holds ``(index, model)`` pairs for every entry that validates
+    against ``schema``; the others are reported in ``errors`` by index so
+    one bad line does not reject the whole batch. Bodies over
+    ``BULK_MAX_BYTES`` are refused while they are read.
+    """
+    items, errors = [], []
+    too_many = f"Too many items, the limit is {BULK_MAX_ITEMS}"
+
+    def add(index, raw):
+        try:
+            items.append((index, schema.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"index": index, "detail": str(e)})
+
+    if request.headers.get("content-type", "").startswith(NDJSON):
+        index = 0
+        async for line in _ndjson_lines(_body_chunks(request, BULK_MAX_BYTES)):
+            if not line.strip():
+                continue
+            if index >= BULK_MAX_ITEMS:
+                raise ValueError(too_many)
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                errors.append({"index": index, "detail": "Invalid JSON"})
+            else:
+                add(index, raw)
+            index += 1
+    else:
+        body = bytearray()
+        async for chunk in _body_chunks(request, BULK_MAX_BYTES):
+            body += chunk
+        try:
+            body = json.loads(body)
+        except ValueError:
+            raise ValueError("Body must be a JSON array or NDJSON")
+        if not isinstance(body, list):
+            raise ValueError("Body must be a JSON array or NDJSON")
+        if len(body) > BULK_MAX_ITEMS:
+            raise ValueError(too_many)
+        for index, raw in enumerate(body):
+            add(index, raw)
+    return items, errors
+
+
+def chunked(rows: list, size: int = BULK_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def insert_rows(session, model, rows: list[dict], defaults: dict | None = None) -> list[int]:
+    """Insert ``rows`` in multi-row INSERT statements and return their ids.
+
+    Each chunk is a single ``INSERT ... VALUES (...), (...) RETURNING id``
+    round trip; ids come back in the order of ``rows``. ``defaults`` maps a
+    column to the SQL expression used for rows where it is ``None``, since
+    every row of a multi-row INSERT has to name the same columns.
+    """
+    ids = []
+    statement = insert(model)
+    if defaults:
+        table = model.__table__
+        statement = statement.values({
+            name: func.coalesce(bindparam(f"{name}_or_default", type_=table.c[name].type), default)
+            for name, default in defaults.items()
+        })
+        rows = [
+            {**{key: value for key, value in row.items() if key not in defaults},
+             **{f"{name}_or_default": row.get(name) for name in defaults}}
+            for row in rows
+        ]
+    statement = statement.returning(model.id, sort_by_parameter_order=True)
+    for batch in chunked(rows):
+        ids.extend(session.exec(statement, params=batch).scalars().all())
+    return ids
+
@@ -0,0 +1,43 @@
+"""Finish cascades of disabled authors whose content is still active.
+
+Deleting an author with a large history disables the rest in a background
+task of the worker; a restart in between leaves the remainder active.
+This walks the disabled authors that still have active posts or replies
+and disables them in batches of ``CASCADE_BATCH_SIZE``, each in its own
+short transaction, e.g. after a deploy or nightly from cron:
+
+    python -m app.utils.cascade
+
+Caches expire on their TTL; run it before the app starts, or restart the
+app afterwards, to drop stale pages at once.
+"""
+import sys
+
+from sqlmodel import Session
+
+from app import config
+from app.crud.cascade import cascade_author_batch, pending_authors
+from app.db import engine
+
+
+def finish(batch_size: int = config.CASCADE_BATCH_SIZE) -> dict[int, tuple[int, int]]:
+    """Return ``(posts, replies)`` disabled per author."""
+    disabled = {}
+    with Session(engine) as session:
+        for author_id in pending_authors(session):
+            posts = replies = 0
+            while cascade := cascade_author_batch(session, author_id, batch_size):
+                posts += len(cascade.posts)
+                replies += cascade.replies
+            disabled[author_id] = (posts, replies)
+    return disabled
+
+
+def main() -> int:
+    for author_id, (posts, replies) in finish().items():
+        print(f"author {author_id}: disabled {posts} posts and {replies} replies")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
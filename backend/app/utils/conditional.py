@@ -0,0 +1,85 @@
+"""Validators for conditional GETs: ETag, Last-Modified and 304.
+
+``ConditionalGetMiddleware`` gives every successful JSON GET an ETag
+hashed from its body and answers a matching ``If-None-Match`` with 304
+Not Modified. That saves the transfer and the client's parsing, but the
+response was still built. Routes with a cheaper validator set ``ETag``
+and ``Last-Modified`` themselves and answer before running the query:
+the reply listing of a post uses the post's ``version`` and
+``updatedAt``, which change in the same transaction as its replies.
+"""
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi.responses import Response
+
+from app import config
+
+
+def is_public(path: str) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in config.HTTP_PUBLIC_PATHS)
+
+
+def cache_control(path: str, shared: bool = True) -> str:
+    """``Cache-Control`` of a successful GET of ``path``.
+
+    ``shared=False`` keeps content out of shared caches, for a client that
+    must see its own writes.
+    """
+    if path == "/metrics" or path.startswith("/metrics/"):
+        return "no-store"
+    if not is_public(path) or not shared:
+        return "private, no-cache"
+    if not config.HTTP_MAX_AGE and not config.HTTP_SHARED_MAX_AGE:
+        return "public, no-cache"
+    value = f"public, max-age={config.HTTP_MAX_AGE}"
+    if config.HTTP_SHARED_MAX_AGE:
+        value += f", s-maxage={config.HTTP_SHARED_MAX_AGE}"
+    return value
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def thread_validators(post_id: int, version: list[int]) -> dict[str, str]:
+    """``ETag`` and ``Last-Modified`` of a reply listing from ``[version, modified seconds]``."""
+    number, modified = version
+    return {"ETag": f'"r{post_id}.{number}"', "Last-Modified": formatdate(modified, usegmt=True)}
+
+
+def is_conditional(headers) -> bool:
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def _opaque_tag(tag: str) -> str:
+    # If-None-Match uses the weak comparison: W/"x" matches "x".
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(headers, etag: str | None, last_modified: str | None) -> bool:
+    """Whether a GET with request ``headers`` can be answered with 304.
+
+    ``If-None-Match`` wins over ``If-Modified-Since`` when both are sent,
+    as RFC 9110 requires; Last-Modified only has second precision.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified(validators: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=validators)
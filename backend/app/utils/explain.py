@@ -0,0 +1,150 @@
+"""Check that every crud query is served by an index.
+
+Each crud function is run inside a transaction that is rolled back
+afterwards, the SQL it sends is recorded, and every SELECT/UPDATE/DELETE is
+EXPLAINed with sequential scans disabled. A plan that still scans one of
+our tables sequentially has no usable index for that query shape.
+
+Indexes left INVALID by a failed concurrent build are never used, so
+they are reported as well.
+
+Run against a migrated database with ``python -m app.utils.explain``; the
+exit status is non-zero when a query falls back to a sequential scan or an
+index is invalid. ``tests/test_query_plans.py`` runs the same checks
+whenever ``DATABASE_URL`` is set.
+"""
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, text
+from sqlmodel import Session
+
+from app.crud import author, cascade, counters, post, reply, search
+from app.db import engine
+from app.schemas.author import AuthorUpdate
+from app.utils.pagination import encode_cursor
+
+TABLES = {"author", "post", "reply"}
+
+SINCE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+UNTIL = SINCE + timedelta(days=7)
+
+CHECKS = [
+    ("get_all_authors", lambda s: author.get_all_authors(s)),
+    ("get_all_authors after cursor", lambda s: author.get_all_authors(s, encode_cursor([1]))),
+    ("get_author", lambda s: author.get_author(s, 1)),
+    ("get_authors_by_ids", lambda s: author.get_authors_by_ids(s, [1, 2, 3])),
+    ("get_author_by_identifier", lambda s: author.get_author_by_identifier(s, "someone")),
+    ("get_author_by_email", lambda s: author.get_author_by_email(s, "someone@example.com")),
+    ("check_username_exists", lambda s: author.check_username_exists(s, "someone")),
+    ("update_author", lambda s: author.update_author(s, 1, AuthorUpdate(full_name="Someone"))),
+    ("delete_author", lambda s: author.delete_author(s, 1)),
+    ("cascade_size", lambda s: cascade.cascade_size(s, 1, 1000)),
+    ("cascade_author", lambda s: cascade.cascade_author(s, 1)),
+    ("cascade_author batch", lambda s: cascade.cascade_author(s, 1, 1000)),
+    ("pending_authors", lambda s: cascade.pending_authors(s)),
+    ("get_all_posts", lambda s: post.get_all_posts(s)),
+    ("get_all_posts after cursor", lambda s: post.get_all_posts(s, encode_cursor([SINCE, 1]))),
+    ("get_all_posts since/until", lambda s: post.get_all_posts(s, since=SINCE, until=UNTIL)),
+    ("get_all_posts oldest first", lambda s: post.get_all_posts(s, since=SINCE, order="oldest")),
+    ("get_post", lambda s: post.get_post(s, 1)),
+    ("get_posts_by_ids", lambda s: post.get_posts_by_ids(s, [1, 2, 3])),
+    ("get_post_thread", lambda s: post.get_post_thread(s, 1)),
+    ("get_posts_by_user_id", lambda s: post.get_posts_by_user_id(s, 1)),
+    ("get_posts_by_user_id since", lambda s: post.get_posts_by_user_id(s, 1, since=SINCE)),
+    ("get_posts_by_username", lambda s: post.get_posts_by_username(s, "someone")),
+    ("feed_entries", lambda s: post.feed_entries(s, 1000)),
+    ("feed_entries for an author", lambda s: post.feed_entries(s, 1000, 1)),
+    ("feed_entries_by_ids", lambda s: post.feed_entries_by_ids(s, [1, 2, 3])),
+    ("delete_post", lambda s: post.delete_post(s, 1)),
+    ("get_replies_by_post_id", lambda s: reply.get_replies_by_post_id(s, 1)),
+    ("get_replies_by_post_id after cursor", lambda s: reply.get_replies_by_post_id(s, 1, encode_cursor([SINCE, 1]))),
+    ("get_replies_by_post_id newest first", lambda s: reply.get_replies_by_post_id(s, 1, until=UNTIL, order="newest")),
+    ("get_thread_version", lambda s: reply.get_thread_version(s, 1)),
+    ("search_content", lambda s: search.search_content(s, "hello world")),
+    ("reconcile_reply_counts", lambda s: counters.reconcile_reply_counts(s, 1, 1000)),
+    ("reconcile_post_counts", lambda s: counters.reconcile_post_counts(s, 1, 1000)),
+]
+
+
+def _sequential_scans(plan: dict) -> list[str]:
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in TABLES:
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(_sequential_scans(child))
+    return scans
+
+
+def _explain_all(connection, statements) -> list[str]:
+    scans = []
+    cursor = connection.connection.cursor()
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            continue
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans.extend(_sequential_scans(plan[0]["Plan"]))
+    return scans
+
+
+def check_query_plans() -> dict[str, list[str]]:
+    """Return the tables scanned sequentially by each crud function."""
+    results = {}
+    for name, run in CHECKS:
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            # An executemany runs one plan; the first row stands for all.
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+        with engine.connect() as connection:
+            # The session commits into a savepoint, so nothing the crud
+            # functions write survives the outer rollback.
+            transaction = connection.begin()
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            session = Session(bind=connection, join_transaction_mode="create_savepoint")
+            event.listen(connection, "before_cursor_execute", record)
+            try:
+                run(session)
+            except ValueError:
+                pass
+            finally:
+                event.remove(connection, "before_cursor_execute", record)
+                session.close()
+            results[name] = _explain_all(connection, statements)
+            transaction.rollback()
+    return results
+
+
+def invalid_indexes() -> list[str]:
+    """Indexes on our tables that a failed ``CREATE INDEX CONCURRENTLY`` left unusable."""
+    statement = text(
+        "SELECT c.relname FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_class t ON t.oid = i.indrelid "
+        "WHERE NOT i.indisvalid AND t.relname = ANY(:tables) "
+        "AND t.relnamespace = current_schema()::regnamespace ORDER BY c.relname"
+    )
+    with engine.connect() as connection:
+        return list(connection.execute(statement, {"tables": sorted(TABLES)}).scalars())
+
+
+def main() -> int:
+    failed = False
+    for name in invalid_indexes():
+        failed = True
+        print(f"FAIL invalid index {name}: drop it and rerun the migration")
+    for name, scans in check_query_plans().items():
+        if scans:
+            failed = True
+            print(f"FAIL {name}: sequential scan on {', '.join(sorted(set(scans)))}")
+        else:
+            print(f"ok   {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
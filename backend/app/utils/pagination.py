@@ -0,0 +1,125 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Literal
+
+from sqlalchemy import BigInteger, DateTime, Float, Integer, tuple_
+
+from app.config import env_int
+from app.utils.serialization import as_dicts, encode
+
+DEFAULT_PAGE_SIZE = env_int("PAGE_SIZE_DEFAULT", 50)
+MAX_PAGE_SIZE = env_int("PAGE_SIZE_MAX", 200)
+
+# The ``order`` query parameter of the time-ordered listings.
+Order = Literal["newest", "oldest"]
+
+
+def clamp_limit(limit: int | None) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values) -> str:
+    raw = encode(list(values))
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, RecursionError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _cursor_value(column, value):
+    # Timestamps travel as ISO 8601 strings; asyncpg only binds datetimes.
+    if isinstance(column.type, DateTime):
+        try:
+            return as_utc(datetime.fromisoformat(value))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    # A tampered id would otherwise fail in the database, as a 500.
+    if isinstance(column.type, Integer):
+        bits = 64 if isinstance(column.type, BigInteger) else 32
+        if type(value) is not int or not -(2 ** (bits - 1)) <= value < 2 ** (bits - 1):
+            raise ValueError("Invalid cursor")
+    if isinstance(column.type, Float) and type(value) not in (int, float):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def as_utc(value: datetime | None) -> datetime | None:
+    """Read a naive ``value`` as UTC, like the stored timestamps."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def time_range(statement, column, since: datetime | None = None, until: datetime | None = None):
+    """Keep rows with ``since <= column < until``; either bound may be left out."""
+    since, until = as_utc(since), as_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise ValueError("since must be before until")
+    if since is not None:
+        statement = statement.where(column >= since)
+    if until is not None:
+        statement = statement.where(column < until)
+    return statement
+
+
+def ordered(statement, columns, descending=False):
+    return statement.order_by(*(column.desc() if descending else column.asc() for column in columns))
+
+
+def keyset(statement, columns, cursor: str | None, limit: int, descending=False):
+    """Apply a keyset window over ``columns`` to ``statement``.
+
+    The cursor is compared as a row value, ``(a, b) > (:a, :b)``, which
+    Postgres turns into a range scan over a matching composite index, so
+    every page costs the same regardless of how deep it is.
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, len(columns))
+        key = tuple_(*columns)
+        bound = tuple_(*(_cursor_value(column, value) for column, value in zip(columns, values)))
+        statement = statement.where(key < bound if descending else key > bound)
+    return ordered(statement, columns, descending).limit(limit + 1)
+
+
+def page(items: list, columns, limit: int):
+    """Trim the extra row fetched by ``keyset`` into ``(items, next_cursor)``."""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[column.key] for column in columns)
+        else:
+            next_cursor = encode_cursor(getattr(last, column.key) for column in columns)
+    return items, next_cursor
+
+
+def paginate(session, statement, columns, cursor=None, limit=None, descending=False):
+    """Run a keyset-paginated select and return ``(items, next_cursor)``."""
+    limit = clamp_limit(limit)
+    statement = keyset(statement, columns, cursor, limit, descending)
+    return page(list(session.scalars(statement).all()), columns, limit)
+
+
+def paginate_rows(session, statement, columns, cursor=None, limit=None, descending=False):
+    """Like ``paginate`` for a column select; the items are plain dicts.
+
+    ``columns`` must be among the selected ones, since the cursor is read
+    back from the last row.
+    """
+    limit = clamp_limit(limit)
+    statement = keyset(statement, columns, cursor, limit, descending)
+    return page(as_dicts(session.exec(statement)), columns, limit)
@@ -0,0 +1,47 @@
+"""Repair drift in the denormalized ``reply_count`` and ``post_count``.
+
+The crud writes keep both counters exact, so this only finds work after
+rows were changed outside the app (manual SQL, restores, partial imports).
+Ids are walked in ranges of ``RECONCILE_BATCH_SIZE``, each recomputed with
+one ``UPDATE ... FROM (aggregate)`` in its own short transaction, so it is
+safe to run against a live database, e.g. nightly from cron:
+
+    python -m app.utils.reconcile
+"""
+import sys
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app import config
+from app.crud.counters import reconcile_post_counts, reconcile_reply_counts
+from app.db import engine
+from app.models.author import Author
+from app.models.post import Post
+
+JOBS = [
+    ("post.reply_count", Post, reconcile_reply_counts),
+    ("author.post_count", Author, reconcile_post_counts),
+]
+
+
+def reconcile(batch_size: int = config.RECONCILE_BATCH_SIZE) -> dict[str, int]:
+    """Return the number of rows repaired per counter."""
+    repaired = {}
+    with Session(engine) as session:
+        for name, model, run in JOBS:
+            repaired[name] = 0
+            last_id = session.exec(select(func.max(model.id))).one() or 0
+            for lo in range(1, last_id + 1, batch_size):
+                repaired[name] += run(session, lo, lo + batch_size - 1)
+    return repaired
+
+
+def main() -> int:
+    for name, count in reconcile().items():
+        print(f"{name}: repaired {count} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Fast path from SQL rows to JSON bytes.
+
+Listings select only the columns of their read schema and get them back as
+plain dicts, which ``JSONBytesResponse`` encodes with orjson in one pass.
+Returning a response object skips FastAPI's ``response_model`` validation,
+which the schema-shaped rows do not need; the routes keep
+``response_model`` for the OpenAPI document.
+
+With ``?fields=`` the listings select only the named columns, plus the
+ones their cursor needs, which are dropped again before encoding.
+"""
+import orjson
+from fastapi.responses import Response
+
+
+def read_columns(model, schema) -> list:
+    """The columns of ``model`` named by the fields of ``schema``, in field order."""
+    table_columns = model.__table__.c
+    return [getattr(model, name) for name in schema.model_fields if name in table_columns]
+
+
+def parse_fields(fields: str | None, schema) -> list[str] | None:
+    """The names in a ``?fields=a,b`` sparse fieldset, ``None`` for every field of ``schema``."""
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in schema.model_fields]
+    if not names or unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields requested")
+    return names
+
+
+def sparse_columns(columns: list, fields: list[str] | None, keep=()) -> list:
+    """The ``columns`` named in ``fields``, plus ``keep`` (e.g. the cursor columns)."""
+    if fields is None:
+        return columns
+    wanted = set(fields).union(column.key for column in keep)
+    return [column for column in columns if column.key in wanted]
+
+
+def only_fields(items: list[dict], fields: list[str] | None) -> list[dict]:
+    """Drop the columns ``sparse_columns`` only selected for ``keep``."""
+    if fields is None or not items or len(items[0]) == len(fields):
+        return items
+    return [{name: item[name] for name in fields if name in item} for item in items]
+
+
+def as_dicts(result) -> list[dict]:
+    # zip over plain rows is about twice as fast as ``result.mappings()``.
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def encode(content) -> bytes:
+    # Timestamps as ``...Z``, the same form pydantic writes for the
+    # response_model routes.
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return encode(content)
@@ -0,0 +1,57 @@
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import db
+from app.replicas import replicas
+from app.config import STREAM_BATCH_SIZE
+from app.utils.bulk import NDJSON
+from app.utils.serialization import encode
+
+
+# Listings that can stream pick their format from the Accept header, so
+# shared caches must key both forms of the response on it.
+VARY_ACCEPT = {"Vary": "Accept"}
+
+
+def wants_ndjson(request: Request, stream: bool) -> bool:
+    return stream or NDJSON in request.headers.get("accept", "")
+
+
+def _encode(keys, rows) -> bytes:
+    return b"".join(encode(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+def _iter_sync(statement, bind):
+    with Session(bind) as session:
+        result = session.exec(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        keys = list(result.keys())
+        for rows in result.partitions():
+            yield _encode(keys, rows)
+
+
+async def _iter_async(statement, bind):
+    async with AsyncSession(bind) as session:
+        result = await session.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        keys = list(result.keys())
+        async for rows in result.partitions():
+            yield _encode(keys, rows)
+
+
+def ndjson_response(statement) -> StreamingResponse:
+    """Stream every row of the column select ``statement`` as one JSON object per line.
+
+    Rows come from a server-side cursor ``STREAM_BATCH_SIZE`` at a time and
+    each batch is written out before the next is fetched, so memory stays
+    flat however large the listing is. The stream owns its session, since
+    the request's session is closed before the body is sent. Streams are
+    read from a replica when one is healthy; there is no fallback once
+    rows are being sent.
+    """
+    replica = replicas.pick()
+    if db.DB_MODE == "async":
+        body = _iter_async(statement, replica.async_engine if replica is not None else db.async_engine)
+    else:
+        body = _iter_sync(statement, replica.engine if replica is not None else db.engine)
+    return StreamingResponse(body, media_type=NDJSON, headers=VARY_ACCEPT)
@@ -0,0 +1,147 @@
+import asyncio
+from typing import Literal
+
+# What a client waits for: the write being queued, or committed.
+Ack = Literal["accepted", "committed"]
+
+
+class QueueFull(Exception):
+    """The queue stayed full for the whole enqueue timeout, or is closed."""
+
+
+class WriteStats:
+    def __init__(self):
+        self.enqueued = 0
+        self.rejected = 0
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    def snapshot(self, depth: int = 0) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "rows": self.rows,
+            "rows_per_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "errors": self.errors,
+            "failed": self.failed,
+            "depth": depth,
+            "max_depth": self.max_depth,
+        }
+
+
+class WriteBehindQueue:
+    """Buffer single-row writes and commit them in groups.
+
+    ``write_many`` is an async callable taking a list of items and
+    returning ``(created, errors)`` as the bulk crud functions do, with
+    ``index`` into that list. One background task takes up to
+    ``max_batch_size`` items per call: a batch is written as soon as it is
+    full, or ``window`` seconds after its first item; items arriving while
+    a batch is written make up the next one.
+
+    ``put`` returns a future for the item's id, failed with ``ValueError``
+    for a per-item error. Callers that acknowledge on commit await it;
+    the others drop it. When ``max_size`` items are waiting, ``put`` waits
+    up to ``put_timeout`` seconds for room and then raises ``QueueFull``.
+    """
+
+    def __init__(self, write_many, max_size: int, max_batch_size: int, window: float = 0.0, put_timeout: float = 0.0):
+        self.write_many_fn = write_many
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.put_timeout = put_timeout
+        self.stats = WriteStats()
+        self._queue: asyncio.Queue | None = None
+        self._max_size = max_size
+        self._filled: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        # Created here so they belong to the loop that serves requests.
+        self._queue = asyncio.Queue(self._max_size)
+        self._filled = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def put(self, item) -> asyncio.Future:
+        if self._closed or self._task is None:
+            self.stats.rejected += 1
+            raise QueueFull("Not accepting writes")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put((item, future)), self.put_timeout)
+            except TimeoutError:
+                self.stats.rejected += 1
+                raise QueueFull("Too many writes waiting")
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, self._queue.qsize())
+        # The writer holds the first item of the batch it is filling.
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._filled.set()
+        return future
+
+    async def close(self):
+        """Stop accepting writes and wait until the queued ones are written."""
+        if self._task is None:
+            return
+        self._closed = True
+        # The last batch goes out without waiting for the window.
+        self._filled.set()
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self.window and not self._closed and self._queue.qsize() < self.max_batch_size - 1:
+                self._filled.clear()
+                try:
+                    await asyncio.wait_for(self._filled.wait(), self.window)
+                except TimeoutError:
+                    pass
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list):
+        self.stats.batches += 1
+        self.stats.rows += len(batch)
+        futures = [future for _, future in batch]
+        try:
+            created, errors = await self.write_many_fn([item for item, _ in batch])
+        except Exception as e:
+            self.stats.failed += len(batch)
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+                    # Nobody awaits the futures of accepted-only writes.
+                    future.exception()
+            return
+        self.stats.errors += len(errors)
+        for entry in created:
+            future = futures[entry["index"]]
+            if not future.done():
+                future.set_result(entry["id"])
+        for entry in errors:
+            future = futures[entry["index"]]
+            if not future.done():
+                future.set_exception(ValueError(entry["detail"]))
+                future.exception()
@@ -0,0 +1,70 @@
+"""Benchmark suite: seed a data set, then load-test every route.
+
+    python -m benchmarks seed --authors 1000 --posts 10000 --replies 50000
+    python -m benchmarks run --requests 200 --concurrency 16 --save local
+    python -m benchmarks run --requests 200 --concurrency 16 --compare local
+
+``run`` drives the app in-process (so queries per request are counted)
+unless ``--url`` points it at a running server. ``--compare`` exits with
+status 1 when a scenario regressed against the stored baseline.
+"""
+import argparse
+import asyncio
+import sys
+
+from app import config
+from benchmarks import baseline, runner
+from benchmarks.seed import seed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seeding = commands.add_parser("seed", help="replace the tables with a generated data set")
+    seeding.add_argument("--authors", type=int, default=1000)
+    seeding.add_argument("--posts", type=int, default=10000)
+    seeding.add_argument("--replies", type=int, default=50000)
+    seeding.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of posts per author and replies per post")
+    seeding.add_argument("--seed", type=int, default=42)
+
+    running = commands.add_parser("run", help="load-test the routes")
+    running.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    running.add_argument("--concurrency", type=int, default=16)
+    running.add_argument("--warmup", type=int, default=10, help="unrecorded requests per scenario")
+    running.add_argument("--url", help="benchmark a running server instead of the app in-process")
+    running.add_argument("--only", nargs="+", metavar="SCENARIO")
+    running.add_argument("--seed", type=int, default=42)
+    running.add_argument("--save", metavar="NAME", help="store the results as baselines/NAME.json")
+    running.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json")
+    running.add_argument("--tolerance", type=float, default=0.3, help="allowed relative latency change")
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        print(seed(args.authors, args.posts, args.replies, args.skew, args.seed))
+        return 0
+
+    print(runner.HEADER)
+    results = asyncio.run(runner.run(args.requests, args.concurrency, args.url, args.only, args.warmup, args.seed))
+    if args.save:
+        meta = {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_mode": config.DB_MODE,
+            "cache_backend": config.CACHE_BACKEND,
+            "bcrypt_rounds": config.PASSWORD_BCRYPT_ROUNDS,
+            "seed": args.seed,
+        }
+        print(f"saved {baseline.save(args.save, meta, results)}")
+    if args.compare:
+        regressions = baseline.compare(baseline.load(args.compare), results, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Stored benchmark results and the comparison that flags regressions.
+
+Query counts and response sizes barely move for a given data set, so
+small changes in them are reported; latencies are only flagged beyond
+``tolerance`` because they vary between runs and machines.
+"""
+import json
+from pathlib import Path
+
+BASELINES = Path(__file__).resolve().parent / "baselines"
+
+# Cache hits and coalesced lookups make some counts fractional and slightly
+# run-dependent; an N+1 or a lost index adds at least a query per request.
+QUERY_SLACK = 0.25
+# Below this a latency change is scheduling noise, whatever its ratio.
+LATENCY_SLACK_MS = 5.0
+
+
+def path_for(name: str) -> Path:
+    return BASELINES / f"{name}.json"
+
+
+def save(name: str, meta: dict, results: dict) -> Path:
+    BASELINES.mkdir(exist_ok=True)
+    path = path_for(name)
+    path.write_text(json.dumps({"meta": meta, "scenarios": results}, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def load(name: str) -> dict:
+    return json.loads(path_for(name).read_text())
+
+
+def compare(baseline: dict, results: dict, tolerance: float = 0.3) -> list[str]:
+    """Return one line per regression of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        queries, queries_before = current["queries_per_request"], before["queries_per_request"]
+        if queries is not None and queries_before is not None and queries > queries_before + QUERY_SLACK:
+            regressions.append(f"{name}: queries/request {queries_before} -> {queries}")
+        if before["bytes"] and abs(current["bytes"] - before["bytes"]) / before["bytes"] > 0.05:
+            regressions.append(f"{name}: response size {before['bytes']} -> {current['bytes']} bytes")
+        if current["errors"] > before["errors"]:
+            regressions.append(f"{name}: 5xx responses {before['errors']} -> {current['errors']}")
+        # p99 of a few hundred requests is close to the maximum; too noisy to gate on.
+        for key in ("p50", "p95"):
+            if current[key] > before[key] * (1 + tolerance) and current[key] - before[key] > LATENCY_SLACK_MS:
+                regressions.append(f"{name}: {key} {before[key]} -> {current[key]} ms")
+    return regressions
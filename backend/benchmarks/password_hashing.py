@@ -0,0 +1,92 @@
+"""Create-author throughput with password hashing on and off the event loop.
+
+Drives the app in-process with concurrent ``POST /a/create`` calls while a
+probe keeps requesting ``GET /``, once per pool mode and concurrency level.
+With ``inline`` hashing the probe waits behind every hash; with a pool it
+stays fast while hashes queue on the workers. Needs a migrated database
+(``DATABASE_URL``) and writes real authors with unique random names:
+
+    python -m benchmarks.password_hashing --requests 200 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app import config
+from app.main import app
+from app.migrate import upgrade
+from app.security import passwords
+from benchmarks.stats import percentile, summarize
+
+
+async def probe(client, stop: asyncio.Event, latencies: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+async def run(client, requests: int, concurrency: int) -> dict:
+    prefix = "b" + uuid.uuid4().hex[:10]
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    latencies, probe_latencies, failures = [], [], 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            i = queue.get_nowait()
+            body = {"username": f"{prefix}{i}", "email": f"{prefix}{i}@bench.example", "password": "benchmark-password"}
+            started = time.perf_counter()
+            response = await client.post("/a/create", json=body)
+            latencies.append(time.perf_counter() - started)
+            failures += response.status_code != 201
+
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(client, stop, probe_latencies))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    return {
+        **summarize(latencies, elapsed),
+        "probe_p95": percentile(probe_latencies, 0.95) * 1000 if probe_latencies else 0.0,
+        "failures": failures,
+    }
+
+
+async def main(args):
+    upgrade()
+    transport = httpx.ASGITransport(app=app)
+    print(f"bcrypt rounds={config.PASSWORD_BCRYPT_ROUNDS} workers={config.PASSWORD_HASH_WORKERS}")
+    print(f"{'pool':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'GET / p95 ms':>15}{'fail':>6}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for pool in args.pools:
+            passwords.shutdown()
+            passwords.executor = (
+                ThreadPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS) if pool == "thread" else None
+            )
+            for concurrency in args.concurrency:
+                result = await run(client, args.requests, concurrency)
+                print(
+                    f"{pool:<8}{concurrency:>6}{result['throughput']:>10.1f}"
+                    f"{result['p50']:>10.1f}{result['p95']:>10.1f}"
+                    f"{result['probe_p95']:>15.1f}{result['failures']:>6}"
+                )
+    passwords.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--pools", nargs="+", choices=["inline", "thread"], default=["inline", "thread"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+import httpx
+from sqlalchemy import event
+
+from app import db
+from benchmarks.scenarios import SCENARIOS, Context
+from benchmarks.stats import summarize
+
+
+class QueryCounter:
+    """Counts statements sent by the app's engines while attached."""
+
+    def __init__(self):
+        self.count = 0
+        self.engines = [db.engine] + ([db.async_engine.sync_engine] if db.async_engine is not None else [])
+
+    def _record(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._record)
+
+
+def uncovered_routes(app) -> list[tuple[str, str]]:
+    covered = {scenario.route for scenario in SCENARIOS}
+    return [
+        (method, path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+        if (method, path) not in covered
+    ]
+
+
+async def run_scenario(client, scenario, ctx: Context, requests: int, concurrency: int, counter=None) -> dict:
+    total = max(1, int(requests * scenario.share))
+    remaining = iter(range(total))
+    latencies, sizes, statuses = [], [], {}
+
+    async def worker():
+        for _ in remaining:
+            request = scenario.request(ctx)
+            started = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - started)
+            # Bytes on the wire, before the client undoes Content-Encoding.
+            sizes.append(response.num_bytes_downloaded)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if scenario.record is not None:
+                scenario.record(ctx, response)
+
+    queries_before = counter.count if counter is not None else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    result["queries_per_request"] = (
+        round((counter.count - queries_before) / total, 2) if counter is not None else None
+    )
+    result["bytes"] = round(sum(sizes) / len(sizes))
+    result["errors"] = sum(count for status, count in statuses.items() if status >= 500)
+    result["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    return result
+
+
+async def run(
+    requests: int,
+    concurrency: int,
+    url: str | None = None,
+    only: list[str] | None = None,
+    warmup: int = 10,
+    seed: int = 42,
+    report=print,
+) -> dict:
+    """Run every scenario (or those named in ``only``) and return their results.
+
+    Without ``url`` the app is driven in-process, which is what makes the
+    per-request query counts available.
+    """
+    scenarios = [scenario for scenario in SCENARIOS if not only or scenario.name in only]
+    ctx = Context(seed)
+    counter = None
+    lifespan = None
+    if url is None:
+        from app.main import app
+
+        # Startup migrates and starts what the app runs in the background.
+        lifespan = app.router.lifespan_context(app)
+        for method, path in uncovered_routes(app):
+            report(f"warning: no scenario for {method.upper()} {path}")
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+        counter = QueryCounter()
+    else:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+
+    results = {}
+    async with AsyncExitStack() as stack:
+        if lifespan is not None:
+            await stack.enter_async_context(lifespan)
+        await stack.enter_async_context(client)
+        if counter is not None:
+            counter.__enter__()
+        try:
+            for scenario in scenarios:
+                if warmup:
+                    await run_scenario(client, scenario, ctx, warmup, min(concurrency, warmup))
+                results[scenario.name] = await run_scenario(client, scenario, ctx, requests, concurrency, counter)
+                report(format_row(scenario.name, results[scenario.name]))
+        finally:
+            if counter is not None:
+                counter.__exit__(None, None, None)
+    return results
+
+
+HEADER = f"{'scenario':<20}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>7}{'bytes':>8}{'5xx':>5}"
+
+
+def format_row(name: str, result: dict) -> str:
+    queries = result["queries_per_request"]
+    return (
+        f"{name:<20}{result['throughput']:>9.1f}{result['p50']:>9.2f}{result['p95']:>9.2f}"
+        f"{result['p99']:>9.2f}{'-' if queries is None else queries:>7}{result['bytes']:>8}{result['errors']:>5}"
+    )
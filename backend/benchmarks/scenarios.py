@@ -0,0 +1,242 @@
+"""One scenario per route, each building random requests against seeded data.
+
+``route`` is the OpenAPI method and path the scenario exercises; the runner
+reports routes that no scenario covers. Scenarios run in list order, so the
+deletes come after the creates whose rows they remove.
+"""
+import random
+import uuid
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.db import engine
+from app.models.author import Author
+from app.models.post import Post
+from benchmarks.seed import PASSWORD, WORDS
+
+
+class Context:
+    """Ids of the seeded rows and of the rows created while running."""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.run = uuid.uuid4().hex[:8]
+        self.counter = 0
+        with Session(engine) as session:
+            self.max_author_id = session.exec(select(func.max(Author.id))).one() or 1
+            self.max_post_id = session.exec(select(func.max(Post.id))).one() or 1
+        self.created_authors: list[int] = []
+        self.created_posts: list[int] = []
+        self.created_replies: list[int] = []
+        # (url, ETag) of reply listings, replayed by the revalidation scenario.
+        self.reply_etags: list[tuple[str, str]] = []
+
+    def author_id(self) -> int:
+        return self.rng.randint(1, self.max_author_id)
+
+    def post_id(self) -> int:
+        return self.rng.randint(1, self.max_post_id)
+
+    def username(self) -> str:
+        # Seeded usernames are user0..userN-1 for ids 1..N.
+        return f"user{self.author_id() - 1}"
+
+    def unique(self) -> str:
+        self.counter += 1
+        return f"b{self.run}x{self.counter}"
+
+    def new_author(self) -> dict:
+        name = self.unique()
+        return {"username": name, "email": f"{name}@bench.example", "password": PASSWORD}
+
+    def new_post(self) -> dict:
+        return {"author_id": self.author_id(), "content": " ".join(self.rng.choices(WORDS, k=20))}
+
+    def new_reply(self) -> dict:
+        return {
+            "author_id": self.author_id(),
+            "post_id": self.post_id(),
+            "content": " ".join(self.rng.choices(WORDS, k=8)),
+        }
+
+
+class Scenario:
+    def __init__(self, name: str, route: tuple[str, str], request, record=None, share: float = 1.0):
+        self.name = name
+        self.route = route
+        self.request = request
+        # Called with (ctx, response), e.g. to remember created ids.
+        self.record = record
+        # Fraction of --requests this scenario sends (bulk calls are heavy).
+        self.share = share
+
+
+def keep_created(attribute: str):
+    def record(ctx, response):
+        if response.status_code == 200:
+            getattr(ctx, attribute).extend(item["id"] for item in response.json()["created"])
+
+    return record
+
+
+def keep_reply_etag(ctx, response):
+    if response.status_code == 200 and "etag" in response.headers:
+        ctx.reply_etags.append((str(response.request.url), response.headers["etag"]))
+
+
+def revalidate_replies(ctx):
+    if not ctx.reply_etags:
+        return {"method": "GET", "url": f"/r/{ctx.post_id()}?limit=20"}
+    url, etag = ctx.rng.choice(ctx.reply_etags)
+    return {"method": "GET", "url": url, "headers": {"If-None-Match": etag}}
+
+
+def pop_created(attribute: str, path: str, **kwargs):
+    def request(ctx):
+        ids = getattr(ctx, attribute)
+        return {"method": "DELETE", "url": path.format(ids.pop() if ids else 0), **kwargs}
+
+    return request
+
+
+SCENARIOS = [
+    Scenario("root", ("get", "/"), lambda ctx: {"method": "GET", "url": "/"}),
+    # author
+    Scenario("author.list", ("get", "/a/"), lambda ctx: {"method": "GET", "url": "/a/?limit=20"}),
+    Scenario("author.get", ("get", "/a/{author_id}"), lambda ctx: {"method": "GET", "url": f"/a/{ctx.author_id()}"}),
+    Scenario(
+        "author.ident",
+        ("get", "/a/ident/{identifier}"),
+        lambda ctx: {"method": "GET", "url": f"/a/ident/{ctx.username()}"},
+    ),
+    Scenario(
+        "author.batch",
+        ("post", "/a/batch"),
+        lambda ctx: {"method": "POST", "url": "/a/batch", "json": {"ids": [ctx.author_id() for _ in range(50)]}},
+    ),
+    Scenario(
+        "author.create",
+        ("post", "/a/create"),
+        lambda ctx: {"method": "POST", "url": "/a/create", "json": ctx.new_author()},
+    ),
+    Scenario(
+        "author.bulk",
+        ("post", "/a/bulk"),
+        lambda ctx: {"method": "POST", "url": "/a/bulk", "json": [ctx.new_author() for _ in range(20)]},
+        record=keep_created("created_authors"),
+        share=0.1,
+    ),
+    Scenario(
+        "author.login",
+        ("post", "/a/login"),
+        lambda ctx: {"method": "POST", "url": "/a/login", "json": {"identifier": ctx.username(), "password": PASSWORD}},
+    ),
+    Scenario(
+        "author.update",
+        ("patch", "/a/{author_id}"),
+        lambda ctx: {"method": "PATCH", "url": f"/a/{ctx.author_id()}", "json": {"full_name": ctx.unique()}},
+    ),
+    # post
+    Scenario("post.list", ("get", "/p/"), lambda ctx: {"method": "GET", "url": "/p/?limit=20"}),
+    # Sparse fieldset: fewer columns fetched and serialized.
+    Scenario("post.list.sparse", ("get", "/p/"), lambda ctx: {"method": "GET", "url": "/p/?limit=20&fields=id,content"}),
+    # Uncompressed, to compare with the negotiated default of the client.
+    Scenario(
+        "post.list.identity",
+        ("get", "/p/"),
+        lambda ctx: {"method": "GET", "url": "/p/?limit=20", "headers": {"Accept-Encoding": "identity"}},
+    ),
+    Scenario("post.get", ("get", "/p/{post_id}"), lambda ctx: {"method": "GET", "url": f"/p/{ctx.post_id()}"}),
+    Scenario(
+        "post.thread",
+        ("get", "/p/{post_id}/thread"),
+        lambda ctx: {"method": "GET", "url": f"/p/{ctx.post_id()}/thread?limit=20"},
+    ),
+    Scenario(
+        "post.by_user",
+        ("get", "/p/u/{user_id}"),
+        lambda ctx: {"method": "GET", "url": f"/p/u/{ctx.author_id()}?limit=20"},
+    ),
+    Scenario(
+        "post.by_username",
+        ("get", "/p/u/d/{username}"),
+        lambda ctx: {"method": "GET", "url": f"/p/u/d/{ctx.username()}?limit=20"},
+    ),
+    Scenario(
+        "post.batch",
+        ("post", "/p/batch"),
+        lambda ctx: {"method": "POST", "url": "/p/batch", "json": {"ids": [ctx.post_id() for _ in range(50)]}},
+    ),
+    Scenario(
+        "post.create",
+        ("post", "/p/create"),
+        lambda ctx: {"method": "POST", "url": "/p/create", "json": ctx.new_post()},
+    ),
+    Scenario(
+        "post.bulk",
+        ("post", "/p/bulk"),
+        lambda ctx: {"method": "POST", "url": "/p/bulk", "json": [ctx.new_post() for _ in range(100)]},
+        record=keep_created("created_posts"),
+        share=0.1,
+    ),
+    # reply
+    Scenario(
+        "reply.list",
+        ("get", "/r/{post_id}"),
+        lambda ctx: {"method": "GET", "url": f"/r/{ctx.post_id()}?limit=20"},
+        record=keep_reply_etag,
+    ),
+    # Clients polling a thread they already hold: 304 unless a reply changed it.
+    Scenario("reply.revalidate", ("get", "/r/{post_id}"), revalidate_replies),
+    Scenario(
+        "reply.create",
+        ("post", "/r/create"),
+        lambda ctx: {"method": "POST", "url": "/r/create", "json": ctx.new_reply()},
+    ),
+    Scenario(
+        "reply.create.accepted",
+        ("post", "/r/create"),
+        lambda ctx: {"method": "POST", "url": "/r/create?ack=accepted", "json": ctx.new_reply()},
+    ),
+    Scenario(
+        "reply.bulk",
+        ("post", "/r/bulk"),
+        lambda ctx: {"method": "POST", "url": "/r/bulk", "json": [ctx.new_reply() for _ in range(100)]},
+        record=keep_created("created_replies"),
+        share=0.1,
+    ),
+    # search
+    Scenario(
+        "search",
+        ("get", "/search/"),
+        lambda ctx: {"method": "GET", "url": f"/search/?q={ctx.rng.choice(WORDS)}&limit=20"},
+    ),
+    # feed
+    Scenario(
+        "feed",
+        ("get", "/feed"),
+        # Half global, half one author's timeline.
+        lambda ctx: {
+            "method": "GET",
+            "url": "/feed?limit=20" if ctx.rng.random() < 0.5 else f"/feed?author_id={ctx.author_id()}&limit=20",
+        },
+    ),
+    # metrics
+    Scenario("metrics.pool", ("get", "/metrics/pool"), lambda ctx: {"method": "GET", "url": "/metrics/pool"}),
+    Scenario("metrics.cache", ("get", "/metrics/cache"), lambda ctx: {"method": "GET", "url": "/metrics/cache"}),
+    Scenario("metrics.batching", ("get", "/metrics/batching"), lambda ctx: {"method": "GET", "url": "/metrics/batching"}),
+    Scenario("metrics.feed", ("get", "/metrics/feed"), lambda ctx: {"method": "GET", "url": "/metrics/feed"}),
+    Scenario("metrics.startup", ("get", "/metrics/startup"), lambda ctx: {"method": "GET", "url": "/metrics/startup"}),
+    Scenario("metrics.writes", ("get", "/metrics/writes"), lambda ctx: {"method": "GET", "url": "/metrics/writes"}),
+    Scenario("metrics.replicas", ("get", "/metrics/replicas"), lambda ctx: {"method": "GET", "url": "/metrics/replicas"}),
+    Scenario("metrics.limits", ("get", "/metrics/limits"), lambda ctx: {"method": "GET", "url": "/metrics/limits"}),
+    # deletes, of rows created by the bulk scenarios above
+    Scenario("reply.delete", ("delete", "/r/{reply_id}"), pop_created("created_replies", "/r/{}")),
+    Scenario("post.delete", ("delete", "/p/{post_id}"), pop_created("created_posts", "/p/{}")),
+    Scenario(
+        "author.delete",
+        ("delete", "/a/{author_id}"),
+        pop_created("created_authors", "/a/{}", json={"disabled": True}),
+    ),
+]
@@ -0,0 +1,95 @@
+"""Seed the database with a benchmark data set.
+
+Post authorship and replies follow a Zipf distribution, so a few authors
+write most posts and a few posts get most replies, as in a real forum.
+The same ``--seed`` always produces the same rows. Every author's
+password is ``PASSWORD``.
+"""
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.db import engine
+from app.migrate import upgrade
+from app.models.author import Author
+from app.models.post import Post
+from app.models.reply import Reply
+from app.security.passwords import context
+from app.utils.bulk import insert_rows
+from app.utils.reconcile import reconcile
+
+PASSWORD = "benchmark-password"
+
+WORDS = (
+    "postgres index query cache latency thread reply author post search vector "
+    "database pool async cursor page stream batch bulk counter migration schema "
+    "replica commit lock vacuum plan scan join hash sort limit offset python api "
+    "server client request response header token json orm session engine event "
+    "coffee weekend music garden travel running cooking photo movie book game"
+).split()
+
+SPAN_SECONDS = 30 * 24 * 3600
+
+
+def zipf_cum_weights(n: int, s: float) -> list[float]:
+    return list(itertools.accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+
+def sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def seed(authors: int, posts: int, replies: int, skew: float = 1.1, seed: int = 42) -> dict:
+    """Replace the author, post and reply tables with a generated data set."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    password = context.hash(PASSWORD)
+    upgrade()
+
+    with Session(engine) as session:
+        session.exec(text("TRUNCATE reply, post, author RESTART IDENTITY CASCADE"))
+        author_ids = insert_rows(session, Author, [
+            {
+                "username": f"user{i}",
+                "email": f"user{i}@bench.example",
+                "password": password,
+                "full_name": f"User {i}",
+                "disabled": False,
+            }
+            for i in range(authors)
+        ])
+
+        # Shuffled so the hottest authors and posts are not simply the first ids.
+        hot_authors = rng.sample(author_ids, len(author_ids))
+        weights = zipf_cum_weights(len(hot_authors), skew)
+        post_ids = insert_rows(session, Post, [
+            {
+                "author_id": rng.choices(hot_authors, cum_weights=weights)[0],
+                "content": sentence(rng, 8, 40),
+                "createdAt": now - timedelta(seconds=rng.randrange(SPAN_SECONDS)),
+                "disabled": False,
+            }
+            for _ in range(posts)
+        ])
+
+        hot_posts = rng.sample(post_ids, len(post_ids))
+        weights = zipf_cum_weights(len(hot_posts), skew)
+        insert_rows(session, Reply, [
+            {
+                "author_id": rng.choice(author_ids),
+                "post_id": rng.choices(hot_posts, cum_weights=weights)[0],
+                "content": sentence(rng, 3, 20),
+                "createdAt": now - timedelta(seconds=rng.randrange(SPAN_SECONDS)),
+                "disabled": False,
+            }
+            for _ in range(replies)
+        ])
+        session.commit()
+        session.exec(text("ANALYZE author, post, reply"))
+        session.commit()
+
+    reconcile()
+    return {"authors": authors, "posts": posts, "replies": replies}
@@ -0,0 +1,98 @@
+"""Per-row cost of turning a post listing into JSON, ORM path vs fast path.
+
+Both paths read the same ``limit`` newest active posts and end with the
+bytes a list route sends:
+
+* ``orm``: ``select(Post)`` entities, validated into ``list[PostRead]``
+  from attributes and dumped to JSON, as ``response_model`` did;
+* ``rows``: the ``PostRead`` columns only, as dicts, encoded with orjson.
+
+Each phase is timed separately so the query, the row building and the
+encoding can be told apart. Needs a seeded database (``python -m
+benchmarks seed``):
+
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import time
+
+from pydantic import TypeAdapter
+from sqlmodel import Session, select
+
+from app.crud.author import AUTHOR_READ
+from app.crud.post import POST_ORDER, all_posts_statement
+from app.db import engine
+from app.models.author import Author
+from app.models.post import Post
+from app.schemas.author import AuthorRead
+from app.schemas.post import PostRead
+from app.utils.pagination import ordered
+from app.utils.serialization import as_dicts, encode
+
+POSTS = TypeAdapter(list[PostRead])
+
+
+def orm_path(session, limit: int) -> tuple[list[float], int, int]:
+    started = time.perf_counter()
+    statement = (
+        select(Post)
+        .join(Author, Post.author_id == Author.id)
+        .where(Post.disabled == False, Author.disabled == False)
+    )
+    posts = session.exec(ordered(statement, POST_ORDER, descending=True).limit(limit)).all()
+    fetched = time.perf_counter()
+    items = POSTS.validate_python(posts, from_attributes=True)
+    built = time.perf_counter()
+    body = POSTS.dump_json(items)
+    encoded = time.perf_counter()
+    return [fetched - started, built - fetched, encoded - built], len(posts), len(body)
+
+
+def rows_path(session, limit: int) -> tuple[list[float], int, int]:
+    started = time.perf_counter()
+    result = session.exec(ordered(all_posts_statement(), POST_ORDER, descending=True).limit(limit))
+    fetched = time.perf_counter()
+    items = as_dicts(result)
+    built = time.perf_counter()
+    body = encode(items)
+    encoded = time.perf_counter()
+    return [fetched - started, built - fetched, encoded - built], len(items), len(body)
+
+
+def authors_check(session):
+    # The fast path must not leak columns the read schema leaves out.
+    row = as_dicts(session.exec(select(*AUTHOR_READ).limit(1)))
+    assert not row or set(row[0]) == set(AuthorRead.model_fields), row
+
+
+PATHS = {"orm": orm_path, "rows": rows_path}
+
+
+def main(args):
+    print("microseconds per row, best of", args.repeat)
+    print(f"{'path':<6}{'rows':>7}{'bytes':>10}{'query':>11}{'build':>11}{'encode':>11}{'total':>11}")
+    with Session(engine) as session:
+        authors_check(session)
+        for name in args.paths:
+            best = None
+            for _ in range(args.repeat):
+                # A fresh identity map each round, as a request would have.
+                session.expunge_all()
+                phases, rows, size = PATHS[name](session, args.rows)
+                if best is None or sum(phases) < sum(best[0]):
+                    best = (phases, rows, size)
+            phases, rows, size = best
+            per_row = [phase / max(rows, 1) * 1e6 for phase in phases]
+            print(
+                f"{name:<6}{rows:>7}{size:>10}"
+                + "".join(f"{value:>11.2f}" for value in per_row)
+                + f"{sum(per_row):>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS))
+    main(parser.parse_args())
@@ -0,0 +1,19 @@
+import statistics
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Latency percentiles in milliseconds and throughput in requests/s."""
+    if not latencies:
+        return {"requests": 0, "throughput": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50": round(statistics.median(latencies) * 1000, 2),
+        "p95": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99": round(percentile(latencies, 0.99) * 1000, 2),
+    }
@@ -0,0 +1,70 @@
+"""Baseline schema, as previously created by SQLModel.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "author",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sqlmodel.AutoString(), nullable=False),
+        sa.Column("email", sqlmodel.AutoString(), nullable=False),
+        sa.Column("password", sqlmodel.AutoString(), nullable=False),
+        sa.Column("full_name", sqlmodel.AutoString(), nullable=True),
+        sa.Column("disabled", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_author_username", "author", ["username"])
+    op.create_index("ix_author_email", "author", ["email"])
+    op.create_index("ix_author_full_name", "author", ["full_name"])
+    op.create_index("ix_author_disabled", "author", ["disabled"])
+
+    op.create_table(
+        "post",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=True),
+        sa.Column("content", sqlmodel.AutoString(), nullable=False),
+        sa.Column("createdAt", sqlmodel.AutoString(), nullable=False),
+        sa.Column("disabled", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["author_id"], ["author.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_post_content", "post", ["content"])
+    op.create_index("ix_post_createdAt", "post", ["createdAt"])
+    op.create_index("ix_post_disabled", "post", ["disabled"])
+
+    op.create_table(
+        "reply",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=True),
+        sa.Column("post_id", sa.Integer(), nullable=True),
+        sa.Column("content", sqlmodel.AutoString(), nullable=False),
+        sa.Column("createdAt", sqlmodel.AutoString(), nullable=False),
+        sa.Column("disabled", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["author_id"], ["author.id"]),
+        sa.ForeignKeyConstraint(["post_id"], ["post.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_reply_content", "reply", ["content"])
+    op.create_index("ix_reply_createdAt", "reply", ["createdAt"])
+    op.create_index("ix_reply_disabled", "reply", ["disabled"])
+
+
+def downgrade() -> None:
+    op.drop_table("reply")
+    op.drop_table("post")
+    op.drop_table("author")
@@ -0,0 +1,96 @@
+"""Replace per-column indexes with ones matching the crud queries
+
+Every listing filters on ``disabled = false`` and orders by a keyset, so
+each gets a partial composite index in that order. The B-tree indexes on
+``content`` (which also reject rows over ~2.7kB), the single-column
+``disabled`` flags and the unused ``full_name`` index are dropped.
+
+Indexes are built CONCURRENTLY so the tables stay writable while this runs.
+A build that fails leaves an INVALID index behind; it is dropped and
+built again on the next run.
+The author unique indexes fail to build if active authors already share an
+email or username; resolve those rows first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = sa.text("NOT disabled")
+
+# (name, table, columns, unique)
+CREATED = [
+    ("uq_author_email_active", "author", ["email"], True),
+    ("uq_author_username_active", "author", ["username"], True),
+    ("ix_post_active_createdAt_id", "post", ["createdAt", "id"], False),
+    ("ix_post_active_author_id_createdAt_id", "post", ["author_id", "createdAt", "id"], False),
+    ("ix_reply_active_post_id_createdAt_id", "reply", ["post_id", "createdAt", "id"], False),
+]
+
+# (name, table, columns) as created by 0001
+DROPPED = [
+    ("ix_author_username", "author", ["username"]),
+    ("ix_author_email", "author", ["email"]),
+    ("ix_author_full_name", "author", ["full_name"]),
+    ("ix_author_disabled", "author", ["disabled"]),
+    ("ix_post_content", "post", ["content"]),
+    ("ix_post_createdAt", "post", ["createdAt"]),
+    ("ix_post_disabled", "post", ["disabled"]),
+    ("ix_reply_content", "reply", ["content"]),
+    ("ix_reply_createdAt", "reply", ["createdAt"]),
+    ("ix_reply_disabled", "reply", ["disabled"]),
+]
+
+# Full (non-partial) keyset indexes that create_all may have built on
+# databases started before migrations existed.
+SUPERSEDED = ["ix_post_createdAt_id", "ix_post_author_id_createdAt_id", "ix_reply_post_id_createdAt_id"]
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop ``name`` if a failed concurrent build left it INVALID, so it is built again."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in CREATED:
+            drop_invalid_index(name)
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                postgresql_where=ACTIVE,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in DROPPED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        for name in SUPERSEDED:
+            op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in DROPPED:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _, _ in CREATED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
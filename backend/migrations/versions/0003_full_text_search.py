@@ -0,0 +1,67 @@
+"""Add generated tsvector columns and GIN indexes for /search
+
+Adding a STORED generated column rewrites the table under an exclusive
+lock, so schedule this revision outside peak traffic on large tables. The
+GIN indexes are then built CONCURRENTLY.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["post", "reply"]
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop ``name`` if a failed concurrent build left it INVALID, so it is built again."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "search_vector",
+                TSVECTOR(),
+                sa.Computed("to_tsvector('english', content)", persisted=True),
+                nullable=True,
+            ),
+        )
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            drop_invalid_index(f"ix_{table}_active_search_vector")
+            op.create_index(
+                f"ix_{table}_active_search_vector",
+                table,
+                ["search_vector"],
+                postgresql_using="gin",
+                postgresql_where=sa.text("NOT disabled"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_active_search_vector", table_name=table, if_exists=True)
+        op.drop_column(table, "search_vector")
@@ -0,0 +1,43 @@
+"""Add materialized post.reply_count and author.post_count
+
+The columns are added with a constant default, which needs no table
+rewrite, and are then backfilled from the active replies and posts. The
+backfill is one UPDATE per table; on large tables, migrate first and run
+``python -m app.utils.reconcile`` instead to fill them in batches.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, counted table, foreign key)
+COUNTERS = [
+    ("post", "reply_count", "reply", "post_id"),
+    ("author", "post_count", "post", "author_id"),
+]
+
+
+def upgrade() -> None:
+    for table, column, _, _ in COUNTERS:
+        op.add_column(table, sa.Column(column, sa.Integer(), server_default=sa.text("0"), nullable=False))
+    for table, column, counted, key in COUNTERS:
+        op.execute(
+            f"UPDATE {table} SET {column} = counts.n "
+            f"FROM (SELECT {key}, count(*) AS n FROM {counted} WHERE NOT disabled GROUP BY {key}) AS counts "
+            f"WHERE {table}.id = counts.{key}"
+        )
+
+
+def downgrade() -> None:
+    for table, column, _, _ in COUNTERS:
+        op.drop_column(table, column)
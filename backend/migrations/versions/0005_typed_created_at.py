@@ -0,0 +1,65 @@
+"""Store post.createdAt and reply.createdAt as timestamptz
+
+The columns held Unix seconds as strings. They are converted in place:
+digit strings become ``to_timestamp(n)``, empty strings the migration
+time and anything else goes through Postgres' own timestamp parser, which
+fails the migration on a value it cannot read rather than guessing.
+Timestamps without an offset are read in the migrating session's time
+zone. ``now()`` becomes the server default, so inserts that leave the
+column out are stamped by the database.
+
+Changing the type rewrites each table and rebuilds its indexes under an
+exclusive lock; schedule this revision outside peak traffic on large
+tables.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["post", "reply"]
+
+TO_TIMESTAMP = """
+CASE
+    WHEN btrim("createdAt") ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN to_timestamp(btrim("createdAt")::double precision)
+    WHEN btrim("createdAt") = '' THEN now()
+    ELSE "createdAt"::timestamptz
+END
+"""
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "createdAt",
+            type_=sa.DateTime(timezone=True),
+            existing_type=sqlmodel.AutoString(),
+            existing_nullable=False,
+            postgresql_using=TO_TIMESTAMP,
+            server_default=sa.text("now()"),
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "createdAt",
+            type_=sqlmodel.AutoString(),
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            postgresql_using='floor(extract(epoch FROM "createdAt"))::bigint::text',
+            server_default=None,
+        )
@@ -0,0 +1,34 @@
+"""Add post.version and post.updatedAt
+
+Both change with the post's active replies and serve as the ETag and
+Last-Modified of its reply listing. ``now()`` is stable, so Postgres
+stores the default once in the catalog instead of rewriting the table;
+existing posts start at version 1, modified at migration time.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("post", sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False))
+    op.add_column(
+        "post",
+        sa.Column("updatedAt", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("post", "updatedAt")
+    op.drop_column("post", "version")
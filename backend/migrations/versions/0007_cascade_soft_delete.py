@@ -0,0 +1,81 @@
+"""Cascade existing soft-deletes and index replies by author
+
+Reads now only check each row's own ``disabled`` flag, so posts and
+replies of disabled authors, and replies of disabled posts, are disabled
+here as the app now does on delete (see ``app.crud.cascade``). The
+counters of the posts and authors this changes are then recomputed, and
+those posts get a new version. Each step is one UPDATE over the whole
+table; schedule this revision outside peak traffic on large tables.
+
+``ix_reply_active_author_id`` lets a cascade find an author's replies
+without a scan; it is built CONCURRENTLY.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CASCADES = [
+    "UPDATE post SET disabled = true FROM author "
+    "WHERE post.author_id = author.id AND author.disabled AND NOT post.disabled",
+    "UPDATE reply SET disabled = true FROM author "
+    "WHERE reply.author_id = author.id AND author.disabled AND NOT reply.disabled",
+    "UPDATE reply SET disabled = true FROM post "
+    "WHERE reply.post_id = post.id AND post.disabled AND NOT reply.disabled",
+]
+
+RECOUNTS = [
+    'UPDATE post SET reply_count = counts.n, version = post.version + 1, "updatedAt" = now() '
+    "FROM (SELECT p.id, count(r.id) AS n FROM post p "
+    "LEFT JOIN reply r ON r.post_id = p.id AND NOT r.disabled GROUP BY p.id) AS counts "
+    "WHERE post.id = counts.id AND post.reply_count <> counts.n",
+    "UPDATE author SET post_count = counts.n "
+    "FROM (SELECT a.id, count(p.id) AS n FROM author a "
+    "LEFT JOIN post p ON p.author_id = a.id AND NOT p.disabled GROUP BY a.id) AS counts "
+    "WHERE author.id = counts.id AND author.post_count <> counts.n",
+]
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop ``name`` if a failed concurrent build left it INVALID, so it is built again."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    for statement in CASCADES + RECOUNTS:
+        op.execute(statement)
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_reply_active_author_id")
+        op.create_index(
+            "ix_reply_active_author_id",
+            "reply",
+            ["author_id"],
+            postgresql_where=sa.text("NOT disabled"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    # Rows disabled by the upgrade stay disabled: nothing records which
+    # ones it changed.
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_reply_active_author_id", table_name="reply", postgresql_concurrently=True, if_exists=True)
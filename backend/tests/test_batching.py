@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.utils.batching import BatchLoader
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class FakeLoader:
+    """``load_many`` that records its batches and fails on key 0."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, keys):
+        self.batches.append(list(keys))
+        await asyncio.sleep(0)
+        if 0 in keys:
+            raise RuntimeError("database down")
+        return [{"id": key} for key in keys]
+
+
+def test_loads_in_the_same_tick_share_one_batch():
+    async def scenario():
+        fake = FakeLoader()
+        loader = BatchLoader(fake, max_batch_size=100)
+        results = await asyncio.gather(*(loader.load(key) for key in (3, 1, 2)))
+        assert results == [{"id": 3}, {"id": 1}, {"id": 2}]
+        assert fake.batches == [[3, 1, 2]]
+        assert loader.stats.snapshot() == {"loads": 3, "batches": 1, "keys": 3, "keys_per_batch": 3.0}
+
+        # A later tick starts a new batch.
+        assert await loader.load(4) == {"id": 4}
+        assert fake.batches[-1] == [4]
+
+    run(scenario())
+
+
+def test_full_batches_are_dispatched_at_once():
+    async def scenario():
+        fake = FakeLoader()
+        loader = BatchLoader(fake, max_batch_size=2, window=10)
+        results = await asyncio.wait_for(loader.load_many([1, 2, 3, 4]), 1)
+        assert results == [{"id": key} for key in (1, 2, 3, 4)]
+        assert fake.batches == [[1, 2], [3, 4]]
+
+    run(scenario())
+
+
+def test_window_waits_for_more_keys():
+    async def scenario():
+        fake = FakeLoader()
+        loader = BatchLoader(fake, max_batch_size=100, window=0.02)
+        first = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0.005)
+        second = asyncio.ensure_future(loader.load(2))
+        assert await asyncio.gather(first, second) == [{"id": 1}, {"id": 2}]
+        assert fake.batches == [[1, 2]]
+
+    run(scenario())
+
+
+def test_duplicate_keys_are_loaded_once():
+    async def scenario():
+        fake = FakeLoader()
+        loader = BatchLoader(fake, max_batch_size=100)
+        results = await loader.load_many([5, 5, 6, 5])
+        assert results == [{"id": 5}, {"id": 5}, {"id": 6}, {"id": 5}]
+        assert fake.batches == [[5, 6]]
+        assert loader.stats.loads == 4
+        assert loader.stats.keys == 2
+
+    run(scenario())
+
+
+def test_errors_reach_every_waiter_of_the_batch():
+    async def scenario():
+        fake = FakeLoader()
+        loader = BatchLoader(fake, max_batch_size=100)
+        results = await asyncio.gather(loader.load(0), loader.load(1), loader.load(0), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        # The loader is usable afterwards.
+        assert await loader.load(1) == {"id": 1}
+
+    run(scenario())
+
+
+def test_a_cancelled_waiter_leaves_the_batch_to_the_others():
+    async def scenario():
+        fake = FakeLoader()
+        loader = BatchLoader(fake, max_batch_size=100, window=0.01)
+        cancelled = asyncio.ensure_future(loader.load(1))
+        other = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await other == {"id": 1}
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+    run(scenario())
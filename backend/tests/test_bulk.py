@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from app.schemas.post import PostCreate
+from app.utils import bulk
+from app.utils.bulk import NDJSON, read_bulk_items
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class FakeRequest:
+    """The parts of a Starlette request ``read_bulk_items`` uses."""
+
+    def __init__(self, chunks: list[bytes], content_type: str = "application/json", content_length: bool = True):
+        self.chunks = chunks
+        self.read = 0
+        self.headers = {"content-type": content_type}
+        if content_length:
+            self.headers["content-length"] = str(sum(len(chunk) for chunk in chunks))
+
+    async def stream(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def post(n: int) -> dict:
+    return {"author_id": 1, "content": f"post {n}"}
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def test_json_array():
+    request = FakeRequest(split(json.dumps([post(0), {"content": 1}, post(2)]).encode(), 7))
+    items, errors = run(read_bulk_items(request, PostCreate))
+    assert [(index, item.content) for index, item in items] == [(0, "post 0"), (2, "post 2")]
+    assert [error["index"] for error in errors] == [1]
+
+
+@pytest.mark.parametrize("body", [b"{}", b"not json", b""])
+def test_json_body_must_be_an_array(body):
+    with pytest.raises(ValueError, match="JSON array or NDJSON"):
+        run(read_bulk_items(FakeRequest([body]), PostCreate))
+
+
+def test_ndjson_lines_across_chunk_boundaries():
+    lines = [json.dumps(post(n)).encode() for n in range(5)]
+    body = b"\n".join(lines[:2]) + b"\n\n" + b"{broken\n" + b"\n".join(lines[2:])
+    for size in (1, 3, 16, len(body)):
+        items, errors = run(read_bulk_items(FakeRequest(split(body, size), NDJSON), PostCreate))
+        assert [(index, item.content) for index, item in items] == [
+            (0, "post 0"), (1, "post 1"), (3, "post 2"), (4, "post 3"), (5, "post 4")
+        ]
+        assert errors == [{"index": 2, "detail": "Invalid JSON"}]
+
+
+def test_a_long_line_in_small_chunks():
+    content = "x" * 200_000
+    body = json.dumps({"author_id": 1, "content": content}).encode() + b"\n"
+    items, errors = run(read_bulk_items(FakeRequest(split(body, 10), NDJSON), PostCreate))
+    assert items[0][1].content == content
+    assert errors == []
+
+
+def test_too_many_items(monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_MAX_ITEMS", 2)
+    with pytest.raises(ValueError, match="Too many items"):
+        run(read_bulk_items(FakeRequest([json.dumps([post(n) for n in range(3)]).encode()]), PostCreate))
+    lines = b"\n".join(json.dumps(post(n)).encode() for n in range(3))
+    with pytest.raises(ValueError, match="Too many items"):
+        run(read_bulk_items(FakeRequest([lines], NDJSON), PostCreate))
+
+
+def test_declared_oversized_bodies_are_refused_unread(monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_MAX_BYTES", 100)
+    request = FakeRequest([b"[" + b" " * 200 + b"]"])
+    with pytest.raises(ValueError, match="Body too large"):
+        run(read_bulk_items(request, PostCreate))
+    assert request.read == 0
+
+
+@pytest.mark.parametrize("content_type", ["application/json", NDJSON])
+def test_streamed_bodies_stop_at_the_limit(monkeypatch, content_type):
+    monkeypatch.setattr(bulk, "BULK_MAX_BYTES", 100)
+    request = FakeRequest([b"[" + b" " * 39] * 10, content_type, content_length=False)
+    with pytest.raises(ValueError, match="Body too large"):
+        run(read_bulk_items(request, PostCreate))
+    # Reading stops with the chunk that crosses the limit.
+    assert request.read == 3
@@ -0,0 +1,130 @@
+import asyncio
+
+import fakeredis
+import orjson
+
+from app.cache.backends import MemoryBackend, RedisBackend
+from app.cache.cache import Cache
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_followers_survive_a_cancelled_leader():
+    async def scenario():
+        cache = Cache(MemoryBackend(), ttl=60)
+        release = asyncio.Event()
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await release.wait()
+            return {"n": loads}
+
+        leader = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        # One follower took over the load, the others shared it.
+        assert results == [{"n": 2}] * 3
+        assert loads == 2
+
+    run(scenario())
+
+
+def test_cancelled_follower_leaves_the_load_running():
+    async def scenario():
+        cache = Cache(MemoryBackend(), ttl=60)
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return 1
+
+        leader = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        follower.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await leader == 1
+        assert follower.cancelled()
+
+    run(scenario())
+
+
+def test_redis_backend_get_set_and_ttl():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        backend = RedisBackend(client, prefix="t:")
+        assert await backend.get("k") is None
+        await backend.set("k", b"value", ttl=30)
+        assert await backend.get("k") == b"value"
+        assert 0 < await client.ttl("t:k") <= 30
+        await backend.delete("k")
+        assert await backend.get("k") is None
+
+        await backend.set("short", b"value", ttl=1)
+        await asyncio.sleep(1.1)
+        assert await backend.get("short") is None
+        await backend.close()
+
+    run(scenario())
+
+
+def test_redis_backend_generations():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        cache = Cache(RedisBackend(client, prefix="t:", counter_ttl=600), ttl=60)
+        first = await cache.generation("thread:1")
+        await cache.bump("thread:1")
+        await cache.bump("thread:1")
+        assert await cache.generation("thread:1") == first + 2
+        # Generation counters outlive the entries built from them.
+        assert 60 < await client.ttl("t:gen:thread:1") <= 600
+
+        key = f"replies:1:{await cache.generation('thread:1')}"
+        assert await cache.get_or_load(key, lambda: asyncio.sleep(0, [1, 2])) == [1, 2]
+        assert orjson.loads(await client.get("t:" + key)) == [1, 2]
+        assert await cache.get_or_load(key, lambda: asyncio.sleep(0, None)) == [1, 2]
+        assert cache.stats.snapshot()["hits"] == 1
+
+    run(scenario())
+
+
+def test_redis_counter_starts_past_its_old_values_once_evicted():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        backend = RedisBackend(client, prefix="t:")
+        seen = {await backend.get_counter("gen:post:1")}
+        for _ in range(3):
+            seen.add(await backend.incr("gen:post:1"))
+        await client.delete("t:gen:post:1")
+        assert await backend.get_counter("gen:post:1") > max(seen)
+        await client.delete("t:gen:post:1")
+        assert await backend.incr("gen:post:1") > max(seen)
+
+    run(scenario())
+
+
+def test_memory_counters_are_bounded():
+    async def scenario():
+        backend = MemoryBackend(max_entries=3)
+        seen = {}
+        for n in range(10):
+            key = f"gen:post:{n}"
+            seen[key] = {await backend.get_counter(key), await backend.incr(key), await backend.incr(key)}
+            assert len(backend._counters) <= 3
+        # A dropped counter starts above every value it had.
+        assert await backend.get_counter("gen:post:0") > max(seen["gen:post:0"])
+        assert await backend.incr("gen:post:0") > max(seen["gen:post:0"])
+
+    run(scenario())
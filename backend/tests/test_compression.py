@@ -0,0 +1,144 @@
+import asyncio
+import zlib
+
+import pytest
+
+from app.middleware.compression import CompressionMiddleware, available_codecs, negotiate, tag_etag, untag_etags
+
+CODINGS = ["zstd", "br", "gzip"]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_negotiate_prefers_the_highest_q_value():
+    assert negotiate("gzip;q=1.0, br;q=0.5", CODINGS) == "gzip"
+    assert negotiate("gzip;q=0.2, br;q=0.8, zstd;q=0.5", CODINGS) == "br"
+
+
+def test_negotiate_breaks_ties_in_server_order():
+    assert negotiate("gzip, br", CODINGS) == "br"
+    assert negotiate("GZIP, ZSTD", CODINGS) == "zstd"
+    assert negotiate("*", CODINGS) == "zstd"
+
+
+def test_negotiate_refusals():
+    assert negotiate("", CODINGS) is None
+    assert negotiate("identity;q=0", CODINGS) is None
+    assert negotiate("gzip;q=0.5, identity;q=0", CODINGS) == "gzip"
+    assert negotiate("gzip;q=0", CODINGS) is None
+    assert negotiate("*;q=0.1, zstd;q=0", CODINGS) == "br"
+    # An unreadable q-value counts as a refusal.
+    assert negotiate("br;q=high, gzip", CODINGS) == "gzip"
+
+
+def test_etag_suffix_round_trip():
+    assert tag_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert tag_etag('W/"abc"', "br") == 'W/"abc-br"'
+    assert untag_etags('"abc-gzip"', CODINGS) == ('"abc"', "gzip")
+    assert untag_etags('"x", W/"abc-br"', CODINGS) == ('"x", W/"abc"', "br")
+    assert untag_etags('"abc"', CODINGS) == ('"abc"', None)
+
+
+def scope(headers: dict, method: str = "GET") -> dict:
+    return {
+        "type": "http",
+        "method": method,
+        "path": "/p/",
+        "headers": [(name.encode(), value.encode()) for name, value in headers.items()],
+    }
+
+
+def app_sending(*chunks: bytes, status: int = 200, headers: dict | None = None, seen: list | None = None):
+    async def app(scope, receive, send):
+        if seen is not None:
+            seen.append(dict(scope["headers"]))
+        response_headers = {"content-type": "application/json", **(headers or {})}
+        if len(chunks) == 1:
+            response_headers["content-length"] = str(len(chunks[0]))
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.encode(), value.encode()) for name, value in response_headers.items()],
+        })
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+async def call(app, request_headers: dict, method: str = "GET", min_size: int = 100):
+    middleware = CompressionMiddleware(app, available_codecs(["gzip"], {"gzip": 6}), min_size)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope(request_headers, method), None, send)
+    start, *bodies = messages
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, bodies
+
+
+def test_small_bodies_go_out_uncompressed():
+    body = b'{"id": 1}'
+    status, headers, bodies = run(call(app_sending(body), {"accept-encoding": "gzip"}))
+    assert status == 200
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert bodies[0]["body"] == body
+
+
+def test_large_bodies_are_compressed_and_tagged():
+    body = b'{"content": "' + b"hello " * 100 + b'"}'
+    status, headers, bodies = run(call(app_sending(body, headers={"etag": '"abc"'}), {"accept-encoding": "gzip"}))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == '"abc-gzip"'
+    assert int(headers["content-length"]) == len(bodies[0]["body"])
+    assert zlib.decompress(bodies[0]["body"], 31) == body
+
+
+def test_head_and_other_types_are_left_alone():
+    body = b"x" * 1000
+    _, headers, _ = run(call(app_sending(body), {"accept-encoding": "gzip"}, method="HEAD"))
+    assert "content-encoding" not in headers
+    _, headers, bodies = run(call(app_sending(body, headers={"content-type": "image/png"}), {"accept-encoding": "gzip"}))
+    assert "content-encoding" not in headers
+    assert "vary" not in headers
+    assert bodies[0]["body"] == body
+
+
+def test_streamed_chunks_are_flushed_as_they_come():
+    chunks = [b'{"id": %d}\n' % n for n in range(3)]
+    _, headers, bodies = run(call(app_sending(*chunks), {"accept-encoding": "gzip"}))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decompressor = zlib.decompressobj(31)
+    # Each chunk decodes on its own, without waiting for the next one.
+    for chunk, message in zip(chunks, bodies):
+        assert decompressor.decompress(message["body"]) == chunk
+    assert not bodies[-1]["more_body"]
+    assert decompressor.eof
+
+
+def test_not_modified_keeps_the_coding_suffix():
+    seen = []
+    app = app_sending(b"", status=304, headers={"etag": '"abc"'}, seen=seen)
+    status, headers, _ = run(call(app, {"accept-encoding": "gzip", "if-none-match": '"abc-gzip"'}))
+    # The route compares its own validator, without the suffix.
+    assert seen[0][b"if-none-match"] == b'"abc"'
+    assert status == 304
+    assert headers["etag"] == '"abc-gzip"'
+    assert headers["vary"] == "Accept-Encoding"
+
+
+@pytest.mark.parametrize("coding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_other_codecs_round_trip(coding, module):
+    codec = pytest.importorskip(module)
+    body = b"hello " * 200
+    compressor = available_codecs([coding], {coding: 3})[coding]()
+    data = compressor.compress(body) + compressor.finish()
+    if coding == "br":
+        assert codec.decompress(data) == body
+    else:
+        assert codec.ZstdDecompressor().decompressobj().decompress(data) == body
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app import config
+from app.middleware.conditional import ConditionalGetMiddleware
+from app.utils.conditional import body_etag, cache_control, is_not_modified
+
+MONDAY = "Mon, 05 Oct 2026 10:00:00 GMT"
+TUESDAY = "Tue, 06 Oct 2026 10:00:00 GMT"
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def public_paths(monkeypatch):
+    monkeypatch.setattr(config, "HTTP_PUBLIC_PATHS", ("/p", "/r", "/feed"))
+    monkeypatch.setattr(config, "HTTP_MAX_AGE", 0)
+    monkeypatch.setattr(config, "HTTP_SHARED_MAX_AGE", 0)
+
+
+def test_if_none_match():
+    assert is_not_modified({"if-none-match": '"a"'}, '"a"', None)
+    assert is_not_modified({"if-none-match": '"x", "a"'}, '"a"', None)
+    assert not is_not_modified({"if-none-match": '"b"'}, '"a"', None)
+    assert not is_not_modified({"if-none-match": '"a"'}, None, MONDAY)
+
+
+def test_if_none_match_uses_the_weak_comparison():
+    assert is_not_modified({"if-none-match": 'W/"a"'}, '"a"', None)
+    assert is_not_modified({"if-none-match": '"a"'}, 'W/"a"', None)
+
+
+def test_if_none_match_star():
+    assert is_not_modified({"if-none-match": "*"}, '"a"', None)
+    assert not is_not_modified({"if-none-match": "*"}, None, None)
+
+
+def test_if_none_match_wins_over_if_modified_since():
+    headers = {"if-none-match": '"b"', "if-modified-since": TUESDAY}
+    assert not is_not_modified(headers, '"a"', MONDAY)
+    headers = {"if-none-match": '"a"', "if-modified-since": MONDAY}
+    assert is_not_modified(headers, '"a"', TUESDAY)
+
+
+def test_if_modified_since():
+    assert is_not_modified({"if-modified-since": TUESDAY}, None, MONDAY)
+    assert is_not_modified({"if-modified-since": MONDAY}, None, MONDAY)
+    assert not is_not_modified({"if-modified-since": MONDAY}, None, TUESDAY)
+    assert not is_not_modified({"if-modified-since": "yesterday"}, None, MONDAY)
+    assert not is_not_modified({"if-modified-since": MONDAY}, None, None)
+
+
+def test_cache_control_by_path(public_paths, monkeypatch):
+    assert cache_control("/p/") == "public, no-cache"
+    assert cache_control("/r/12") == "public, no-cache"
+    assert cache_control("/feed") == "public, no-cache"
+    # Prefixes match whole segments only.
+    assert cache_control("/perf") == "private, no-cache"
+    assert cache_control("/a/1") == "private, no-cache"
+    assert cache_control("/") == "private, no-cache"
+    assert cache_control("/metrics") == "no-store"
+    assert cache_control("/metrics/cache") == "no-store"
+    assert cache_control("/p/", shared=False) == "private, no-cache"
+
+    monkeypatch.setattr(config, "HTTP_MAX_AGE", 5)
+    monkeypatch.setattr(config, "HTTP_SHARED_MAX_AGE", 30)
+    assert cache_control("/p/") == "public, max-age=5, s-maxage=30"
+    assert cache_control("/a/1") == "private, no-cache"
+
+
+def json_app(body: bytes, headers: dict | None = None):
+    async def app(scope, receive, send):
+        response_headers = {"content-type": "application/json", "content-length": str(len(body)), **(headers or {})}
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(name.encode(), value.encode()) for name, value in response_headers.items()],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def call(middleware, path: str, headers: dict | None = None):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, None, send)
+    start, body = messages
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, body["body"]
+
+
+def test_middleware_answers_a_matching_etag_with_304(public_paths):
+    body = b'{"id": 1}'
+    middleware = ConditionalGetMiddleware(json_app(body))
+    status, headers, sent = run(call(middleware, "/p/1"))
+    assert status == 200
+    assert headers["etag"] == body_etag(body)
+    assert headers["cache-control"] == "public, no-cache"
+    assert sent == body
+
+    status, headers, sent = run(call(middleware, "/p/1", {"if-none-match": body_etag(body)}))
+    assert status == 304
+    assert sent == b""
+    assert "content-length" not in headers and "content-type" not in headers
+
+
+def test_middleware_keeps_route_validators_and_cache_control(public_paths):
+    app = json_app(b"{}", {"etag": '"r1.3"', "cache-control": "no-store"})
+    status, headers, _ = run(call(ConditionalGetMiddleware(app), "/r/1", {"if-none-match": '"r1.3"'}))
+    # A response with its own Cache-Control is passed through as it is.
+    assert status == 200
+    assert headers["cache-control"] == "no-store"
+
+    app = json_app(b"{}", {"etag": '"r1.3"'})
+    status, headers, _ = run(call(ConditionalGetMiddleware(app), "/r/1", {"if-none-match": 'W/"r1.3"'}))
+    assert status == 304
+    assert headers["etag"] == '"r1.3"'
+
+
+def test_middleware_sticky_clients_get_private_responses(public_paths):
+    middleware = ConditionalGetMiddleware(json_app(b"{}"), sticky_cookie="primary")
+    _, headers, _ = run(call(middleware, "/p/"))
+    assert headers["cache-control"] == "public, no-cache"
+    assert headers["vary"] == "Cookie"
+    _, headers, _ = run(call(middleware, "/p/", {"cookie": "primary=1"}))
+    assert headers["cache-control"] == "private, no-cache"
+    _, headers, _ = run(call(middleware, "/a/1"))
+    assert headers["cache-control"] == "private, no-cache"
+    assert "vary" not in headers
@@ -0,0 +1,201 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.feed.backends import COMPLETE, PARTIAL, MemoryFeedBackend
+from app.feed.feed import GLOBAL, Feed, author_timeline, member, parse_member
+from app.utils.pagination import decode_cursor, encode_cursor
+
+START = datetime(2026, 10, 5, 10, 0, tzinfo=timezone.utc)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def entry(post_id: int, seconds: int, author_id: int = 1) -> tuple[int, int, datetime]:
+    return author_id, post_id, START + timedelta(seconds=seconds)
+
+
+def ids(members: list[str]) -> list[int]:
+    return [parse_member(value)[1] for value in members]
+
+
+def rebuild_from(entries):
+    """A ``rebuild`` serving the newest ``limit`` of ``entries`` and counting its calls."""
+
+    async def rebuild(limit):
+        rebuild.calls += 1
+        await asyncio.sleep(0)
+        return sorted(entries, key=lambda e: (e[2], e[1]), reverse=True)[:limit]
+
+    rebuild.calls = 0
+    return rebuild
+
+
+async def read_all(feed: Feed, name: str, limit: int, rebuild) -> tuple[list[int], bool]:
+    """Every id of a timeline, page by page; and whether a page fell back."""
+    seen, cursor = [], None
+    while True:
+        result = await feed.page(name, cursor, limit, rebuild)
+        if result is None:
+            return seen, True
+        members, cursor = result
+        seen += ids(members)
+        if cursor is None:
+            return seen, False
+
+
+def test_member_order_is_timeline_order():
+    older = member(START, 99)
+    newer = member(START + timedelta(microseconds=1), 1)
+    tie = member(START, 100)
+    assert sorted([newer, tie, older]) == [older, tie, newer]
+    assert parse_member(tie) == (START, 100)
+
+
+def test_pages_come_newest_first_with_ties_by_id():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=100)
+        entries = [entry(1, 0), entry(4, 30), entry(2, 10), entry(3, 10), entry(5, 20)]
+        rebuild = rebuild_from(entries)
+        seen, fell_back = await read_all(feed, GLOBAL, 2, rebuild)
+        assert seen == [4, 5, 3, 2, 1]
+        assert not fell_back
+        assert rebuild.calls == 1
+        assert await feed.backend.state(GLOBAL) == COMPLETE
+
+    run(scenario())
+
+
+def test_feed_cursors_are_post_listing_cursors():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=100)
+        rebuild = rebuild_from([entry(n, n) for n in range(1, 6)])
+        members, cursor = await feed.page(GLOBAL, None, 2, rebuild)
+        assert ids(members) == [5, 4]
+        created_at, post_id = decode_cursor(cursor, 2)
+        assert (datetime.fromisoformat(created_at), post_id) == (START + timedelta(seconds=4), 4)
+        # The cursor of GET /p/ continues the feed, and the other way round.
+        members, _ = await feed.page(GLOBAL, encode_cursor([START + timedelta(seconds=4), 4]), 2, rebuild)
+        assert ids(members) == [3, 2]
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("cursor", [["yesterday", 1], ["2026-10-05T10:00:00Z", 1.5], ["2026-10-05T10:00:00Z", -1]])
+def test_invalid_cursors_are_rejected(cursor):
+    feed = Feed(MemoryFeedBackend(), max_length=100)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        run(feed.page(GLOBAL, encode_cursor(cursor), 2, rebuild_from([])))
+
+
+def test_a_trimmed_timeline_falls_back_past_its_oldest_entry():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=3)
+        rebuild = rebuild_from([entry(n, n) for n in range(1, 11)])
+        seen, fell_back = await read_all(feed, GLOBAL, 2, rebuild)
+        # Two pages would need entries the timeline does not hold.
+        assert seen == [10, 9]
+        assert fell_back
+        assert await feed.backend.state(GLOBAL) == PARTIAL
+        assert feed.stats.fallbacks == 1
+
+    run(scenario())
+
+
+def test_a_complete_timeline_becomes_partial_once_trimmed():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=3)
+        rebuild = rebuild_from([entry(1, 1), entry(2, 2)])
+        assert ids((await feed.page(GLOBAL, None, 5, rebuild))[0]) == [2, 1]
+        await feed.add_posts([entry(3, 3), entry(4, 4)])
+        assert await feed.backend.state(GLOBAL) == PARTIAL
+        assert await feed.page(GLOBAL, None, 5, rebuild) is None
+        members, _ = await feed.page(GLOBAL, None, 2, rebuild)
+        assert ids(members) == [4, 3]
+
+    run(scenario())
+
+
+def test_writes_reach_the_global_and_author_timelines():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=100)
+        await feed.page(GLOBAL, None, 5, rebuild_from([]))
+        await feed.page(author_timeline(2), None, 5, rebuild_from([]))
+        await feed.add_posts([entry(1, 1, author_id=1), entry(2, 2, author_id=2), entry(3, 3, author_id=2)])
+        assert ids((await feed.page(GLOBAL, None, 5, None))[0]) == [3, 2, 1]
+        assert ids((await feed.page(author_timeline(2), None, 5, None))[0]) == [3, 2]
+
+        await feed.remove_posts([entry(3, 3, author_id=2)])
+        assert ids((await feed.page(GLOBAL, None, 5, None))[0]) == [2, 1]
+        await feed.remove_author(2, [entry(2, 2, author_id=2)])
+        assert ids((await feed.page(GLOBAL, None, 5, None))[0]) == [1]
+        assert await feed.backend.state(author_timeline(2)) is None
+
+    run(scenario())
+
+
+def test_concurrent_first_reads_share_one_rebuild():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=100)
+        rebuild = rebuild_from([entry(n, n) for n in range(1, 4)])
+        pages = await asyncio.gather(*(feed.page(GLOBAL, None, 2, rebuild) for _ in range(5)))
+        assert rebuild.calls == 1
+        assert all(ids(members) == [3, 2] for members, _ in pages)
+
+    run(scenario())
+
+
+class FailingBackend(MemoryFeedBackend):
+    def __init__(self):
+        super().__init__()
+        self.failing = False
+
+    async def add(self, *args, **kwargs):
+        if self.failing:
+            raise ConnectionError("store down")
+        await super().add(*args, **kwargs)
+
+    async def state(self, name):
+        if self.failing:
+            raise ConnectionError("store down")
+        return await super().state(name)
+
+
+def test_store_failures_fall_back_and_rebuild_what_missed_a_write():
+    async def scenario():
+        backend = FailingBackend()
+        feed = Feed(backend, max_length=100)
+        entries = [entry(1, 1)]
+        rebuild = rebuild_from(entries)
+        await feed.page(GLOBAL, None, 5, rebuild)
+
+        backend.failing = True
+        entries.append(entry(2, 2))
+        await feed.add_posts([entry(2, 2)])
+        assert await feed.page(GLOBAL, None, 5, rebuild) is None
+        assert feed.stats.errors == 3
+
+        # The timeline that missed the write is rebuilt, not served stale.
+        backend.failing = False
+        members, _ = await feed.page(GLOBAL, None, 5, rebuild)
+        assert ids(members) == [2, 1]
+        assert rebuild.calls == 2
+
+    run(scenario())
+
+
+def test_prune_forgets_members_everywhere():
+    async def scenario():
+        feed = Feed(MemoryFeedBackend(), max_length=100)
+        rebuild = rebuild_from([entry(1, 1), entry(2, 2)])
+        members, _ = await feed.page(author_timeline(1), None, 5, rebuild)
+        await feed.page(GLOBAL, None, 5, rebuild)
+        await feed.prune(author_timeline(1), members[:1])
+        assert ids((await feed.page(author_timeline(1), None, 5, rebuild))[0]) == [1]
+        assert ids((await feed.page(GLOBAL, None, 5, rebuild))[0]) == [1]
+        assert feed.stats.pruned == 1
+
+    run(scenario())
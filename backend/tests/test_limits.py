@@ -0,0 +1,223 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.limits.backends import MemoryBucketBackend, RedisBucketBackend
+from app.limits.limits import AdmissionControl, Overloaded, RateLimiter, parse_route_limits
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_parse_route_limits():
+    assert parse_route_limits("POST /a/create=1:5, get /p/=20") == {
+        "POST /a/create": (1.0, 5.0),
+        "GET /p/": (20.0, 20.0),
+    }
+    assert parse_route_limits("") == {}
+
+
+@pytest.mark.parametrize("value", ["POST /a/create=0:5", "POST /a/create=-1", "POST /a/create=1:0.5", "/a/create=1"])
+def test_parse_route_limits_rejects(value):
+    with pytest.raises(ValueError):
+        parse_route_limits(value)
+
+
+def test_redis_take_is_all_or_nothing():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        backend = RedisBucketBackend(client, prefix="t:")
+        buckets = [("{c}", 1, 5), ("{c}:POST /a/create", 1, 1)]
+        assert await backend.take(buckets) == 0
+        assert float(await client.hget("t:{c}", "level")) == pytest.approx(4, abs=0.01)
+
+        # The route bucket is empty, so the client bucket keeps its token too.
+        wait = await backend.take(buckets)
+        assert 0.9 < wait <= 1
+        assert float(await client.hget("t:{c}", "level")) == pytest.approx(4, abs=0.01)
+        assert float(await client.hget("t:{c}:POST /a/create", "level")) < 1
+
+        # Buckets expire once they would have refilled.
+        assert 0 < await client.pttl("t:{c}") <= 5000
+        assert 0 < await client.pttl("t:{c}:POST /a/create") <= 1000
+        await backend.close()
+
+    run(scenario())
+
+
+def test_redis_take_refills():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        backend = RedisBucketBackend(client, prefix="t:")
+        buckets = [("{c}", 10, 1)]
+        assert await backend.take(buckets) == 0
+        wait = await backend.take(buckets)
+        assert 0.05 < wait <= 0.1
+        await asyncio.sleep(wait + 0.02)
+        assert await backend.take(buckets) == 0
+        await backend.close()
+
+    run(scenario())
+
+
+def test_limiter_retry_after():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        limiter = RateLimiter(RedisBucketBackend(client), 0, 0, parse_route_limits("POST /a/create=0.5:1"))
+        route = limiter.route_of("POST", "/a/create")
+        await limiter.check("1.2.3.4", route)
+        with pytest.raises(Overloaded) as e:
+            await limiter.check("1.2.3.4", route)
+        assert e.value.status == 429
+        assert 1.9 < e.value.retry_after <= 2
+        # Other clients and routes have buckets of their own.
+        await limiter.check("5.6.7.8", route)
+        await limiter.check("1.2.3.4", limiter.route_of("GET", "/p/"))
+        assert limiter.stats.snapshot()["limited_routes"] == {"POST /a/create": 1}
+
+    run(scenario())
+
+
+def test_memory_take_is_all_or_nothing():
+    async def scenario():
+        backend = MemoryBucketBackend()
+        buckets = [("{c}", 1, 5), ("{c}:POST /a/create", 1, 1)]
+        assert await backend.take(buckets) == 0
+        assert 0.9 < await backend.take(buckets) <= 1
+        assert backend._buckets["{c}"][0] == pytest.approx(4, abs=0.01)
+
+    run(scenario())
+
+
+def test_limiter_rejects_a_burst_under_one():
+    with pytest.raises(ValueError):
+        RateLimiter(MemoryBucketBackend(), 10, 0.5, {})
+    # Without an overall rate the burst is unused.
+    assert RateLimiter(MemoryBucketBackend(), 0, 0, {})
+
+
+async def admit(admission: AdmissionControl, client: str, admitted: list):
+    await admission.acquire(client)
+    admitted.append(client)
+
+
+def test_admission_hands_slots_over_first_come_first_served():
+    async def scenario():
+        admission = AdmissionControl(max_active=1, max_waiting=5, wait_timeout=1)
+        admitted = []
+        await admit(admission, "a", admitted)
+        waiters = []
+        for client in "bcd":
+            waiters.append(asyncio.create_task(admit(admission, client, admitted)))
+            await asyncio.sleep(0)
+        assert admission.waiting == 3
+
+        for client in "abc":
+            admission.release(client)
+            await asyncio.sleep(0)
+            # A new arrival queues behind the waiters instead of overtaking.
+            if client == "a":
+                waiters.append(asyncio.create_task(admit(admission, "e", admitted)))
+                await asyncio.sleep(0)
+        admission.release("d")
+        await asyncio.gather(*waiters)
+        admission.release("e")
+        assert admitted == list("abcde")
+        assert admission.active == 0
+        assert admission.snapshot()["queued"] == 4
+
+    run(scenario())
+
+
+def test_admission_turns_away_a_full_line():
+    async def scenario():
+        admission = AdmissionControl(max_active=1, max_waiting=1, wait_timeout=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as e:
+            await admission.acquire("c")
+        assert e.value.status == 503
+        assert admission.stats.rejected == 1
+        admission.release("a")
+        await waiter
+        admission.release("b")
+        assert admission.active == 0
+
+    run(scenario())
+
+
+def test_admission_times_out_waiters():
+    async def scenario():
+        admission = AdmissionControl(max_active=1, max_waiting=5, wait_timeout=0.02)
+        await admission.acquire("a")
+        with pytest.raises(Overloaded) as e:
+            await admission.acquire("b")
+        assert e.value.status == 503
+        assert admission.stats.timed_out == 1
+        assert admission.waiting == 0
+        admission.release("a")
+        assert admission.active == 0
+        # The client that timed out holds nothing.
+        assert admission._clients == {}
+
+    run(scenario())
+
+
+def test_cancelled_waiters_leave_the_line():
+    async def scenario():
+        admission = AdmissionControl(max_active=1, max_waiting=5, wait_timeout=1)
+        admitted = []
+        await admit(admission, "a", admitted)
+        cancelled = asyncio.create_task(admit(admission, "b", admitted))
+        waiting = asyncio.create_task(admit(admission, "c", admitted))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert admission.waiting == 1
+        admission.release("a")
+        await waiting
+        assert admitted == ["a", "c"]
+        admission.release("c")
+        assert admission.active == 0
+
+    run(scenario())
+
+
+def test_a_slot_handed_to_a_cancelled_waiter_passes_on():
+    async def scenario():
+        admission = AdmissionControl(max_active=1, max_waiting=5, wait_timeout=1)
+        admitted = []
+        await admit(admission, "a", admitted)
+        cancelled = asyncio.create_task(admit(admission, "b", admitted))
+        waiting = asyncio.create_task(admit(admission, "c", admitted))
+        await asyncio.sleep(0)
+        # The slot goes to "b", which is cancelled before it runs again.
+        admission.release("a")
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        await waiting
+        assert admitted == ["a", "c"]
+        admission.release("c")
+        assert admission.active == 0
+        assert admission.waiting == 0
+
+    run(scenario())
+
+
+def test_admission_caps_requests_per_client():
+    async def scenario():
+        admission = AdmissionControl(max_active=10, max_waiting=10, wait_timeout=1, max_per_client=2)
+        await admission.acquire("a")
+        await admission.acquire("a")
+        with pytest.raises(Overloaded) as e:
+            await admission.acquire("a")
+        assert e.value.status == 429
+        await admission.acquire("b")
+        admission.release("a")
+        await admission.acquire("a")
+        assert admission.stats.client_rejected == 1
+
+    run(scenario())
@@ -0,0 +1,116 @@
+import base64
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import select
+
+from app.models.author import Author
+from app.models.post import Post
+from app.models.reply import Reply  # noqa: F401  (resolves the relationships)
+from app.utils.pagination import clamp_limit, decode_cursor, encode_cursor, keyset, page
+
+CREATED_AT = datetime(2026, 10, 5, 10, 0, tzinfo=timezone.utc)
+POST_ORDER = (Post.createdAt, Post.id)
+
+
+def raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor([CREATED_AT, 42])
+    assert "=" not in cursor
+    created_at, id = decode_cursor(cursor, 2)
+    assert (datetime.fromisoformat(created_at), id) == (CREATED_AT, 42)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "",
+        raw_cursor("not json"),
+        raw_cursor('{"id": 1}'),
+        raw_cursor("[1]"),
+        raw_cursor('["2026-10-05T10:00:00+00:00", 1, 2]'),
+        raw_cursor('[null, 1]'),
+        raw_cursor('[["nested"], 1]'),
+        raw_cursor("[" * 5000 + "]" * 5000),
+        "été",
+    ],
+)
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, 2)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["yesterday", 1],
+        [17, 1],
+        [CREATED_AT.isoformat(), "1; DROP TABLE post"],
+        [CREATED_AT.isoformat(), 1.5],
+        [CREATED_AT.isoformat(), True],
+        [CREATED_AT.isoformat(), 2**31],
+        [CREATED_AT.isoformat(), -(2**31) - 1],
+    ],
+)
+def test_tampered_cursor_values_are_rejected_before_the_query(values):
+    # Well-formed cursors whose values the database would refuse, as a 500.
+    statement = select(Post.id, Post.createdAt)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        keyset(statement, POST_ORDER, raw_cursor(json.dumps(values)), 10)
+
+
+def test_keyset_compares_the_whole_key():
+    statement = keyset(select(Post.id, Post.createdAt), POST_ORDER, encode_cursor([CREATED_AT, 7]), 10, descending=True)
+    sql = str(statement)
+    assert '(post."createdAt", post.id) < (' in sql
+    assert 'ORDER BY post."createdAt" DESC, post.id DESC' in sql
+
+
+def test_page_trims_the_extra_row_into_a_cursor():
+    rows = [{"createdAt": CREATED_AT, "id": id} for id in (5, 4, 3)]
+    items, cursor = page(rows, POST_ORDER, 2)
+    assert items == rows[:2]
+    assert decode_cursor(cursor, 2)[1] == 4
+    assert page(rows[:2], POST_ORDER, 2) == (rows[:2], None)
+    assert clamp_limit(0) == 1
+
+
+@pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set")
+@pytest.mark.parametrize("order", ["newest", "oldest"])
+def test_equal_timestamps_page_by_id(order):
+    from sqlmodel import Session
+
+    from app.crud import post
+    from app.db import engine
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            author = Author(username="pager", email="pager@example.com", password="x", disabled=False)
+            session.add(author)
+            session.flush()
+            posts = [Post(author_id=author.id, content=str(n), createdAt=CREATED_AT) for n in range(7)]
+            session.add_all(posts)
+            session.flush()
+            expected = sorted(p.id for p in posts)
+            if order == "newest":
+                expected.reverse()
+
+            seen, cursor = [], None
+            while True:
+                items, cursor = post.get_posts_by_user_id(session, author.id, cursor, limit=3, order=order)
+                seen += [item["id"] for item in items]
+                if cursor is None:
+                    break
+            # Each page boundary falls inside the run of equal timestamps.
+            assert seen == expected
+        finally:
+            session.close()
+            transaction.rollback()
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from app.utils.explain import check_query_plans, invalid_indexes
+
+
+def test_every_crud_query_uses_an_index():
+    scans = {name: tables for name, tables in check_query_plans().items() if tables}
+    assert scans == {}
+
+
+def test_no_index_is_invalid():
+    assert invalid_indexes() == []
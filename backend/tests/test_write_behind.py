@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.write_behind import QueueFull, WriteBehindQueue
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class FakeWriter:
+    """``write_many`` that records its batches and fails items named "bad"."""
+
+    def __init__(self):
+        self.batches = []
+        self.release: asyncio.Event | None = None
+
+    async def __call__(self, items):
+        if self.release is not None:
+            await self.release.wait()
+        if "boom" in items:
+            raise RuntimeError("database down")
+        self.batches.append(list(items))
+        created, errors = [], []
+        for index, item in enumerate(items):
+            if item == "bad":
+                errors.append({"index": index, "detail": "Post not found"})
+            else:
+                created.append({"index": index, "id": f"id-{item}"})
+        return created, errors
+
+
+def test_full_batch_is_written_without_waiting_for_the_window():
+    async def scenario():
+        writer = FakeWriter()
+        queue = WriteBehindQueue(writer, max_size=100, max_batch_size=3, window=10)
+        queue.start()
+        started = time.perf_counter()
+        futures = [await queue.put(item) for item in "abc"]
+        assert await asyncio.wait_for(asyncio.gather(*futures), 1) == ["id-a", "id-b", "id-c"]
+        assert time.perf_counter() - started < 1
+        assert writer.batches == [["a", "b", "c"]]
+        await queue.close()
+
+    run(scenario())
+
+
+def test_window_groups_items_that_arrive_together():
+    async def scenario():
+        writer = FakeWriter()
+        queue = WriteBehindQueue(writer, max_size=100, max_batch_size=10, window=0.05)
+        queue.start()
+        started = time.perf_counter()
+        first = await queue.put("a")
+        await asyncio.sleep(0.01)
+        second = await queue.put("b")
+        assert await asyncio.gather(first, second) == ["id-a", "id-b"]
+        assert time.perf_counter() - started >= 0.04
+        assert writer.batches == [["a", "b"]]
+        assert queue.stats.snapshot()["rows_per_batch"] == 2
+        await queue.close()
+
+    run(scenario())
+
+
+def test_put_raises_queue_full_after_the_timeout():
+    async def scenario():
+        writer = FakeWriter()
+        writer.release = asyncio.Event()
+        queue = WriteBehindQueue(writer, max_size=1, max_batch_size=1, put_timeout=0.05)
+        queue.start()
+        # The writer holds the first item, the queue the second.
+        accepted = [await queue.put("a")]
+        await asyncio.sleep(0)
+        accepted.append(await queue.put("b"))
+        started = time.perf_counter()
+        with pytest.raises(QueueFull):
+            await queue.put("c")
+        assert time.perf_counter() - started >= 0.04
+        assert queue.stats.rejected == 1
+        assert queue.depth == 1
+
+        # Accepted is not committed: the futures resolve once written.
+        assert not any(future.done() for future in accepted)
+        writer.release.set()
+        assert await asyncio.gather(*accepted) == ["id-a", "id-b"]
+        await queue.close()
+
+    run(scenario())
+
+
+def test_put_waits_for_room_within_the_timeout():
+    async def scenario():
+        writer = FakeWriter()
+        writer.release = asyncio.Event()
+        queue = WriteBehindQueue(writer, max_size=1, max_batch_size=1, put_timeout=1)
+        queue.start()
+        await queue.put("a")
+        await asyncio.sleep(0)
+        await queue.put("b")
+        asyncio.get_running_loop().call_later(0.02, writer.release.set)
+        assert await (await queue.put("c")) == "id-c"
+        assert queue.stats.rejected == 0
+        await queue.close()
+
+    run(scenario())
+
+
+def test_per_item_errors_fail_only_their_item():
+    async def scenario():
+        writer = FakeWriter()
+        queue = WriteBehindQueue(writer, max_size=100, max_batch_size=3, window=10)
+        queue.start()
+        ok, bad, other = [await queue.put(item) for item in ("a", "bad", "c")]
+        assert await ok == "id-a"
+        assert await other == "id-c"
+        with pytest.raises(ValueError, match="Post not found"):
+            await bad
+        assert queue.stats.errors == 1
+        await queue.close()
+
+    run(scenario())
+
+
+def test_failed_batch_fails_its_items_and_the_writer_carries_on():
+    async def scenario():
+        writer = FakeWriter()
+        queue = WriteBehindQueue(writer, max_size=100, max_batch_size=2, window=10)
+        queue.start()
+        failed = [await queue.put(item) for item in ("a", "boom")]
+        for future in failed:
+            with pytest.raises(RuntimeError):
+                await future
+        assert queue.stats.failed == 2
+        later = await queue.put("c")
+        await queue.close()
+        assert await later == "id-c"
+
+    run(scenario())
+
+
+def test_close_writes_what_is_queued_and_refuses_more():
+    async def scenario():
+        writer = FakeWriter()
+        queue = WriteBehindQueue(writer, max_size=100, max_batch_size=2, window=10)
+        queue.start()
+        futures = [await queue.put(item) for item in "abcde"]
+        started = time.perf_counter()
+        await queue.close()
+        # The last, partial batch does not wait out the window.
+        assert time.perf_counter() - started < 1
+        assert all(future.done() for future in futures)
+        assert [item for batch in writer.batches for item in batch] == list("abcde")
+        with pytest.raises(QueueFull):
+            await queue.put("f")
+
+    run(scenario())